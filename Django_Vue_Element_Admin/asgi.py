@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Django_Vue_Element_Admin.settings')
 
 application = get_asgi_application()
+
+# 预加载参数
+from core.configs import preload_configs  # noqa: E402
+
+preload_configs()
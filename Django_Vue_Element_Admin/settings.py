@@ -89,7 +89,21 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # 验证码缓存，需在多个进程间共享，多机部署时可改为Redis或Memcached，如
+    # 'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': '127.0.0.1:11211'
+    'captcha': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'captcha',
+    },
+    # 缓存版本号，需在多个进程间共享，版本号变化后各进程的缓存同时失效，多机部署时同样可改为Redis或Memcached
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 # Password validation
@@ -153,7 +167,7 @@ JWT_AUTH = {
     'rest_framework_jwt.utils.jwt_decode_handler',
 
     'JWT_PAYLOAD_HANDLER':
-    'rest_framework_jwt.utils.jwt_payload_handler',
+    'core.revocation.jwt_payload_handler',
 
     'JWT_PAYLOAD_GET_USER_ID_HANDLER':
     'rest_framework_jwt.utils.jwt_get_user_id_from_payload_handler',
@@ -179,4 +193,52 @@ JWT_AUTH = {
     'JWT_AUTH_HEADER_PREFIX': 'JWT',
     'JWT_AUTH_COOKIE': None,
 
-}
\ No newline at end of file
+}
+
+# 操作日志异步批量写入
+OPERATION_LOG = {
+    'ASYNC': True,
+    'QUEUE_SIZE': 10000,  # 队列容量
+    'BATCH_SIZE': 200,  # 每批写入条数
+    'FLUSH_INTERVAL': 2,  # 最长写入间隔（秒）
+    'OVERFLOW_POLICY': 'block',  # 队列满时的策略 block/drop_oldest/spill
+    'BLOCK_TIMEOUT': 1,  # block策略的最长等待时间（秒）
+    'SPILL_PATH': BASE_DIR / 'logs' / 'operation_log.spill',  # 溢出文件
+    'MAX_RETRY_INTERVAL': 60,  # 写库失败后的最长重试间隔（秒）
+}
+
+# 验证码预生成池
+CAPTCHA_POOL = {
+    'ENABLED': True,
+    'SIZE': 200,  # 池容量
+    'LOW_WATERMARK': 50,  # 低于该数量时开始补充
+    'REFILL_RATE': 0,  # 每秒最多生成数量，0为不限制
+    'LENGTH': 4,  # 验证码位数
+}
+
+# 在线用户会话
+ONLINE_SESSION = {
+    'TOUCH_INTERVAL': 60,  # 每个会话记录最后访问时间的最小间隔（秒）
+    'FLUSH_INTERVAL': 60,  # 批量写库间隔（秒）
+}
+
+# 后台导出任务
+EXPORT_JOB = {
+    'ROOT': BASE_DIR / 'exports',  # 导出文件目录
+    'MAX_WORKERS': 2,  # 同时执行的任务数
+    'PER_USER_LIMIT': 2,  # 每个用户未完成的任务数上限
+    'TTL': 24 * 60 * 60,  # 导出文件保留时间（秒）
+    'POLL_INTERVAL': 5,  # 调度间隔（秒）
+    'HEARTBEAT_TIMEOUT': 60,  # 执行中任务的心跳超时时间（秒），超时视为中断
+}
+
+# 日志保留策略，DAYS为保留天数，ARCHIVE为删除前是否归档
+LOG_RETENTION = {
+    'ROOT': BASE_DIR / 'archives',  # 归档文件目录
+    'BATCH_SIZE': 5000,  # 每批删除的主键区间大小
+    'INTERVAL': 24 * 60 * 60,  # 执行间隔（秒）
+    'POLICIES': {
+        'operlog': {'DAYS': 180, 'ARCHIVE': True},
+        'logininfor': {'DAYS': 180, 'ARCHIVE': True},
+    },
+}
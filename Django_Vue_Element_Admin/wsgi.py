@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Django_Vue_Element_Admin.settings')
 
 application = get_wsgi_application()
+
+# 预加载参数
+from core.configs import preload_configs  # noqa: E402
+
+preload_configs()
@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.settings import api_settings
+
+from core.cache import get_versions, bump_version
+from core.models import SysUser, SysUserRole
+from core.online import online_registry
+from core.revocation import is_revoked
+
+USER_SNAPSHOT_TIMEOUT = 5 * 60
+# 快照中保存的用户字段
+SNAPSHOT_FIELDS = ('user_id', 'username', 'status', 'dept_id', 'is_active')
+
+
+def _snapshot_key(user_id):
+    # 版本号保存在共享缓存中，任一进程修改用户或权限后其他进程的快照同样失效
+    versions = get_versions('users', 'users:%s' % user_id, 'perms', 'perms:%s' % user_id)
+    return 'user_snapshot:%s:%s' % (user_id, ':'.join(str(version) for version in versions))
+
+def load_role_ids(user_id):
+    """
+    用户状态正常的角色ID
+    """
+    return list(SysUserRole.objects.filter(user_id=user_id, role__status='0').values_list('role_id', flat=True))
+
+def load_user_snapshot(user_id):
+    """
+    从数据库读取用户快照，用户不存在时返回None
+    """
+    snapshot = SysUser.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+    if snapshot is not None:
+        snapshot['role_ids'] = load_role_ids(user_id)
+    return snapshot
+
+def get_user_snapshot(user_id):
+    """
+    获取用户快照，缓存未命中时从数据库读取
+    快照按用户和权限版本号缓存，角色变动同样使快照失效
+    """
+    key = _snapshot_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = load_user_snapshot(user_id)
+        if snapshot is not None:
+            cache.set(key, snapshot, USER_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+def get_role_ids(user):
+    """
+    用户状态正常的角色ID，认证用户直接读取快照
+    """
+    if isinstance(user, CachedUser):
+        return user.role_ids
+    return load_role_ids(user.pk)
+
+def invalidate_user_snapshot(user_ids=None):
+    """
+    使用户快照失效，不指定用户时全部失效
+    """
+    if user_ids is None:
+        bump_version('users')
+    else:
+        for user_id in user_ids:
+            bump_version('users:%s' % user_id)
+
+
+class CachedUser:
+    """
+    由缓存快照构造的用户
+    快照中的字段直接读取，访问其他属性或修改属性时才从数据库加载用户
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', None)
+
+    @property
+    def pk(self):
+        return self._snapshot['user_id']
+
+    @property
+    def role_ids(self):
+        return self._snapshot['role_ids']
+
+    def get_user(self):
+        if self._user is None:
+            object.__setattr__(self, '_user', SysUser.objects.get(pk=self.pk))
+        return self._user
+
+    def __getattr__(self, name):
+        # 加载用户后以用户对象为准，保证修改后读取一致
+        if self._user is None and name in self._snapshot:
+            return self._snapshot[name]
+        return getattr(self.get_user(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_user(), name, value)
+
+    def __eq__(self, other):
+        return isinstance(other, (CachedUser, SysUser)) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self._snapshot['username']
+
+
+class CachedJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    JWT认证，校验签名和吊销状态后从缓存快照获取用户，缓存命中时不查询数据库
+    """
+
+    def authenticate_credentials(self, payload):
+        user_id = api_settings.JWT_PAYLOAD_GET_USER_ID_HANDLER(payload)
+        if not user_id:
+            raise exceptions.AuthenticationFailed(_('Invalid payload.'))
+
+        if is_revoked(payload):
+            raise exceptions.AuthenticationFailed('令牌已失效')
+
+        snapshot = get_user_snapshot(user_id)
+        # 用户已删除或用户名已修改
+        if snapshot is None or snapshot['username'] != api_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER(payload):
+            raise exceptions.AuthenticationFailed(_('Invalid signature.'))
+
+        if not snapshot['is_active']:
+            raise exceptions.AuthenticationFailed(_('User account is disabled.'))
+
+        online_registry.touch(payload)
+        return CachedUser(snapshot)
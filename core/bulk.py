@@ -0,0 +1,69 @@
+from django.db import connections
+from django.db.models import AutoField
+
+
+def supports_upsert(connection):
+    """
+    数据库是否支持 INSERT ... ON CONFLICT DO UPDATE
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 24, 0)
+    return False
+
+def _native_upsert(connection, model, objs, unique_field, update_fields):
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if not isinstance(field, AutoField)]
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    updates = ', '.join(
+        '%s = EXCLUDED.%s' % (quote_name(column), quote_name(column))
+        for column in (opts.get_field(name).column for name in update_fields)
+    )
+    placeholder = '(%s)' % ', '.join(['%s'] * len(fields))
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            params = []
+            for obj in batch:
+                # pre_save 处理 auto_now 等自动赋值字段
+                params.extend(field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields)
+            sql = 'INSERT INTO %s (%s) VALUES %s ON CONFLICT (%s) DO UPDATE SET %s' % (
+                quote_name(opts.db_table),
+                columns,
+                ', '.join([placeholder] * len(batch)),
+                quote_name(opts.get_field(unique_field).column),
+                updates
+            )
+            cursor.execute(sql, params)
+
+def bulk_upsert(model, objs, unique_field, update_fields, using=None):
+    """
+    按唯一字段批量插入或更新
+    支持时使用数据库原生的 ON CONFLICT，否则一次查询已存在的记录后分别 bulk_create 和 bulk_update
+    """
+    if not objs:
+        return
+    using = using or model.objects.db
+    connection = connections[using]
+    if supports_upsert(connection):
+        _native_upsert(connection, model, objs, unique_field, update_fields)
+        return
+
+    pk_name = model._meta.pk.attname
+    existing = dict(model.objects.using(using).filter(
+        **{'%s__in' % unique_field: [getattr(obj, unique_field) for obj in objs]}
+    ).values_list(unique_field, pk_name))
+    creates, updates = [], []
+    for obj in objs:
+        pk = existing.get(getattr(obj, unique_field))
+        if pk is None:
+            creates.append(obj)
+        else:
+            setattr(obj, pk_name, pk)
+            updates.append(obj)
+    model.objects.using(using).bulk_create(creates)
+    model.objects.using(using).bulk_update(updates, update_fields)
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# 版本号等需在多个进程间共享的缓存
+SHARED_CACHE_ALIAS = 'shared'
+
+
+def get_shared_cache():
+    """
+    获取多进程共享的缓存，未配置时使用默认缓存
+    """
+    return caches[SHARED_CACHE_ALIAS if SHARED_CACHE_ALIAS in settings.CACHES else 'default']
+
+def _version_key(name):
+    return 'version:%s' % name
+
+def _init_version(key):
+    # 以毫秒时间戳作为初始版本号，版本键被淘汰后重新初始化也不会与旧版本重复
+    shared = get_shared_cache()
+    shared.add(key, int(time.time() * 1000), None)
+    return shared.get(key)
+
+def get_versions(*names):
+    """
+    批量获取缓存版本号
+    """
+    keys = [_version_key(name) for name in names]
+    values = get_shared_cache().get_many(keys)
+    return tuple(values.get(key) or _init_version(key) for key in keys)
+
+def get_version(name):
+    """
+    获取缓存版本号
+    """
+    return get_versions(name)[0]
+
+def bump_version(name):
+    """
+    递增缓存版本号，使该命名空间下的缓存全部失效，版本号保存在共享缓存中，其他进程同样失效
+    """
+    key = _version_key(name)
+    shared = get_shared_cache()
+    try:
+        return shared.incr(key)
+    except ValueError:
+        _init_version(key)
+        return shared.incr(key)
+
+def versioned_key(name, *parts):
+    """
+    生成带版本号的缓存键
+    """
+    return ':'.join([name, str(get_version(name))] + [str(part) for part in parts])
+
+
+class LocalCache:
+    """
+    进程内LRU缓存，超过容量时淘汰最久未使用的条目
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
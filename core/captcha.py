@@ -0,0 +1,125 @@
+import collections
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from gvcode import VFCode
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SIZE': 200,
+    'LOW_WATERMARK': 50,
+    'REFILL_RATE': 0,
+    'LENGTH': 4,
+}
+
+# 验证码有效期（秒）
+CAPTCHA_TIMEOUT = 3 * 60
+# 保存验证码的缓存，多进程部署时需使用共享缓存
+CAPTCHA_CACHE_ALIAS = 'captcha'
+
+
+def render_captcha(length):
+    """
+    生成验证码，返回 (验证码, 图片base64)
+    """
+    vf = VFCode()
+    vf.generate_digit(length)
+    return vf.code, vf.get_img_base64()[1]
+
+def _get_cache():
+    return caches[CAPTCHA_CACHE_ALIAS if CAPTCHA_CACHE_ALIAS in settings.CACHES else 'default']
+
+def save_captcha(code):
+    """
+    保存验证码，返回随机生成的标识
+    """
+    key = uuid.uuid4().hex
+    _get_cache().set('captcha:%s' % key, code, CAPTCHA_TIMEOUT)
+    return key
+
+def check_captcha(key, code):
+    """
+    校验验证码，无论是否正确验证码都只能使用一次
+    """
+    if not key or not code:
+        return False
+    store = _get_cache()
+    key = 'captcha:%s' % key
+    value = store.get(key)
+    # delete 返回是否删除成功，并发请求中只有一个能删除成功
+    if value is None or not store.delete(key):
+        return False
+    return value.lower() == code.strip().lower()
+
+
+class CaptchaPool:
+    """
+    验证码预生成池
+    后台线程预先生成验证码放入有界队列，请求时直接取出，数量低于水位线时补充到容量上限
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self.pool = collections.deque(maxlen=self.options['SIZE'])
+        self.counters = {'hit': 0, 'miss': 0, 'rendered': 0}
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """
+        取出一个验证码，池为空时同步生成
+        """
+        if not self.options['ENABLED']:
+            return render_captcha(self.options['LENGTH'])
+
+        self._ensure_started()
+        try:
+            captcha = self.pool.popleft()
+            self._incr('hit')
+        except IndexError:
+            captcha = None
+            self._incr('miss')
+        if len(self.pool) < self.options['LOW_WATERMARK']:
+            self._refill.set()
+        return captcha or render_captcha(self.options['LENGTH'])
+
+    def stats(self):
+        """
+        池中数量及命中、未命中计数
+        """
+        with self._lock:
+            stats = dict(self.counters)
+        stats['size'] = len(self.pool)
+        stats['capacity'] = self.options['SIZE']
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._refill.set()
+                    self._thread = threading.Thread(target=self._run, name='captcha-pool', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        # REFILL_RATE 为每秒生成数量上限，0表示不限制
+        interval = 1 / self.options['REFILL_RATE'] if self.options['REFILL_RATE'] else 0
+        while True:
+            self._refill.wait()
+            self._refill.clear()
+            while len(self.pool) < self.options['SIZE']:
+                self.pool.append(render_captcha(self.options['LENGTH']))
+                self._incr('rendered')
+                if interval:
+                    time.sleep(interval)
+
+    def _incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+
+captcha_pool = CaptchaPool(getattr(settings, 'CAPTCHA_POOL', None))
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+
+from core.cache import get_version, bump_version
+from core.models import SysConfig
+
+CONFIG_CACHE_TIMEOUT = 24 * 60 * 60
+TRUE_VALUES = frozenset(['true', '1', 'yes', 'y', 'on'])
+
+# 进程内缓存 (版本号, 参数字典)
+_local_cache = (None, {})
+
+
+def load_configs():
+    """
+    从数据库读取全部参数
+    """
+    return dict(SysConfig.objects.values_list('config_key', 'config_value'))
+
+def get_configs():
+    """
+    获取全部参数 键 -> 值
+    依次读取进程内缓存、共享缓存，均未命中时从数据库加载；版本号变化后各进程重新加载
+    """
+    global _local_cache
+    version = get_version('configs')
+    local_version, values = _local_cache
+    if local_version == version:
+        return values
+
+    key = 'configs:%s' % version
+    values = cache.get(key)
+    if values is None:
+        values = load_configs()
+        cache.set(key, values, CONFIG_CACHE_TIMEOUT)
+    _local_cache = (version, values)
+    return values
+
+def preload_configs():
+    """
+    进程启动时预加载参数，首个请求不再查询数据库
+    数据库未迁移或不可用时跳过，首次访问时再加载
+    """
+    try:
+        get_configs()
+    except DatabaseError:
+        pass
+    finally:
+        # 启动线程不处理请求，释放其数据库连接
+        close_old_connections()
+
+def get_config(key, default=None):
+    """
+    获取参数值，参数不存在时返回default
+    """
+    return get_configs().get(key, default)
+
+def get_bool(key, default=False):
+    value = get_config(key)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+def get_int(key, default=0):
+    value = get_config(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def invalidate_configs():
+    bump_version('configs')
+
+def refresh_configs():
+    """
+    使参数缓存失效并立即重新加载
+    """
+    invalidate_configs()
+    return get_configs()
@@ -1,10 +1,10 @@
-import json
 from functools import wraps
 
 from django.http import JsonResponse
 
-from core.models import SysOperationLog
-from core.utils import is_admin, is_json
+from core.logwriter import log_writer
+from core.permission import has_perm
+from core.utils import is_admin
 
 operation_type_map = {
     'create': '1',
@@ -28,63 +28,39 @@ module_map = {
     'ConfigView': '参数设置',
     'NoticeView': '通知公告',
     'OperationLogView': '操作日志',
-    'LoginLogView': '登录日志'
+    'LoginLogView': '登录日志',
+    'OnlineView': '在线用户'
 }
 
 def log(f):
     @wraps(f)
     def decorator(self, *args, **kwargs):
-        title = module_map.get(self.__class__.__name__, '未知') + ' / ' + f.__doc__
-        method = '%s.%s.%s' %(__name__, self.__class__.__name__, f.__name__)
-        business_type = operation_type_map[f.__name__]
-        request_url = self.request.META['PATH_INFO']
-        request_method = self.request.method
-        request_param = {
-            'params': dict(self.request.query_params),
-            'data': self.request.data
+        record = {
+            'title': module_map.get(self.__class__.__name__, '未知') + ' / ' + f.__doc__,
+            'method': '%s.%s.%s' %(__name__, self.__class__.__name__, f.__name__),
+            'business_type': operation_type_map[f.__name__],
+            'request_url': self.request.META['PATH_INFO'],
+            'request_method': self.request.method,
+            'request_param': {
+                'params': dict(self.request.query_params),
+                'data': self.request.data
+            },
+            'ip': self.request.META['REMOTE_ADDR'],
+            'location': '未知',
+            'operator': self.request.user.username
         }
-        ip = self.request.META['REMOTE_ADDR']
-        location = '未知'
-        operator = self.request.user.username
-        error_msg = None
-        response = None
         try:
             response = f(self, *args, **kwargs)
-            json_result = response.content.decode('unicode_escape') if response else None
-            json_result = json_result if is_json(json_result) else '{}'
-            SysOperationLog.objects.create(
-                title=title,
-                method=method,
-                business_type=business_type,
-                request_url=request_url,
-                request_method=request_method,
-                request_param=json.dumps(request_param, ensure_ascii=False),
-                json_result=json_result,
-                ip=ip,
-                location=location,
-                operator=operator,
-                status='0',
-                error_msg=error_msg
-            )
         except Exception as e:
-            error_msg = str(e)
-            json_result = response.content.decode('unicode_escape') if response else None
-            json_result = json_result if is_json(json_result) else '{}'
-            SysOperationLog.objects.create(
-                title=title,
-                method=method,
-                business_type=business_type,
-                request_url=request_url,
-                request_method=request_method,
-                request_param=json.dumps(request_param, ensure_ascii=False),
-                json_result=json_result,
-                ip=ip,
-                location=location,
-                operator=operator,
-                status='1',
-                error_msg=error_msg
-            )
+            record['status'] = '1'
+            record['error_msg'] = str(e)
+            log_writer.write(record)
             raise e
+        # 响应体的解码和校验由日志写入线程完成
+        record['status'] = '0'
+        record['error_msg'] = None
+        record['content'] = response.content if response and not response.streaming else None
+        log_writer.write(record)
         return response
     return decorator
 
@@ -102,18 +78,15 @@ def has_permi(perms):
         def wrapper(self, *args, **kwargs):
             user = self.request.user
             if user.status == '0':
-                if not is_admin(user):
-                    # 角色正常且拥有权限
-                    if user.roles.filter(sysmenu__perms=perms, status='0'):
-                        return f(self, *args, **kwargs)
-                    else:
-                        res = {
-                            'code': 500,
-                            'msg': '没有操作权限'
-                        }
-                        return JsonResponse(res, json_dumps_params={'ensure_ascii': False})
-                else:
+                # 角色正常且拥有权限
+                if has_perm(user, perms):
                     return f(self, *args, **kwargs)
+                else:
+                    res = {
+                        'code': 500,
+                        'msg': '没有操作权限'
+                    }
+                    return JsonResponse(res, json_dumps_params={'ensure_ascii': False})
             else:
                 res = {
                     'code': 500,
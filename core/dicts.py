@@ -0,0 +1,70 @@
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.cache import get_version, bump_version
+from core.models import SysDictData, SysDictType
+from core.serializers import fast_dict_data_serializer
+
+DICT_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _key(version, dict_type):
+    return 'dict_data:%s:%s' % (version, dict_type)
+
+def _types_key(version):
+    # 已加载的字典类型集合
+    return 'dict_types:%s' % version
+
+def load_dicts(version=None):
+    """
+    预加载全部字典数据，每个字典类型的数据编码为JSON后写入缓存
+    """
+    version = version or get_version('dicts')
+    types = dict(SysDictType.objects.values_list('dict_id', 'dict_type'))
+    data = {dict_type: [] for dict_type in types.values()}
+    dict_data = SysDictData.objects.order_by('dict_sort', 'dict_code')
+    for row in fast_dict_data_serializer.serialize(fast_dict_data_serializer.values(dict_data)):
+        data[types[row['dict_type']]].append(row)
+
+    content = {
+        _key(version, dict_type): json.dumps(rows, cls=DjangoJSONEncoder)
+        for dict_type, rows in data.items()
+    }
+    cache.set_many(content, DICT_CACHE_TIMEOUT)
+    cache.set(_types_key(version), frozenset(data), DICT_CACHE_TIMEOUT)
+    return {dict_type: content[_key(version, dict_type)] for dict_type in data}
+
+def get_dicts(dict_types):
+    """
+    批量获取字典数据，返回 字典类型 -> 已编码的JSON，不存在的字典类型不返回
+    """
+    version = get_version('dicts')
+    keys = {_key(version, dict_type): dict_type for dict_type in dict_types}
+    values = cache.get_many(list(keys) + [_types_key(version)])
+    types = values.pop(_types_key(version), None)
+    result = {keys[key]: value for key, value in values.items()}
+
+    # 缓存未加载或部分被淘汰时全部重新加载
+    missing = [dict_type for dict_type in dict_types if dict_type not in result]
+    if missing and (types is None or any(dict_type in types for dict_type in missing)):
+        loaded = load_dicts(version)
+        result = {dict_type: loaded[dict_type] for dict_type in dict_types if dict_type in loaded}
+    return result
+
+def get_dict(dict_type):
+    """
+    获取字典数据的JSON，字典类型不存在时返回None
+    """
+    return get_dicts([dict_type]).get(dict_type)
+
+def invalidate_dicts():
+    bump_version('dicts')
+
+def refresh_dicts():
+    """
+    使字典缓存失效并立即全部重新加载
+    """
+    invalidate_dicts()
+    load_dicts()
@@ -0,0 +1,137 @@
+from django.conf import settings
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# 字段类型
+COLUMN, NESTED, MANY = 0, 1, 2
+
+
+class FastSerializer:
+    """
+    只读列表序列化
+    根据DRF序列化器预先编译字段转换函数，直接由 values() 查询结果生成字典，输出与原序列化器一致
+    支持模型字段、外键主键、外键嵌套序列化器和多对多嵌套序列化器（many=True）
+    """
+
+    def __init__(self, serializer_class, model=None, prefix=''):
+        self.serializer_class = serializer_class
+        self.model = model or serializer_class.Meta.model
+        self.prefix = prefix
+        self.entries = None
+
+    def _compile(self):
+        opts = self.model._meta
+        self.pk_key = self.prefix + opts.pk.attname
+        self.value_fields = [self.pk_key]
+        # (类型, 输出键, values键或反向查询名, 转换函数或嵌套序列化)
+        entries = []
+
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if not source or source == '*' or '.' in source:
+                raise TypeError('不支持的字段：%s.%s' % (self.serializer_class.__name__, name))
+
+            model_field = opts.get_field(source)
+            if isinstance(field, serializers.ListSerializer) and model_field.many_to_many and not self.prefix:
+                child = FastSerializer(type(field.child), model_field.related_model)
+                entries.append((MANY, name, model_field.related_query_name(), child))
+            elif isinstance(field, serializers.BaseSerializer) and model_field.many_to_one:
+                child = FastSerializer(type(field), model_field.related_model, '%s%s__' % (self.prefix, source))
+                child._compile()
+                if any(entry[0] == MANY for entry in child.entries):
+                    raise TypeError('不支持的字段：%s.%s' % (self.serializer_class.__name__, name))
+                entries.append((NESTED, name, self.prefix + model_field.attname, child))
+                self.value_fields.append(self.prefix + model_field.attname)
+                self.value_fields.extend(child.value_fields)
+            elif model_field.concrete and not model_field.many_to_many:
+                key = self.prefix + model_field.attname
+                entries.append((COLUMN, name, key, self._get_converter(field)))
+                self.value_fields.append(key)
+            else:
+                raise TypeError('不支持的字段：%s.%s' % (self.serializer_class.__name__, name))
+
+        self.value_fields = list(dict.fromkeys(self.value_fields))
+        self.entries = entries
+
+    @staticmethod
+    def _get_converter(field):
+        """
+        返回字段的转换函数，None表示原样输出
+        """
+        if isinstance(field, drf_fields.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            if output_format is None:
+                return None
+            if output_format.lower() != drf_fields.ISO_8601 and not settings.USE_TZ:
+                return lambda value: value.strftime(output_format)
+            return field.to_representation
+        if isinstance(field, drf_fields.ChoiceField):
+            choices = field.choice_strings_to_values
+            return lambda value: value if value == '' else choices.get(str(value), value)
+        if isinstance(field, (drf_fields.CharField, PrimaryKeyRelatedField)):
+            # 数据库返回值即为输出值
+            return None
+        if isinstance(field, drf_fields.IntegerField):
+            return int
+        if isinstance(field, drf_fields.BooleanField):
+            return bool
+        return field.to_representation
+
+    def values(self, queryset):
+        """
+        查询集转换为仅包含所需字段的 values() 查询集
+        """
+        if self.entries is None:
+            self._compile()
+        return queryset.values(*self.value_fields)
+
+    def serialize(self, rows):
+        """
+        values() 查询结果转换为与DRF序列化器一致的字典列表
+        """
+        if self.entries is None:
+            self._compile()
+        rows = list(rows)
+        related = {}
+        for kind, name, query_name, child in self.entries:
+            if kind == MANY:
+                related[name] = self._load_many(query_name, child, [row[self.pk_key] for row in rows])
+        return [self._build(row, related) for row in rows]
+
+    def _build(self, row, related):
+        item = {}
+        for kind, name, key, converter in self.entries:
+            if kind == COLUMN:
+                value = row[key]
+                item[name] = value if value is None or converter is None else converter(value)
+            elif kind == NESTED:
+                item[name] = None if row[key] is None else converter._build(row, None)
+            else:
+                item[name] = related[name].get(row[self.pk_key], [])
+        return item
+
+    def _load_many(self, query_name, child, pks):
+        """
+        一次查询加载全部多对多关联数据，返回 主键 -> 关联数据列表
+        """
+        if not pks:
+            return {}
+        if child.entries is None:
+            child._compile()
+        queryset = child.model._default_manager.filter(**{'%s__in' % query_name: pks})
+        rows = list(queryset.values(query_name, *child.value_fields))
+
+        # 同一关联对象只序列化一次
+        distinct = {}
+        for row in rows:
+            distinct.setdefault(row[child.pk_key], row)
+        items = dict(zip(distinct, child.serialize(distinct.values())))
+
+        result = {}
+        for row in rows:
+            result.setdefault(row[query_name], []).append(items[row[child.pk_key]])
+        return result
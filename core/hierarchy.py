@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import Q, Value, CharField
+from django.db.models.functions import Concat, Substr
+
+from core.models import SysDept
+
+
+def get_ancestors(parent_id):
+    """
+    根据父部门生成祖级列表，格式为 0,顶级部门ID,...,父部门ID
+    父部门不存在时返回None
+    """
+    parent_id = int(parent_id or 0)
+    if parent_id == 0:
+        return '0'
+    parent = SysDept.objects.filter(dept_id=parent_id).only('dept_id', 'ancestors').first()
+    return parent.path if parent else None
+
+def descendants_q(dept, include_self=False):
+    """
+    子孙部门的查询条件，按祖级列表前缀匹配
+    """
+    path = dept.path
+    q = Q(ancestors=path) | Q(ancestors__startswith=path + ',')
+    if include_self:
+        q |= Q(dept_id=dept.dept_id)
+    return q
+
+def get_descendants(dept, include_self=False):
+    """
+    子孙部门
+    """
+    return SysDept.objects.filter(descendants_q(dept, include_self))
+
+def get_descendant_ids(dept_id, include_self=True):
+    """
+    子孙部门ID
+    """
+    dept = SysDept.objects.filter(dept_id=dept_id).only('dept_id', 'ancestors').first()
+    if not dept:
+        return []
+    return list(get_descendants(dept, include_self).values_list('dept_id', flat=True))
+
+def move_dept(dept, parent_id):
+    """
+    移动部门，同时用一条语句改写全部子孙部门的祖级列表
+    """
+    parent_id = int(parent_id or 0)
+    if parent_id == dept.parent_id:
+        return
+
+    ancestors = get_ancestors(parent_id)
+    if ancestors is None:
+        raise ValueError('上级部门不存在')
+
+    old_path = dept.path
+    new_path = '%s,%s' % (ancestors, dept.dept_id)
+    if new_path.startswith(old_path + ','):
+        raise ValueError('上级部门不能是自己或下级部门')
+
+    with transaction.atomic():
+        SysDept.objects.filter(Q(ancestors=old_path) | Q(ancestors__startswith=old_path + ',')).update(
+            ancestors=Concat(Value(new_path), Substr('ancestors', len(old_path) + 1), output_field=CharField())
+        )
+        dept.parent_id = parent_id
+        dept.ancestors = ancestors
+        SysDept.objects.filter(dept_id=dept.dept_id).update(parent_id=parent_id, ancestors=ancestors)
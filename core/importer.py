@@ -0,0 +1,113 @@
+import codecs
+import csv
+from html import escape
+
+from openpyxl import load_workbook
+
+IMPORT_CHUNK_SIZE = 1000
+# 报告中保留的错误行数上限
+IMPORT_ERROR_LIMIT = 1000
+# 提示信息中展示的错误行数
+IMPORT_MSG_LIMIT = 20
+
+
+class ImportFileError(Exception):
+    pass
+
+
+class ImportReport:
+    """
+    导入结果，记录成功数和逐行错误
+    """
+
+    def __init__(self):
+        self.success = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_success(self, count=1):
+        self.success += count
+
+    def add_error(self, row_num, msg):
+        self.failed += 1
+        if len(self.errors) < IMPORT_ERROR_LIMIT:
+            self.errors.append({'row': row_num, 'msg': msg})
+
+    def get_msg(self):
+        """
+        前端以HTML展示的导入结果
+        """
+        if not self.failed:
+            return '数据已全部导入成功！共 %d 条' % self.success
+
+        lines = ['导入完成，成功 %d 条，失败 %d 条，错误如下：' % (self.success, self.failed)]
+        for error in self.errors[:IMPORT_MSG_LIMIT]:
+            lines.append('第%d行：%s' % (error['row'], escape(error['msg'])))
+        if self.failed > IMPORT_MSG_LIMIT:
+            lines.append('……')
+        return '<br/>'.join(lines)
+
+    def as_dict(self):
+        return {
+            'success': self.success,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+
+
+def cell_value(value):
+    """
+    单元格值转为去除首尾空白的字符串，空值返回None
+    """
+    if value is None:
+        return None
+    # Excel中的数字可能被读取为浮点数
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def iter_import_rows(file, width):
+    """
+    流式读取上传的xlsx或csv文件，跳过表头和空行，返回 (行号, 数据行)
+    数据行统一补齐为width列
+    """
+    name = getattr(file, 'name', '') or ''
+    workbook = None
+    try:
+        if name.lower().endswith('.csv'):
+            rows = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+        else:
+            # 只读模式按行解析，不在内存中构建整个工作簿
+            workbook = load_workbook(file, read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+    except Exception:
+        if workbook is not None:
+            workbook.close()
+        raise ImportFileError('文件格式错误')
+
+    row_num = 0
+    try:
+        for row_num, row in enumerate(rows, 1):
+            if row_num == 1:
+                continue
+            row = [cell_value(value) for value in row[:width]]
+            if not any(row):
+                continue
+            yield row_num, row + [None] * (width - len(row))
+    except (UnicodeDecodeError, csv.Error):
+        raise ImportFileError('文件第%d行读取失败' % (row_num + 1))
+    finally:
+        # 只读模式下工作簿持有文件句柄，读取结束或中断时关闭
+        if workbook is not None:
+            workbook.close()
+
+def iter_chunks(rows, size=IMPORT_CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
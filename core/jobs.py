@@ -0,0 +1,190 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from core.export import get_file_type, write_xlsx, iter_csv
+from core.models import SysExportJob, SysUser
+
+DEFAULTS = {
+    'ROOT': None,
+    'MAX_WORKERS': 2,
+    'PER_USER_LIMIT': 2,
+    'TTL': 24 * 60 * 60,
+    'POLL_INTERVAL': 5,
+    'HEARTBEAT_TIMEOUT': 60,
+}
+
+# 导出类型 -> 导出函数，函数接收 (params, user) 返回 (文件名, 表头, 数据行)
+EXPORTERS = {
+    'user': 'core.views.user.export_users',
+    'operlog': 'core.views.operlog.export_operation_logs',
+}
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobError(Exception):
+    pass
+
+
+class ExportJobRunner:
+    """
+    后台导出任务执行器
+    任务保存在数据库中，调度线程认领等待中的任务交给线程池执行，多个进程可共享同一个任务队列
+    执行中任务数按数据库统计，MAX_WORKERS 为全部进程合计的上限；调度线程定期更新执行中任务的心跳，心跳超时的任务视为中断
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self.executor = ThreadPoolExecutor(self.options['MAX_WORKERS'], thread_name_prefix='export-job')
+        # 当前进程执行中的任务ID
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, export_type, params, user, file_type=None):
+        """
+        提交导出任务，返回任务
+        """
+        if export_type not in EXPORTERS:
+            raise ExportJobError('不支持的导出类型')
+
+        active = SysExportJob.objects.filter(user_id=user.pk, status__in=['0', '1']).count()
+        if active >= self.options['PER_USER_LIMIT']:
+            raise ExportJobError('导出任务过多，请稍后再试')
+
+        job = SysExportJob.objects.create(
+            job_id=uuid.uuid4().hex,
+            user_id=user.pk,
+            export_type=export_type,
+            params=json.dumps(params, ensure_ascii=False, default=str),
+            file_type=get_file_type('', file_type),
+            create_by=user.username
+        )
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self.run_forever, name='export-job-dispatcher', daemon=True)
+                    self._thread.start()
+
+    def run_forever(self):
+        """
+        调度循环：更新心跳、认领任务并定期清理过期文件
+        """
+        while True:
+            try:
+                self.heartbeat()
+                self.dispatch()
+                self.cleanup()
+            except Exception:
+                logger.exception('导出任务调度失败')
+            finally:
+                close_old_connections()
+            self._wakeup.wait(self.options['POLL_INTERVAL'])
+            self._wakeup.clear()
+
+    def heartbeat(self):
+        """
+        更新当前进程执行中任务的心跳时间
+        """
+        with self._lock:
+            job_ids = list(self._running)
+        if job_ids:
+            SysExportJob.objects.filter(job_id__in=job_ids, status='1').update(update_time=datetime.datetime.now())
+
+    def dispatch(self):
+        running = SysExportJob.objects.filter(status='1').count()
+        with self._lock:
+            free = min(self.options['MAX_WORKERS'] - running, self.options['MAX_WORKERS'] - len(self._running))
+        if free <= 0:
+            return
+
+        job_ids = SysExportJob.objects.filter(status='0').order_by('create_time').values_list('job_id', flat=True)[:free]
+        for job_id in job_ids:
+            # 以状态条件更新认领任务，避免被其他进程重复执行
+            if not SysExportJob.objects.filter(job_id=job_id, status='0').update(status='1', update_time=datetime.datetime.now()):
+                continue
+            # 多个进程同时认领时可能超过上限，超过时放回
+            if SysExportJob.objects.filter(status='1').count() > self.options['MAX_WORKERS']:
+                SysExportJob.objects.filter(job_id=job_id, status='1').update(status='0')
+                break
+            with self._lock:
+                self._running.add(job_id)
+            self.executor.submit(self.run_job, job_id)
+
+    def run_job(self, job_id):
+        try:
+            self.export(SysExportJob.objects.get(job_id=job_id))
+        except Exception:
+            logger.exception('导出任务执行失败: %s', job_id)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+            self._wakeup.set()
+            close_old_connections()
+
+    def export(self, job):
+        """
+        执行导出并保存任务结果
+        """
+        try:
+            exporter = import_string(EXPORTERS[job.export_type])
+            user = SysUser.objects.get(pk=job.user_id)
+            filename, header, rows = exporter(json.loads(job.params), user)
+            name = '%s.%s' % (os.path.splitext(filename)[0], job.file_type)
+            path = os.path.join(self.options['ROOT'], '%s.%s' % (job.job_id, job.file_type))
+            os.makedirs(self.options['ROOT'], exist_ok=True)
+            if job.file_type == 'csv':
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.writelines(iter_csv(header, rows))
+            else:
+                with open(path, 'wb') as f:
+                    write_xlsx(header, rows, f)
+            job.status = '2'
+            job.file_name = name
+            job.file_path = path
+        except Exception as e:
+            logger.exception('导出任务执行失败: %s', job.job_id)
+            job.status = '3'
+            job.error_msg = str(e)
+        job.finish_time = datetime.datetime.now()
+        job.save()
+
+    def reset_stale(self):
+        """
+        心跳超时的执行中任务视为进程退出时中断，标记为失败，不再占用用户的任务数
+        """
+        now = datetime.datetime.now()
+        timeout = now - datetime.timedelta(seconds=self.options['HEARTBEAT_TIMEOUT'])
+        return SysExportJob.objects.filter(status='1', update_time__lt=timeout).update(
+            status='3', error_msg='任务执行中断，请重新导出', finish_time=now
+        )
+
+    def cleanup(self):
+        """
+        删除超过有效期的导出文件和任务
+        """
+        self.reset_stale()
+        expire_time = datetime.datetime.now() - datetime.timedelta(seconds=self.options['TTL'])
+        jobs = SysExportJob.objects.filter(status__in=['2', '3'], finish_time__lt=expire_time)
+        for path in jobs.exclude(file_path=None).values_list('file_path', flat=True):
+            if os.path.exists(path):
+                os.remove(path)
+        jobs.delete()
+
+
+export_job_runner = ExportJobRunner(getattr(settings, 'EXPORT_JOB', None))
@@ -0,0 +1,246 @@
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+
+from core.models import SysOperationLog
+from core.utils import is_json
+
+DEFAULTS = {
+    'ASYNC': True,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2,
+    'OVERFLOW_POLICY': 'block',
+    'BLOCK_TIMEOUT': 1,
+    'SPILL_PATH': None,
+    'MAX_RETRY_INTERVAL': 60,
+}
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'spill')
+
+
+class OperationLogWriter:
+    """
+    操作日志异步批量写入器
+    请求线程只负责把日志放入有界队列，后台线程按数量或时间阈值批量写库
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        if self.options['OVERFLOW_POLICY'] not in OVERFLOW_POLICIES:
+            raise ValueError('不支持的溢出策略: %s' % self.options['OVERFLOW_POLICY'])
+        self.queue = queue.Queue(self.options['QUEUE_SIZE'])
+        self.counters = {'written': 0, 'dropped': 0, 'spilled': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        # 写库失败后的退避间隔和下次重试时间
+        self._retry_delay = 0
+        self._retry_at = 0
+
+    def write(self, record):
+        """
+        写入一条日志，创建时间取写入时的时间而不是写库时的时间
+        """
+        record.setdefault('create_time', datetime.datetime.now())
+        if not self.options['ASYNC']:
+            self._save([self._format(record)])
+            return
+
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._overflow(record)
+
+    def stats(self):
+        """
+        队列深度及写入、丢弃计数
+        """
+        with self._lock:
+            stats = dict(self.counters)
+        stats['depth'] = self.queue.qsize()
+        return stats
+
+    def flush(self):
+        """
+        同步写出队列中和溢出文件中的全部日志
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self._format(self.queue.get_nowait()))
+            except queue.Empty:
+                break
+            if len(batch) >= self.options['BATCH_SIZE']:
+                self._save(batch)
+                batch = []
+        if batch:
+            self._save(batch)
+        self._replay_spill()
+
+    def stop(self, timeout=10):
+        """
+        停止后台线程并写出剩余日志
+        """
+        self._stopped.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopped.clear()
+                    self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.options['FLUSH_INTERVAL']
+        while not self._stopped.is_set():
+            try:
+                batch.append(self._format(self.queue.get(timeout=max(deadline - time.monotonic(), 0))))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.options['BATCH_SIZE'] or time.monotonic() >= deadline:
+                if batch:
+                    self._save(batch)
+                    batch = []
+                self._replay_spill()
+                deadline = time.monotonic() + self.options['FLUSH_INTERVAL']
+        if batch:
+            self._save(batch)
+
+    def _overflow(self, record):
+        policy = self.options['OVERFLOW_POLICY']
+        if policy == 'block':
+            try:
+                self.queue.put(record, timeout=self.options['BLOCK_TIMEOUT'])
+                return
+            except queue.Full:
+                self._incr('dropped')
+        elif policy == 'drop_oldest':
+            try:
+                self.queue.get_nowait()
+                self._incr('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._incr('dropped')
+        else:
+            self._spill([self._format(record)])
+
+    def _spill(self, records, count=True):
+        path = self.options['SPILL_PATH']
+        if not path:
+            self._incr('dropped', len(records))
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            if count:
+                self.counters['spilled'] += len(records)
+
+    def _replay_spill(self):
+        path = self.options['SPILL_PATH']
+        if not path or self._backing_off():
+            return
+        replaying = '%s.%s' % (path, os.getpid())
+        try:
+            with self._lock:
+                os.replace(path, replaying)
+        except FileNotFoundError:
+            # 没有溢出文件，或已被其他进程取走
+            return
+        with open(replaying, encoding='utf-8') as f:
+            for batch in self._read_batches(f):
+                try:
+                    self._bulk_create(batch)
+                except Exception:
+                    # 写库失败时连同剩余日志放回溢出文件，已计数的日志不重复计数
+                    self._spill(batch + [json.loads(line) for line in f], count=False)
+                    break
+        os.remove(replaying)
+
+    def _read_batches(self, f):
+        batch = []
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) >= self.options['BATCH_SIZE']:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _format(self, record):
+        record = dict(record)
+        content = record.pop('content', None)
+        json_result = content.decode('unicode_escape') if content else None
+        record['json_result'] = json_result if is_json(json_result) else '{}'
+        record['request_param'] = json.dumps(record['request_param'], ensure_ascii=False, default=str)
+        return record
+
+    def _save(self, records):
+        if self._backing_off():
+            # 退避期间不写库，直接转存溢出文件
+            self._spill(records)
+            return
+        try:
+            self._bulk_create(records)
+        except Exception:
+            # 写库失败时转存溢出文件，等待下次重放
+            self._incr('failed', len(records))
+            self._spill(records)
+
+    def _bulk_create(self, records):
+        try:
+            SysOperationLog.objects.bulk_create([SysOperationLog(**record) for record in records])
+        except Exception:
+            close_old_connections()
+            self._backoff()
+            raise
+        with self._lock:
+            self._retry_delay = 0
+            self.counters['written'] += len(records)
+
+    def _backoff(self):
+        # 连续失败时重试间隔加倍，直到 MAX_RETRY_INTERVAL
+        with self._lock:
+            self._retry_delay = min(max(self._retry_delay * 2, self.options['FLUSH_INTERVAL']), self.options['MAX_RETRY_INTERVAL'])
+            self._retry_at = time.monotonic() + self._retry_delay
+
+    def _backing_off(self):
+        return time.monotonic() < self._retry_at
+
+    def _incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+
+log_writer = OperationLogWriter(getattr(settings, 'OPERATION_LOG', None))
+atexit.register(log_writer.stop)
+
+
+@receiver(setting_changed)
+def reload_options(*, setting, value, **kwargs):
+    """
+    设置变化时（如测试中覆盖设置）重新加载写入器配置
+    """
+    if setting == 'OPERATION_LOG':
+        log_writer.options = dict(DEFAULTS, **(value or {}))
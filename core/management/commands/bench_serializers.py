@@ -0,0 +1,52 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from core.seed import seed_data
+from core.serializers import SysOperationLogSerializer, SysLoginLogSerializer, SysUserProfileSerializer, \
+    SysDictDataSerializer, SysConfigSerializer, fast_operation_log_serializer, fast_login_log_serializer, \
+    fast_user_profile_serializer, fast_dict_data_serializer, fast_config_serializer
+
+
+class Command(BaseCommand):
+    help = '对比DRF序列化器与快速序列化的列表序列化耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='每张表的数据量')
+        parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        # 测试数据在事务中生成，结束后回滚
+        with transaction.atomic():
+            seed_data(rows)
+            # (序列化器, 快速序列化, DRF序列化器查询的预加载方式)
+            cases = [
+                (SysOperationLogSerializer, fast_operation_log_serializer, None),
+                (SysLoginLogSerializer, fast_login_log_serializer, None),
+                (SysUserProfileSerializer, fast_user_profile_serializer,
+                 lambda queryset: queryset.select_related('dept').prefetch_related('roles__depts', 'posts')),
+                (SysDictDataSerializer, fast_dict_data_serializer, None),
+                (SysConfigSerializer, fast_config_serializer, None),
+            ]
+            print('%-16s %8s %10s %10s %8s' % ('模型', '行数', 'DRF(ms)', '快速(ms)', '倍数'))
+            for serializer_class, fast_serializer, eager_loading in cases:
+                model = serializer_class.Meta.model
+                queryset = model.objects.order_by('pk')[:rows]
+                slow_queryset = eager_loading(model.objects.order_by('pk'))[:rows] if eager_loading else queryset
+                slow = self.timeit(lambda: serializer_class(slow_queryset.all(), many=True).data, repeat)
+                fast = self.timeit(lambda: fast_serializer.serialize(fast_serializer.values(queryset.all())), repeat)
+                print('%-16s %8d %10.1f %10.1f %8.1f' % (model.__name__, queryset.count(), slow * 1000, fast * 1000, slow / fast))
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def timeit(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
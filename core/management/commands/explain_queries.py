@@ -0,0 +1,102 @@
+import datetime
+import re
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from core.models import SysOperationLog, SysLoginLog, SysUser, SysDictData, SysDictType, SysConfig, SysDept, SysMenu, \
+    SysPost, SysRole, SysNotice
+from core.search import search_filter
+from core.seed import seed_data
+
+# 全表扫描的执行计划特征
+FULL_SCAN_PATTERNS = {
+    'sqlite': [re.compile(r'\bSCAN (?!.*\b(USING (COVERING )?INDEX|VIRTUAL TABLE)\b)')],
+    'postgresql': [re.compile(r'\bSeq Scan\b')],
+    'mysql': [re.compile(r'\btype: ALL\b')],
+}
+# 排序未使用索引的执行计划特征
+SORT_PATTERNS = {
+    'sqlite': [re.compile(r'\bUSE TEMP B-TREE FOR ORDER BY\b')],
+    'postgresql': [re.compile(r'\bSort Key\b')],
+    'mysql': [re.compile(r'\bUsing filesort\b')],
+}
+
+
+def get_list_queries():
+    """
+    列表页使用的典型查询，返回 (名称, 查询集)
+    """
+    start_time = datetime.datetime.now() - datetime.timedelta(days=7)
+    dept_id = SysDept.objects.values_list('dept_id', flat=True).first()
+    dict_id = SysDictType.objects.values_list('dict_id', flat=True).first()
+    return [
+        ('操作日志列表', SysOperationLog.objects.order_by('-create_time')[:10]),
+        ('操作日志按状态', SysOperationLog.objects.filter(status='1').order_by('-create_time')[:10]),
+        ('操作日志按类型', SysOperationLog.objects.filter(business_type='1').order_by('-create_time')[:10]),
+        ('操作日志按标题', search_filter(SysOperationLog.objects.order_by('-create_time'), title='seed')[:10]),
+        ('操作日志按操作人', search_filter(SysOperationLog.objects.order_by('-create_time'), operator='seed_1')[:10]),
+        ('操作日志按时间', SysOperationLog.objects.filter(create_time__gte=start_time).order_by('-create_time')[:10]),
+        ('登录日志列表', SysLoginLog.objects.order_by('-create_time')[:10]),
+        ('登录日志按状态', SysLoginLog.objects.filter(status='1').order_by('-create_time')[:10]),
+        ('登录日志按登录时间', SysLoginLog.objects.filter(login_time__lt=start_time)[:10]),
+        ('用户列表', SysUser.objects.order_by('create_time')[:10]),
+        ('用户按状态', SysUser.objects.filter(status='0').order_by('create_time')[:10]),
+        ('用户按名称', search_filter(SysUser.objects.order_by('create_time'), username='seed_1')[:10]),
+        ('用户按手机号', search_filter(SysUser.objects.order_by('create_time'), phone_number='1380')[:10]),
+        ('用户按部门', SysUser.objects.filter(dept_id=dept_id).order_by('create_time')[:10]),
+        ('参数按键名', SysConfig.objects.filter(config_key='sys.user.initPassword')[:1]),
+        ('参数按键名模糊查询', search_filter(SysConfig.objects.order_by('create_time'), config_key='seed')[:10]),
+        ('参数列表', SysConfig.objects.order_by('create_time')[:10]),
+        ('字典类型按类型', SysDictType.objects.filter(dict_type='sys_user_sex')[:1]),
+        ('字典类型列表', SysDictType.objects.order_by('create_time')[:10]),
+        ('字典数据按类型', SysDictData.objects.filter(dict_type_id=dict_id).order_by('create_time')[:10]),
+        ('部门按上级', SysDept.objects.filter(parent_id=100).order_by('order_num')),
+        ('菜单按上级', SysMenu.objects.filter(parent_id=0).order_by('order_num')),
+        ('岗位列表', SysPost.objects.order_by('create_time')[:10]),
+        ('角色列表', SysRole.objects.order_by('create_time')[:10]),
+        ('通知公告列表', SysNotice.objects.order_by('create_time')[:10]),
+    ]
+
+def _match(patterns, plan, vendor=None):
+    return any(pattern.search(plan) for pattern in patterns.get(vendor or connection.vendor, []))
+
+def is_full_scan(plan, vendor=None):
+    return _match(FULL_SCAN_PATTERNS, plan, vendor)
+
+def is_sorted(plan, vendor=None):
+    return _match(SORT_PATTERNS, plan, vendor)
+
+
+class Command(BaseCommand):
+    help = '输出列表页查询的执行计划，标记全表扫描和额外排序'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0, help='生成测试数据的数量，数据在结束后回滚')
+        parser.add_argument('--verbose', action='store_true', help='输出完整执行计划')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                seed_data(options['rows'])
+                # 更新统计信息，使执行计划与大数据量时一致
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            full_scans = 0
+            for name, queryset in get_list_queries():
+                plan = queryset.explain()
+                full_scan = is_full_scan(plan)
+                full_scans += full_scan
+                # 按条件过滤后对匹配结果排序不需要扫描全表，仅作提示
+                if full_scan:
+                    tag = '[全表扫描]'
+                elif is_sorted(plan):
+                    tag = '[排序]    '
+                else:
+                    tag = '[索引]    '
+                print('%s %s' % (tag, name))
+                if options['verbose'] or full_scan:
+                    for line in plan.splitlines():
+                        print('    ' + line)
+            print('共 %d 个查询存在全表扫描' % full_scans)
+            transaction.set_rollback(True)
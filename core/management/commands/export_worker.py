@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from core.jobs import export_job_runner
+
+
+class Command(BaseCommand):
+    help = '执行后台导出任务'
+
+    def handle(self, *args, **options):
+        print('================导出任务执行中================')
+        try:
+            export_job_runner.run_forever()
+        except KeyboardInterrupt:
+            pass
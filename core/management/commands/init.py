@@ -1413,7 +1413,7 @@ class Command(BaseCommand):
             'dept_id': 1,
             'parent_id': 0,
             'dept_name': '若依科技',
-            'ancestors': None,
+            'ancestors': '0',
             'order_num': 1,
             'leader': '超级管理员',
             'phone': '13697169182',
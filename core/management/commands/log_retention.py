@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand
+
+from core.retention import log_retention, RETENTION_MODELS
+
+
+class Command(BaseCommand):
+    help = '按保留策略删除或归档过期的操作日志和登录日志'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='按配置的间隔持续执行')
+        parser.add_argument('--name', choices=list(RETENTION_MODELS), help='日志类型，默认按配置清理全部')
+        parser.add_argument('--days', type=int, help='保留天数，与--name一起使用')
+        parser.add_argument('--archive', action='store_true', help='删除前归档，与--name一起使用')
+        parser.add_argument('--batch-size', type=int, help='每批删除的主键区间大小')
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            print('================日志清理执行中================')
+            try:
+                log_retention.run_forever()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        if options['name']:
+            days, archive = log_retention.get_policy(options['name'])
+            if options['days'] is not None:
+                days = options['days']
+            if days is None:
+                print('未配置保留天数')
+                return
+            result = {options['name']: log_retention.purge(
+                options['name'], days, options['archive'] or archive, options['batch_size']
+            )}
+        else:
+            result = log_retention.run_once(options['batch_size'])
+        for name, deleted in result.items():
+            print('%s: 删除 %d 条' % (name, deleted))
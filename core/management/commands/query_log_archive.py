@@ -0,0 +1,27 @@
+import datetime
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from core.retention import log_retention, RETENTION_MODELS, ARCHIVE_DATE_FORMAT
+
+
+class Command(BaseCommand):
+    help = '查询已归档的日志，按JSON行输出'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(RETENTION_MODELS), help='日志类型')
+        parser.add_argument('begin_date', help='开始日期，如 2024-01-01')
+        parser.add_argument('end_date', nargs='?', help='结束日期，默认与开始日期相同')
+        parser.add_argument('--filter', action='append', default=[], metavar='字段=值', help='字段包含指定值，可重复')
+
+    def handle(self, *args, **options):
+        try:
+            begin_date = datetime.datetime.strptime(options['begin_date'], ARCHIVE_DATE_FORMAT).date()
+            end_date = datetime.datetime.strptime(options['end_date'] or options['begin_date'], ARCHIVE_DATE_FORMAT).date()
+            filters = dict(item.split('=', 1) for item in options['filter'])
+        except ValueError:
+            raise CommandError('参数格式错误')
+
+        for row in log_retention.query_archive(options['name'], begin_date, end_date, **filters):
+            self.stdout.write(json.dumps(row, ensure_ascii=False))
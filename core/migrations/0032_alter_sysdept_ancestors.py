@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    """
+    根据parent_id重建全部部门的祖级列表，格式为 0,顶级部门ID,...,父部门ID
+    """
+    SysDept = apps.get_model('core', 'SysDept')
+    parents = dict(SysDept.objects.values_list('dept_id', 'parent_id'))
+    objs = []
+    for dept_id, parent_id in parents.items():
+        ancestors = []
+        visited = {dept_id}
+        current = parent_id
+        # 父部门不存在或出现环时停止
+        while current in parents and current not in visited:
+            ancestors.append(str(current))
+            visited.add(current)
+            current = parents[current]
+        ancestors.append('0')
+        ancestors.reverse()
+        objs.append(SysDept(dept_id=dept_id, ancestors=','.join(ancestors)))
+    SysDept.objects.bulk_update(objs, ['ancestors'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_rename_is_cache_sysmenu_no_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sysdept',
+            name='ancestors',
+            field=models.CharField(db_index=True, default='0', max_length=512, null=True, verbose_name='祖级列表'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_alter_sysdept_ancestors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sysrole',
+            name='data_scope',
+            field=models.CharField(choices=[('1', '全部数据权限'), ('2', '自定义数据权限'), ('3', '本部门数据权限'), ('4', '本部门及以下数据权限'), ('5', '仅本人数据权限')], default=1, max_length=1, verbose_name='数据范围'),
+        ),
+    ]
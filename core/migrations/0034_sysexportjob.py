@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_alter_sysrole_data_scope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SysExportJob',
+            fields=[
+                ('create_by', models.CharField(blank=True, max_length=256, null=True, verbose_name='创建者')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建日期')),
+                ('update_by', models.CharField(blank=True, max_length=256, null=True, verbose_name='更新者')),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('remark', models.CharField(blank=True, max_length=256, null=True, verbose_name='备注')),
+                ('is_delete', models.BooleanField(default=False, verbose_name='逻辑删除')),
+                ('job_id', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='任务ID')),
+                ('user_id', models.BigIntegerField(verbose_name='用户ID')),
+                ('export_type', models.CharField(max_length=64, verbose_name='导出类型')),
+                ('params', models.TextField(default='{}', verbose_name='导出参数')),
+                ('file_type', models.CharField(default='xlsx', max_length=8, verbose_name='文件类型')),
+                ('file_name', models.CharField(default=None, max_length=256, null=True, verbose_name='文件名')),
+                ('file_path', models.CharField(default=None, max_length=512, null=True, verbose_name='文件路径')),
+                ('status', models.CharField(choices=[('0', '等待'), ('1', '执行中'), ('2', '完成'), ('3', '失败')], db_index=True, default='0', max_length=1, verbose_name='任务状态')),
+                ('error_msg', models.TextField(default=None, null=True, verbose_name='错误消息')),
+                ('finish_time', models.DateTimeField(default=None, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '导出任务表',
+                'db_table': 'sys_export_job',
+            },
+        ),
+    ]
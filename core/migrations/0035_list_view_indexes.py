@@ -0,0 +1,91 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_sysexportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sysconfig',
+            name='config_key',
+            field=models.CharField(db_index=True, max_length=128, verbose_name='参数的键'),
+        ),
+        migrations.AlterField(
+            model_name='sysdicttype',
+            name='dict_type',
+            field=models.CharField(db_index=True, default=None, max_length=64, verbose_name='字典类型'),
+        ),
+        migrations.AddIndex(
+            model_name='sysconfig',
+            index=models.Index(fields=['create_time', 'config_id'], name='sys_config_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysdept',
+            index=models.Index(fields=['parent_id', 'order_num'], name='sys_dept_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysdictdata',
+            index=models.Index(fields=['dict_type', 'create_time'], name='sys_dict_data_type_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysdicttype',
+            index=models.Index(fields=['create_time', 'dict_id'], name='sys_dict_type_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysloginlog',
+            index=models.Index(fields=['create_time', 'info_id'], name='sys_login_log_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysloginlog',
+            index=models.Index(fields=['status', 'create_time'], name='sys_login_log_status_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysloginlog',
+            index=models.Index(fields=['login_time'], name='sys_login_log_ltime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysmenu',
+            index=models.Index(fields=['parent_id', 'order_num'], name='sys_menu_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysnotice',
+            index=models.Index(fields=['create_time', 'notice_id'], name='sys_notice_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysoperationlog',
+            index=models.Index(fields=['create_time', 'id'], name='sys_oper_log_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysoperationlog',
+            index=models.Index(fields=['business_type', 'create_time'], name='sys_oper_log_type_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysoperationlog',
+            index=models.Index(fields=['status', 'create_time'], name='sys_oper_log_status_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='syspost',
+            index=models.Index(fields=['create_time', 'post_id'], name='sys_post_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysrole',
+            index=models.Index(fields=['create_time', 'role_id'], name='sys_role_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysuser',
+            index=models.Index(fields=['create_time', 'user_id'], name='sys_user_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysuser',
+            index=models.Index(fields=['status', 'create_time'], name='sys_user_status_ctime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sysuser',
+            index=models.Index(fields=['dept', 'create_time'], name='sys_user_dept_ctime_idx'),
+        ),
+    ]
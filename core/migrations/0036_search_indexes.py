@@ -0,0 +1,104 @@
+from django.db import migrations
+
+# 模型 -> 子串查询字段
+SEARCH_FIELDS = {
+    'SysUser': ['username', 'phone_number'],
+    'SysOperationLog': ['title', 'operator'],
+    'SysConfig': ['config_name', 'config_key'],
+}
+
+
+def supports_trigram(connection):
+    """
+    数据库是否支持trigram索引：PostgreSQL使用pg_trgm，SQLite使用FTS5的trigram分词（3.34+）
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        if connection.Database.sqlite_version_info < (3, 34, 0):
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+    return False
+
+
+def get_search_tables(apps):
+    """
+    返回 (表名, 主键列, 子串查询列)
+    """
+    for model_name, fields in SEARCH_FIELDS.items():
+        opts = apps.get_model('core', model_name)._meta
+        yield opts.db_table, opts.pk.column, [opts.get_field(field).column for field in fields]
+
+
+def sqlite_sql(table, pk, columns):
+    """
+    FTS5外部内容表及同步触发器
+    使用触发器而非信号同步，bulk_create、update()、delete() 等批量操作同样生效
+    """
+    search_table = '%s_search' % table
+    column_list = ', '.join(columns)
+    new_values = ', '.join('new.%s' % column for column in columns)
+    old_values = ', '.join('old.%s' % column for column in columns)
+    delete = "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.%s, %s);" % (
+        search_table, search_table, column_list, pk, old_values
+    )
+    insert = 'INSERT INTO %s(rowid, %s) VALUES (new.%s, %s);' % (search_table, column_list, pk, new_values)
+    return [
+        "CREATE VIRTUAL TABLE %s USING fts5(%s, content='%s', content_rowid='%s', tokenize='trigram')" % (
+            search_table, column_list, table, pk
+        ),
+        'CREATE TRIGGER %s_ai AFTER INSERT ON %s BEGIN %s END' % (search_table, table, insert),
+        'CREATE TRIGGER %s_ad AFTER DELETE ON %s BEGIN %s END' % (search_table, table, delete),
+        'CREATE TRIGGER %s_au AFTER UPDATE OF %s ON %s BEGIN %s %s END' % (
+            search_table, column_list, table, delete, insert
+        ),
+        "INSERT INTO %s(%s) VALUES ('rebuild')" % (search_table, search_table),
+    ]
+
+
+def postgresql_sql(table, pk, columns):
+    sql = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    for column in columns:
+        sql.append('CREATE INDEX IF NOT EXISTS %s_%s_trgm ON %s USING gin (%s gin_trgm_ops)' % (
+            table, column, table, column
+        ))
+    return sql
+
+
+def forwards(apps, schema_editor):
+    """
+    创建子串查询索引，不支持的数据库保持 LIKE 查询
+    """
+    connection = schema_editor.connection
+    if not supports_trigram(connection):
+        return
+    get_sql = postgresql_sql if connection.vendor == 'postgresql' else sqlite_sql
+    for table, pk, columns in get_search_tables(apps):
+        for sql in get_sql(table, pk, columns):
+            schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    connection = schema_editor.connection
+    for table, pk, columns in get_search_tables(apps):
+        if connection.vendor == 'postgresql':
+            for column in columns:
+                schema_editor.execute('DROP INDEX IF EXISTS %s_%s_trgm' % (table, column))
+        elif connection.vendor == 'sqlite':
+            search_table = '%s_search' % table
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute('DROP TRIGGER IF EXISTS %s_%s' % (search_table, suffix))
+            schema_editor.execute('DROP TABLE IF EXISTS %s' % search_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
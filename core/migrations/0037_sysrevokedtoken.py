@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SysRevokedToken',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='令牌ID')),
+                ('user_id', models.BigIntegerField(verbose_name='用户ID')),
+                ('expire_time', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='吊销时间')),
+            ],
+            options={
+                'verbose_name': '已吊销令牌表',
+                'db_table': 'sys_revoked_token',
+            },
+        ),
+    ]
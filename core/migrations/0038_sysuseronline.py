@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_sysrevokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SysUserOnline',
+            fields=[
+                ('token_id', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='会话编号')),
+                ('user_id', models.BigIntegerField(db_index=True, verbose_name='用户ID')),
+                ('username', models.CharField(max_length=256, verbose_name='用户名称')),
+                ('dept_name', models.CharField(default=None, max_length=128, null=True, verbose_name='部门名称')),
+                ('ip_addr', models.GenericIPAddressField(verbose_name='登录地址')),
+                ('login_location', models.CharField(max_length=512, verbose_name='登录地点')),
+                ('browser', models.CharField(max_length=512, verbose_name='浏览器')),
+                ('os', models.CharField(max_length=512, verbose_name='操作系统')),
+                ('login_time', models.DateTimeField(verbose_name='登录时间')),
+                ('last_access_time', models.DateTimeField(verbose_name='最后访问时间')),
+                ('expire_time', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+            ],
+            options={
+                'verbose_name': '在线用户表',
+                'db_table': 'sys_user_online',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:26
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_sysuseronline'),
+    ]
+
+    operations = [
+        # 默认值只在Python中生效，无需修改表结构；SQLite修改字段会重建表并丢失全文索引触发器
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='sysoperationlog',
+                    name='create_time',
+                    field=models.DateTimeField(default=datetime.datetime.now, verbose_name='创建日期'),
+                ),
+            ],
+        ),
+    ]
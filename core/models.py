@@ -1,3 +1,5 @@
+import datetime
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -24,7 +26,7 @@ class SysDept(BaseModel):
     """
     dept_id = models.BigAutoField(primary_key=True, verbose_name='部门ID')
     parent_id = models.IntegerField(default=0, verbose_name='父部门ID')
-    ancestors = models.CharField(max_length=128, null=True, default=None, verbose_name="祖级列表")
+    ancestors = models.CharField(max_length=512, null=True, default='0', db_index=True, verbose_name="祖级列表")
     dept_name = models.CharField(max_length=128, default=None, verbose_name="部门名称")
     order_num = models.IntegerField(default=0, verbose_name='显示顺序')
     leader = models.CharField(max_length=64, default=None, verbose_name='负责人')
@@ -32,9 +34,19 @@ class SysDept(BaseModel):
     email = models.CharField(max_length=64, default=None, verbose_name='邮箱')
     status = models.CharField(max_length=1, choices=[('0', '正常'), ('1', '停用')], default='0', verbose_name="部门状态")
 
+    @property
+    def path(self):
+        """
+        自身的祖级路径，子孙部门的祖级列表均以此为前缀
+        """
+        return '%s,%s' % (self.ancestors or '0', self.dept_id)
+
     class Meta:
         db_table = 'sys_dept'
         verbose_name = '部门表'
+        indexes = [
+            models.Index(fields=['parent_id', 'order_num'], name='sys_dept_parent_idx'),
+        ]
 
 class SysPost(BaseModel):
     """
@@ -49,6 +61,9 @@ class SysPost(BaseModel):
     class Meta:
         db_table = 'sys_post'
         verbose_name = '岗位表'
+        indexes = [
+            models.Index(fields=['create_time', 'post_id'], name='sys_post_ctime_idx'),
+        ]
 
 class SysRole(BaseModel):
     """
@@ -58,7 +73,7 @@ class SysRole(BaseModel):
     role_name = models.CharField(max_length=64, default='common', verbose_name='角色名')
     role_key = models.CharField(max_length=64, default='common', verbose_name='角色权限字符')
     role_sort = models.IntegerField(default=-1, verbose_name='角色顺序')
-    data_scope = models.CharField(max_length=1, choices=[('1', '全部数据权限'), ('2', '自定义数据权限'), ('3', '本部门数据权限'), ('4', '本部门及以下数据权限')], default=1, verbose_name='数据范围')
+    data_scope = models.CharField(max_length=1, choices=[('1', '全部数据权限'), ('2', '自定义数据权限'), ('3', '本部门数据权限'), ('4', '本部门及以下数据权限'), ('5', '仅本人数据权限')], default=1, verbose_name='数据范围')
     dept_check_strictly = models.BooleanField(verbose_name="部门树选择项是否关联显示", default=True)
     menu_check_strictly = models.BooleanField(verbose_name="菜单树选择项是否关联显示", default=True)
     status = models.CharField(max_length=1, choices=[('0', '正常'), ('1', '停用')], default='0', verbose_name='角色状态')
@@ -68,6 +83,9 @@ class SysRole(BaseModel):
     class Meta:
         db_table = 'sys_role'
         verbose_name = '岗位表'
+        indexes = [
+            models.Index(fields=['create_time', 'role_id'], name='sys_role_ctime_idx'),
+        ]
 
 class SysMenu(BaseModel):
     """
@@ -95,6 +113,9 @@ class SysMenu(BaseModel):
     class Meta:
         db_table = 'sys_menu'
         verbose_name = '菜单表'
+        indexes = [
+            models.Index(fields=['parent_id', 'order_num'], name='sys_menu_parent_idx'),
+        ]
 
 class SysUser(BaseModel, AbstractUser):
     """
@@ -119,6 +140,11 @@ class SysUser(BaseModel, AbstractUser):
     class Meta:
         db_table = 'sys_user'
         verbose_name = '用户表'
+        indexes = [
+            models.Index(fields=['create_time', 'user_id'], name='sys_user_ctime_idx'),
+            models.Index(fields=['status', 'create_time'], name='sys_user_status_ctime_idx'),
+            models.Index(fields=['dept', 'create_time'], name='sys_user_dept_ctime_idx'),
+        ]
 
 class SysUserRole(models.Model):
     """
@@ -159,7 +185,7 @@ class SysDictType(BaseModel):
     """
     dict_id = models.AutoField(primary_key=True, verbose_name="字典主键")
     dict_name = models.CharField(max_length=64, default=None, verbose_name="字典名称")
-    dict_type = models.CharField(max_length=64, default=None, verbose_name='字典类型')
+    dict_type = models.CharField(max_length=64, default=None, db_index=True, verbose_name='字典类型')
     status = models.CharField(max_length=1, choices=[('0', '正常'), ('1', '停用')], default='0', verbose_name='字典类型状态')
 
     def __str__(self):
@@ -168,6 +194,9 @@ class SysDictType(BaseModel):
     class Meta:
         db_table = 'sys_dict_type'
         verbose_name = '字典类型表'
+        indexes = [
+            models.Index(fields=['create_time', 'dict_id'], name='sys_dict_type_ctime_idx'),
+        ]
 
 class SysDictData(BaseModel):
     """
@@ -186,6 +215,9 @@ class SysDictData(BaseModel):
     class Meta:
         db_table = 'sys_dict_data'
         verbose_name = '字典数据表'
+        indexes = [
+            models.Index(fields=['dict_type', 'create_time'], name='sys_dict_data_type_ctime_idx'),
+        ]
 
 class SysConfig(BaseModel):
     """
@@ -193,13 +225,16 @@ class SysConfig(BaseModel):
     """
     config_id = models.AutoField(primary_key=True, verbose_name='参数ID')
     config_name = models.CharField(max_length=32, verbose_name='参数名')
-    config_key = models.CharField(max_length=128, verbose_name='参数的键')
+    config_key = models.CharField(max_length=128, db_index=True, verbose_name='参数的键')
     config_value = models.CharField(max_length=128, verbose_name='参数的值')
     config_type = models.CharField(max_length=1, default='Y', choices=[('Y', '是'), ('N', '否')],verbose_name='系统内置')
 
     class Meta:
         db_table = 'sys_config'
         verbose_name = '参数配置表'
+        indexes = [
+            models.Index(fields=['create_time', 'config_id'], name='sys_config_ctime_idx'),
+        ]
 
 class SysNotice(BaseModel):
     """
@@ -214,12 +249,17 @@ class SysNotice(BaseModel):
     class Meta:
         db_table = 'sys_notice'
         verbose_name = '通知公告表'
+        indexes = [
+            models.Index(fields=['create_time', 'notice_id'], name='sys_notice_ctime_idx'),
+        ]
 
 class SysOperationLog(BaseModel):
     """
     操作日志表
     """
     id = models.AutoField(primary_key=True, verbose_name='日志编号')
+    # 日志由后台线程批量写入，创建时间在请求时记录
+    create_time = models.DateTimeField(default=datetime.datetime.now, verbose_name='创建日期')
     title = models.CharField(max_length=512, verbose_name='系统模块')
     method = models.TextField(null=True,default=None, verbose_name='操作方法')
     business_type = models.CharField(max_length=32, verbose_name='操作类型')
@@ -236,6 +276,11 @@ class SysOperationLog(BaseModel):
     class Meta:
         db_table = 'sys_operation_log'
         verbose_name = '操作日志表'
+        indexes = [
+            models.Index(fields=['create_time', 'id'], name='sys_oper_log_ctime_idx'),
+            models.Index(fields=['business_type', 'create_time'], name='sys_oper_log_type_ctime_idx'),
+            models.Index(fields=['status', 'create_time'], name='sys_oper_log_status_ctime_idx'),
+        ]
 
 class SysLoginLog(BaseModel):
     """
@@ -254,4 +299,60 @@ class SysLoginLog(BaseModel):
     class Meta:
         db_table = 'sys_login_log'
         verbose_name = '登录日志表'
-        
\ No newline at end of file
+        indexes = [
+            models.Index(fields=['create_time', 'info_id'], name='sys_login_log_ctime_idx'),
+            models.Index(fields=['status', 'create_time'], name='sys_login_log_status_ctime_idx'),
+            models.Index(fields=['login_time'], name='sys_login_log_ltime_idx'),
+        ]
+
+class SysExportJob(BaseModel):
+    """
+    导出任务表
+    """
+    job_id = models.CharField(max_length=32, primary_key=True, verbose_name='任务ID')
+    user_id = models.BigIntegerField(verbose_name='用户ID')
+    export_type = models.CharField(max_length=64, verbose_name='导出类型')
+    params = models.TextField(default='{}', verbose_name='导出参数')
+    file_type = models.CharField(max_length=8, default='xlsx', verbose_name='文件类型')
+    file_name = models.CharField(max_length=256, null=True, default=None, verbose_name='文件名')
+    file_path = models.CharField(max_length=512, null=True, default=None, verbose_name='文件路径')
+    status = models.CharField(max_length=1, choices=[('0', '等待'), ('1', '执行中'), ('2', '完成'), ('3', '失败')], default='0', db_index=True, verbose_name='任务状态')
+    error_msg = models.TextField(null=True, default=None, verbose_name='错误消息')
+    finish_time = models.DateTimeField(null=True, default=None, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'sys_export_job'
+        verbose_name = '导出任务表'
+
+class SysRevokedToken(models.Model):
+    """
+    已吊销令牌表
+    """
+    jti = models.CharField(max_length=32, primary_key=True, verbose_name='令牌ID')
+    user_id = models.BigIntegerField(verbose_name='用户ID')
+    expire_time = models.DateTimeField(db_index=True, verbose_name='过期时间')
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name='吊销时间')
+
+    class Meta:
+        db_table = 'sys_revoked_token'
+        verbose_name = '已吊销令牌表'
+
+class SysUserOnline(models.Model):
+    """
+    在线用户表
+    """
+    token_id = models.CharField(max_length=32, primary_key=True, verbose_name='会话编号')
+    user_id = models.BigIntegerField(db_index=True, verbose_name='用户ID')
+    username = models.CharField(max_length=256, verbose_name='用户名称')
+    dept_name = models.CharField(max_length=128, null=True, default=None, verbose_name='部门名称')
+    ip_addr = models.GenericIPAddressField(verbose_name='登录地址')
+    login_location = models.CharField(max_length=512, verbose_name='登录地点')
+    browser = models.CharField(max_length=512, verbose_name='浏览器')
+    os = models.CharField(max_length=512, verbose_name='操作系统')
+    login_time = models.DateTimeField(verbose_name='登录时间')
+    last_access_time = models.DateTimeField(verbose_name='最后访问时间')
+    expire_time = models.DateTimeField(db_index=True, verbose_name='过期时间')
+
+    class Meta:
+        db_table = 'sys_user_online'
+        verbose_name = '在线用户表'
@@ -0,0 +1,163 @@
+import atexit
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from user_agents import parse
+
+from core.cache import get_shared_cache
+from core.models import SysUserOnline, SysDept
+from core.revocation import revoke_token, purge_revoked_tokens
+
+DEFAULTS = {
+    'TOUCH_INTERVAL': 60,
+    'FLUSH_INTERVAL': 60,
+}
+
+
+class OnlineSessionRegistry:
+    """
+    在线会话登记
+    登录时写入会话，认证请求只在进程内记录最后访问时间，每个会话每个间隔内最多记录一次，由后台线程定期批量写库
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        # 会话ID -> 最后访问时间戳
+        self._touched = {}
+        # 等待写库的 会话ID -> 最后访问时间
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def login(self, payload, user, request):
+        """
+        登记登录会话
+        """
+        if not payload.get('jti'):
+            return
+        user_agent = parse(request.headers.get('User-Agent', ''))
+        now = datetime.datetime.now()
+        dept_name = SysDept.objects.filter(dept_id=user.dept_id).values_list('dept_name', flat=True).first()
+        SysUserOnline.objects.create(
+            token_id=payload['jti'],
+            user_id=user.pk,
+            username=user.username,
+            dept_name=dept_name,
+            ip_addr=request.META['REMOTE_ADDR'],
+            login_location='未知',
+            browser=user_agent.browser.family,
+            os='%s %s' % (user_agent.os.family, user_agent.os.version_string),
+            login_time=now,
+            last_access_time=now,
+            expire_time=datetime.datetime.fromtimestamp(payload['exp'])
+        )
+
+    def touch(self, payload):
+        """
+        记录会话访问，间隔内重复访问直接返回
+        """
+        token_id = payload.get('jti')
+        if not token_id:
+            return
+        now = time.time()
+        interval = self.options['TOUCH_INTERVAL']
+        if now - self._touched.get(token_id, 0) < interval:
+            return
+        self._touched[token_id] = now
+        # 共享缓存去重，多个进程在同一间隔内只有一个记录
+        if not get_shared_cache().add('online_touch:%s' % token_id, 1, interval):
+            return
+        with self._lock:
+            self._pending[token_id] = datetime.datetime.fromtimestamp(now)
+        self._ensure_started()
+
+    def logout(self, payload):
+        """
+        注销会话
+        """
+        token_id = payload.get('jti')
+        if token_id:
+            self._discard(token_id)
+            SysUserOnline.objects.filter(token_id=token_id).delete()
+
+    def force_exit(self, token_id):
+        """
+        强退会话并吊销令牌，会话不存在时返回False
+        """
+        session = SysUserOnline.objects.filter(token_id=token_id).first()
+        if not session:
+            return False
+        revoke_token({
+            'jti': session.token_id,
+            'user_id': session.user_id,
+            'exp': session.expire_time.timestamp()
+        })
+        self._discard(token_id)
+        session.delete()
+        return True
+
+    def flush(self):
+        """
+        批量写入最后访问时间并清理过期会话和过期的吊销记录
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            try:
+                SysUserOnline.objects.bulk_update([
+                    SysUserOnline(token_id=token_id, last_access_time=last_access_time)
+                    for token_id, last_access_time in pending.items()
+                ], ['last_access_time'])
+            except Exception:
+                # 写库失败时放回，等待下次写入
+                with self._lock:
+                    for token_id, last_access_time in pending.items():
+                        self._pending.setdefault(token_id, last_access_time)
+                raise
+        SysUserOnline.objects.filter(expire_time__lte=datetime.datetime.now()).delete()
+        purge_revoked_tokens()
+        # 清理进程内超过间隔的访问记录
+        expired = time.time() - self.options['TOUCH_INTERVAL']
+        for token_id, touched in list(self._touched.items()):
+            if touched < expired:
+                self._touched.pop(token_id, None)
+
+    def stop(self, timeout=10):
+        self._stopped.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._pending:
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def _discard(self, token_id):
+        self._touched.pop(token_id, None)
+        with self._lock:
+            self._pending.pop(token_id, None)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopped.clear()
+                    self._thread = threading.Thread(target=self._run, name='online-session-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.options['FLUSH_INTERVAL']):
+            try:
+                self.flush()
+            except Exception:
+                pass
+            finally:
+                close_old_connections()
+
+
+online_registry = OnlineSessionRegistry(getattr(settings, 'ONLINE_SESSION', None))
+atexit.register(online_registry.stop)
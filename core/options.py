@@ -0,0 +1,45 @@
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.cache import get_versions, bump_version
+from core.models import SysPost, SysRole
+from core.serializers import SysPostSerializer, SysRoleSerializer
+
+OPTIONS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _get_options(name, compile_func, *version_names):
+    """
+    按版本号缓存预先编码的选项列表JSON
+    """
+    versions = get_versions(*version_names)
+    key = 'options:%s:%s' % (name, ':'.join(str(version) for version in versions))
+    content = cache.get(key)
+    if content is None:
+        content = json.dumps(compile_func(), cls=DjangoJSONEncoder)
+        cache.set(key, content, OPTIONS_CACHE_TIMEOUT)
+    return content
+
+def get_post_options():
+    """
+    全部岗位
+    """
+    return _get_options('posts', lambda: SysPostSerializer(SysPost.objects.all(), many=True).data, 'posts')
+
+def get_role_options():
+    """
+    全部角色，角色中包含部门数据，部门变动时一并失效
+    """
+    return _get_options(
+        'roles',
+        lambda: SysRoleSerializer(SysRoleSerializer.setup_eager_loading(SysRole.objects.all()), many=True).data,
+        'roles', 'depts'
+    )
+
+def invalidate_post_options():
+    bump_version('posts')
+
+def invalidate_role_options():
+    bump_version('roles')
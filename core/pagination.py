@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, DateField, DateTimeField
+from rest_framework import serializers
+
+# 结果集不超过该数量时精确计数
+EXACT_COUNT_LIMIT = 1000
+COUNT_CACHE_TIMEOUT = 30
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 500
+
+
+def clamp_page_size(page_size):
+    """
+    解析每页数量，限制在 1 到 MAX_PAGE_SIZE 之间
+    """
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+def encode_cursor(value, pk, direction):
+    data = json.dumps([value.isoformat() if isinstance(value, date) else value, pk, direction])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        value, pk, direction = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        return value, pk, direction
+    except Exception:
+        raise serializers.ValidationError({'non_field_errors': ['无效的游标']})
+
+def parse_cursor_value(model, field, value):
+    """
+    按模型字段类型还原游标中的排序字段值
+    """
+    if value is None:
+        return value
+    try:
+        model_field = model._meta.get_field(field)
+    except FieldDoesNotExist:
+        return value
+    try:
+        if isinstance(model_field, DateTimeField):
+            return datetime.fromisoformat(value)
+        if isinstance(model_field, DateField):
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({'non_field_errors': ['无效的游标']})
+    return value
+
+def cursor_paginate(queryset, cursor, page_size):
+    """
+    游标分页，以 (排序字段, 主键) 定位，避免OFFSET扫描和COUNT统计
+    """
+    ordering = queryset.query.order_by[0] if queryset.query.order_by else 'create_time'
+    field = ordering.lstrip('-')
+    desc = ordering.startswith('-')
+    pk_name = queryset.model._meta.pk.name
+    page_size = clamp_page_size(page_size)
+
+    if cursor:
+        value, pk, direction = decode_cursor(cursor)
+        value = parse_cursor_value(queryset.model, field, value)
+    else:
+        value, pk, direction = None, None, 'n'
+
+    # 向前翻页时反转排序方向，取出后再恢复顺序
+    reverse = direction == 'p'
+    seek_desc = desc != reverse
+    lookup = 'lt' if seek_desc else 'gt'
+    queryset = queryset.order_by(*(('-%s' % name) if seek_desc else name for name in (field, pk_name)))
+    if cursor:
+        queryset = queryset.filter(
+            Q(**{'%s__%s' % (field, lookup): value}) |
+            Q(**{field: value, '%s__%s' % (pk_name, lookup): pk})
+        )
+
+    # values() 查询集需包含排序字段和主键
+    if queryset._fields and not {field, pk_name} <= set(queryset._fields):
+        queryset = queryset.values(*queryset._fields, *({field, pk_name} - set(queryset._fields)))
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    page_info = {'next': None, 'prev': None}
+    if rows:
+        get_value = dict.get if isinstance(rows[0], dict) else getattr
+        first, last = rows[0], rows[-1]
+        if has_more or reverse:
+            page_info['next'] = encode_cursor(get_value(last, field), get_value(last, pk_name), 'n')
+        if (has_more and reverse) or (cursor and not reverse):
+            page_info['prev'] = encode_cursor(get_value(first, field), get_value(first, pk_name), 'p')
+    return rows, page_info
+
+def estimate_count(model, using='default'):
+    """
+    从数据库统计信息中读取表的估算行数，不支持或没有统计信息时返回None
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+    elif connection.vendor == 'sqlite':
+        # 仅在执行过ANALYZE后存在
+        if 'sqlite_stat1' not in connection.introspection.table_names():
+            return None
+        sql = "SELECT CAST(substr(stat, 1, instr(stat || ' ', ' ') - 1) AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s"
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+def count_queryset(queryset):
+    """
+    统计查询集总数，返回 (总数, 是否精确)
+    小结果集精确计数；无过滤条件时使用数据库估算值；其余按查询条件缓存一段时间
+    """
+    queryset = queryset.order_by()
+    count = queryset[:EXACT_COUNT_LIMIT + 1].count()
+    if count <= EXACT_COUNT_LIMIT:
+        return count, True
+
+    if not queryset.query.where:
+        estimate = estimate_count(queryset.model, queryset.db)
+        if estimate is not None:
+            return max(estimate, count), False
+
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(('%s%s' % (sql, params)).encode()).hexdigest()
+    key = 'count:%s:%s' % (queryset.model._meta.db_table, digest)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count, True
+    return count, False
+
+def paginate(queryset, page_num, page_size, cursor=None):
+    """
+    分页，返回当前页数据和需要合并到响应中的分页信息
+    传入cursor参数（首页为空字符串）时使用游标分页，否则使用页码分页
+    """
+    page_size = clamp_page_size(page_size)
+    if cursor is not None:
+        return cursor_paginate(queryset, cursor, page_size)
+
+    paginator = Paginator(queryset, page_size)
+    paginator.count, exact = count_queryset(queryset)
+    return paginator.get_page(page_num), {'total': paginator.count, 'total_exact': exact}
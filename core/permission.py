@@ -0,0 +1,135 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.cache import get_versions, bump_version, LocalCache
+from core.hierarchy import get_descendant_ids
+from core.models import SysUserRole, SysRoleMenu, SysRole
+
+ADMIN_ROLE_ID = 1
+ADMIN_PERMS = frozenset(['*:*:*'])
+PERMS_CACHE_TIMEOUT = 60 * 60
+# 进程内缓存的最大用户数
+PERMS_LOCAL_CACHE_SIZE = 4096
+
+# 数据权限范围：all 全部数据，dept_ids 可见部门，self_only 可见本人数据
+DataScope = namedtuple('DataScope', ['all', 'dept_ids', 'self_only'])
+
+# 进程内缓存 (名称, user_id) -> (版本号, 值)
+_local_cache = LocalCache(PERMS_LOCAL_CACHE_SIZE)
+
+
+def compile_perms(user):
+    """
+    编译用户的有效权限集合：用户角色 -> 角色菜单 -> 菜单权限标识
+    """
+    if SysUserRole.objects.filter(user_id=user.pk, role_id=ADMIN_ROLE_ID).exists():
+        return ADMIN_PERMS
+
+    perms = SysRoleMenu.objects.filter(
+        role__sysuserrole__user_id=user.pk,
+        role__status='0'
+    ).exclude(menu__perms__isnull=True).exclude(menu__perms='').values_list('menu__perms', flat=True)
+    return frozenset(perms)
+
+def compile_data_scope(user):
+    """
+    编译用户的数据权限：取全部正常角色数据范围的并集
+    """
+    roles = SysRole.objects.filter(sysuserrole__user_id=user.pk).values_list('role_id', 'data_scope', 'status')
+    dept_ids = set()
+    custom_role_ids = []
+    self_only = False
+    for role_id, data_scope, status in roles:
+        if role_id == ADMIN_ROLE_ID:
+            return DataScope(True, frozenset(), False)
+        if status != '0':
+            continue
+        # 全部数据权限
+        if data_scope == '1':
+            return DataScope(True, frozenset(), False)
+        # 自定义数据权限
+        elif data_scope == '2':
+            custom_role_ids.append(role_id)
+        # 本部门数据权限
+        elif data_scope == '3':
+            dept_ids.add(user.dept_id)
+        # 本部门及以下数据权限
+        elif data_scope == '4':
+            dept_ids.update(get_descendant_ids(user.dept_id))
+        # 仅本人数据权限
+        elif data_scope == '5':
+            self_only = True
+
+    if custom_role_ids:
+        dept_ids.update(SysRole.depts.through.objects.filter(
+            sysrole_id__in=custom_role_ids
+        ).values_list('sysdept_id', flat=True))
+    return DataScope(False, frozenset(dept_ids), self_only)
+
+def _get_cached(name, user, compile_func, *version_names):
+    """
+    依次读取进程内缓存、共享缓存，均未命中时从数据库编译
+    """
+    user_id = user.pk
+    versions = get_versions('perms', 'perms:%s' % user_id, *version_names)
+    local = _local_cache.get((name, user_id))
+    if local and local[0] == versions:
+        return local[1]
+
+    key = '%s:%s:%s' % (name, user_id, ':'.join(str(version) for version in versions))
+    value = cache.get(key)
+    if value is None:
+        value = compile_func(user)
+        cache.set(key, value, PERMS_CACHE_TIMEOUT)
+    _local_cache.set((name, user_id), (versions, value))
+    return value
+
+def get_user_perms(user):
+    """
+    获取用户权限集合
+    """
+    return _get_cached('perms', user, compile_perms)
+
+def get_data_scope(user):
+    """
+    获取用户数据权限，部门变动时一并失效
+    """
+    return _get_cached('data_scope', user, compile_data_scope, 'depts')
+
+def has_perm(user, perm):
+    """
+    判断用户是否拥有权限
+    """
+    perms = get_user_perms(user)
+    return '*:*:*' in perms or perm in perms
+
+def filter_data_scope(queryset, user, dept_field='dept_id', user_field='user_id'):
+    """
+    按用户数据权限过滤查询集
+    """
+    scope = get_data_scope(user)
+    if scope.all:
+        return queryset
+
+    q = Q(**{'%s__in' % dept_field: scope.dept_ids})
+    if scope.self_only:
+        q |= Q(**{user_field: user.pk})
+    return queryset.filter(q)
+
+def invalidate_perms(user_ids=None):
+    """
+    使权限缓存失效，不指定用户时全部失效
+    """
+    if user_ids is None:
+        bump_version('perms')
+    else:
+        for user_id in user_ids:
+            bump_version('perms:%s' % user_id)
+
+def invalidate_data_scope():
+    """
+    部门层级变动后使数据权限缓存失效
+    """
+    bump_version('depts')
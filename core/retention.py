@@ -0,0 +1,208 @@
+import datetime
+import gzip
+import json
+import os
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction, close_old_connections
+from django.db.models import Max, Min
+
+from core.models import SysOperationLog, SysLoginLog
+
+DEFAULTS = {
+    'ROOT': None,
+    'BATCH_SIZE': 5000,
+    'INTERVAL': 24 * 60 * 60,
+    'POLICIES': {},
+}
+
+# 日志类型 -> (模型, 时间字段)
+RETENTION_MODELS = {
+    'operlog': (SysOperationLog, 'create_time'),
+    'logininfor': (SysLoginLog, 'login_time'),
+}
+
+ARCHIVE_DATE_FORMAT = '%Y-%m-%d'
+
+
+def truncate(model):
+    """
+    清空表，使用数据库的 TRUNCATE（SQLite为不带条件的 DELETE），不加载数据
+    """
+    connection = connections[model.objects.db]
+    sql_list = connection.ops.sql_flush(no_style(), [model._meta.db_table])
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            for sql in sql_list:
+                cursor.execute(sql)
+
+
+class LogRetention:
+    """
+    日志保留策略
+    按主键区间分批删除超过保留天数的日志，可选先归档为按日期分区的gzip JSONL文件
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+
+    def get_policy(self, name):
+        """
+        返回 (保留天数, 是否归档)，未配置时不清理
+        """
+        policy = self.options['POLICIES'].get(name) or {}
+        return policy.get('DAYS'), policy.get('ARCHIVE', False)
+
+    def purge(self, name, days, archive=False, batch_size=None):
+        """
+        清理一类日志，返回删除条数
+        """
+        model, time_field = RETENTION_MODELS[name]
+        batch_size = batch_size or self.options['BATCH_SIZE']
+        pk_name = model._meta.pk.attname
+        if archive:
+            self.recover_pending(name)
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+        expired = model.objects.filter(**{'%s__lt' % time_field: cutoff})
+        bounds = expired.aggregate(low=Min(pk_name), high=Max(pk_name))
+        if bounds['low'] is None:
+            return 0
+
+        deleted = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            end = start + batch_size
+            # 文件写入无法回滚：先写入待提交文件，删除提交后再追加到归档，删除失败时丢弃，重试不会重复归档
+            try:
+                with transaction.atomic(using=expired.db):
+                    if archive:
+                        batch = expired.filter(**{'%s__gte' % pk_name: start, '%s__lt' % pk_name: end})
+                        self._write_pending(name, batch.order_by(pk_name).values())
+                    count = self._delete(model, time_field, cutoff, start, end)
+            except Exception:
+                if archive:
+                    self._discard_pending(name)
+                raise
+            deleted += count
+            if archive:
+                self._commit_pending(name)
+        return deleted
+
+    @staticmethod
+    def _delete(model, time_field, cutoff, start, end):
+        """
+        直接执行 DELETE 删除主键区间内的过期日志，不加载数据也不触发信号
+        """
+        opts = model._meta
+        connection = connections[model.objects.db]
+        quote_name = connection.ops.quote_name
+        pk_column = quote_name(opts.pk.column)
+        field = opts.get_field(time_field)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s WHERE %s >= %%s AND %s < %%s AND %s < %%s' % (
+                quote_name(opts.db_table), pk_column, pk_column, quote_name(field.column)
+            ), [start, end, field.get_db_prep_value(cutoff, connection)])
+            return cursor.rowcount
+
+    def get_archive_path(self, name, date):
+        return os.path.join(self.options['ROOT'], name, date.strftime('%Y-%m'), '%s.jsonl.gz' % date.strftime(ARCHIVE_DATE_FORMAT))
+
+    def get_pending_path(self, name):
+        return os.path.join(self.options['ROOT'], name, 'pending.jsonl.gz')
+
+    def recover_pending(self, name):
+        """
+        处理上次中断遗留的待提交文件：记录已删除说明删除已提交，追加到归档；否则丢弃，本次重新归档
+        同一批次在一个事务中删除，检查一条记录即可
+        """
+        path = self.get_pending_path(name)
+        if not os.path.exists(path):
+            return
+        model = RETENTION_MODELS[name][0]
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            line = f.readline()
+        if line and not model.objects.filter(pk=json.loads(line)[model._meta.pk.attname]).exists():
+            self._commit_pending(name)
+        else:
+            self._discard_pending(name)
+
+    @staticmethod
+    def _dumps(row):
+        return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    def _append(self, name, partitions):
+        for date, lines in partitions.items():
+            path = self.get_archive_path(name, date)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.writelines(lines)
+
+    def _write_pending(self, name, rows):
+        path = self.get_pending_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(self._dumps(row))
+
+    def _commit_pending(self, name):
+        """
+        待提交文件按日期分区追加到归档
+        """
+        time_field = RETENTION_MODELS[name][1]
+        path = self.get_pending_path(name)
+        partitions = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                value = json.loads(line)[time_field]
+                partitions.setdefault(datetime.date.fromisoformat(value[:10]), []).append(line)
+        self._append(name, partitions)
+        os.remove(path)
+
+    def _discard_pending(self, name):
+        try:
+            os.remove(self.get_pending_path(name))
+        except FileNotFoundError:
+            pass
+
+    def query_archive(self, name, begin_date, end_date, **filters):
+        """
+        读取日期范围内的归档日志，filters 为字段值的子串匹配条件
+        """
+        date = begin_date
+        while date <= end_date:
+            path = self.get_archive_path(name, date)
+            date += datetime.timedelta(days=1)
+            if not os.path.exists(path):
+                continue
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    row = json.loads(line)
+                    if all(value in str(row.get(field) or '') for field, value in filters.items()):
+                        yield row
+
+    def run_once(self, batch_size=None):
+        """
+        按配置清理全部日志，返回 日志类型 -> 删除条数
+        """
+        result = {}
+        for name in RETENTION_MODELS:
+            days, archive = self.get_policy(name)
+            if days:
+                result[name] = self.purge(name, days, archive, batch_size)
+        return result
+
+    def run_forever(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                close_old_connections()
+            time.sleep(self.options['INTERVAL'])
+
+
+log_retention = LogRetention(getattr(settings, 'LOG_RETENTION', None))
@@ -0,0 +1,131 @@
+import datetime
+import hashlib
+import math
+import threading
+import time
+import uuid
+
+from rest_framework_jwt import utils
+
+from core.cache import get_version, bump_version, get_shared_cache
+from core.models import SysRevokedToken
+
+# 布隆过滤器误判率
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MIN_CAPACITY = 1024
+# 增量同步的最大吊销数，超过时从数据库重建过滤器
+MAX_SYNC_COUNT = 1000
+
+# 进程内过滤器 (版本号, 过滤器)
+_local_filter = (None, None)
+_lock = threading.Lock()
+
+
+class BloomFilter:
+    """
+    布隆过滤器，判断不存在时一定不存在，判断存在时有一定误判率
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # 双重哈希，由一次摘要得到全部位置
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        self.count += 1
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def jwt_payload_handler(user):
+    """
+    令牌载荷中增加唯一标识jti，用于吊销令牌
+    """
+    payload = utils.jwt_payload_handler(user)
+    payload['jti'] = uuid.uuid4().hex
+    return payload
+
+def _revoked_key(seq):
+    return 'revoked_token:%s' % seq
+
+def _build_filter():
+    jtis = list(SysRevokedToken.objects.filter(
+        expire_time__gt=datetime.datetime.now()
+    ).values_list('jti', flat=True))
+    bloom = BloomFilter(max(len(jtis) * 2, BLOOM_MIN_CAPACITY))
+    for jti in jtis:
+        bloom.add(jti)
+    return bloom
+
+def _sync_filter(bloom, local_version, version):
+    """
+    版本号即吊销序号，按序号从共享缓存读取其他进程新吊销的令牌加入过滤器
+    序号缺失（缓存淘汰）、增量过多或超出过滤器容量时从数据库重建
+    """
+    if bloom is not None and local_version < version <= local_version + MAX_SYNC_COUNT:
+        keys = [_revoked_key(seq) for seq in range(local_version + 1, version + 1)]
+        jtis = get_shared_cache().get_many(keys)
+        if len(jtis) == len(keys) and bloom.count + len(jtis) <= bloom.capacity:
+            for jti in jtis.values():
+                bloom.add(jti)
+            return bloom
+    return _build_filter()
+
+def _get_filter():
+    """
+    获取进程内过滤器，吊销列表版本变化时增量同步
+    """
+    global _local_filter
+    version = get_version('revoked_tokens')
+    local_version, bloom = _local_filter
+    if local_version != version:
+        with _lock:
+            local_version, bloom = _local_filter
+            if local_version != version:
+                bloom = _sync_filter(bloom, local_version, version)
+                _local_filter = (version, bloom)
+    return bloom
+
+def revoke_token(payload):
+    """
+    吊销令牌，记录保留到令牌过期
+    先写数据库再递增序号，其他进程读到新序号时数据库中一定已有记录
+    """
+    jti = payload.get('jti')
+    if not jti:
+        return False
+    SysRevokedToken.objects.bulk_create([SysRevokedToken(
+        jti=jti,
+        user_id=payload.get('user_id'),
+        expire_time=datetime.datetime.fromtimestamp(payload['exp'])
+    )], ignore_conflicts=True)
+    seq = bump_version('revoked_tokens')
+    get_shared_cache().set(_revoked_key(seq), jti, max(int(payload['exp'] - time.time()), 1))
+    return True
+
+def purge_revoked_tokens():
+    """
+    清理已过期的吊销记录，过期令牌签名校验即失败，无需通知其他进程
+    """
+    SysRevokedToken.objects.filter(expire_time__lte=datetime.datetime.now()).delete()
+
+def is_revoked(payload):
+    """
+    判断令牌是否已吊销，过滤器判断存在时再查询确认
+    """
+    jti = payload.get('jti')
+    if not jti or jti not in _get_filter():
+        return False
+    return SysRevokedToken.objects.filter(jti=jti).exists()
@@ -0,0 +1,57 @@
+import json
+
+from django.core.cache import cache
+
+from core.authentication import get_role_ids
+from core.cache import get_version, bump_version
+from core.models import SysMenu
+from core.utils import is_admin, gen_routers
+
+ROUTERS_CACHE_TIMEOUT = 24 * 60 * 60
+
+MENU_FIELDS = ('menu_id', 'parent_id', 'menu_name', 'path', 'component', 'component_name', 'menu_type', 'visible',
+               'icon', 'is_frame', 'no_cache', 'affix', 'breadcrumb')
+
+
+def compile_routers(menus):
+    """
+    将菜单列表编译为路由信息响应体
+    """
+    menu_list = list(menus.values(*MENU_FIELDS))
+    menu_list_top = [item for item in menu_list if item.get("parent_id") == 0]
+    res = {
+        "code": 200,
+        "msg": "ok",
+        "data": gen_routers(menu_list_top, menu_list) or []
+    }
+    return json.dumps(res).encode()
+
+def get_routers(user):
+    """
+    获取用户的路由信息，按角色集合和菜单表版本缓存编译结果
+    """
+    if is_admin(user):
+        role_key = 'admin'
+        menus = SysMenu.objects.all().order_by('order_num')
+    else:
+        role_ids = sorted(get_role_ids(user))
+        role_key = ','.join(str(role_id) for role_id in role_ids)
+        menus = SysMenu.objects.filter(
+            menu_type__in=['M', 'C'],
+            sysrolemenu__role_id__in=role_ids,
+            is_delete=False,
+            visible='0'
+        ).distinct().order_by('order_num')
+
+    key = 'routers:%s:%s' % (get_version('menus'), role_key)
+    content = cache.get(key)
+    if content is None:
+        content = compile_routers(menus)
+        cache.set(key, content, ROUTERS_CACHE_TIMEOUT)
+    return content
+
+def invalidate_routers():
+    """
+    使全部路由缓存失效
+    """
+    bump_version('menus')
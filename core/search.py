@@ -0,0 +1,95 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.expressions import RawSQL
+
+# 表名 -> (主键列, 子串查询字段)
+SEARCH_INDEXES = {
+    'sys_user': ('user_id', ['username', 'phone_number']),
+    'sys_operation_log': ('id', ['title', 'operator']),
+    'sys_config': ('config_id', ['config_name', 'config_key']),
+}
+# trigram索引至少需要3个字符
+MIN_SEARCH_LENGTH = 3
+
+# (数据库别名, 数据库名) -> 已存在的表名，索引表由迁移 0036_search_indexes 创建
+_search_tables = {}
+
+
+def _search_table(table):
+    return '%s_search' % table
+
+def _trigger_sql(table, pk, fields):
+    """
+    FTS5外部内容表的同步触发器，与迁移 0036_search_indexes 中的定义一致
+    """
+    search_table = _search_table(table)
+    columns = ', '.join(fields)
+    new_values = ', '.join('new.%s' % field for field in fields)
+    old_values = ', '.join('old.%s' % field for field in fields)
+    delete = "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.%s, %s);" % (
+        search_table, search_table, columns, pk, old_values
+    )
+    insert = 'INSERT INTO %s(rowid, %s) VALUES (new.%s, %s);' % (search_table, columns, pk, new_values)
+    return {
+        'ai': 'CREATE TRIGGER %s_ai AFTER INSERT ON %s BEGIN %s END' % (search_table, table, insert),
+        'ad': 'CREATE TRIGGER %s_ad AFTER DELETE ON %s BEGIN %s END' % (search_table, table, delete),
+        'au': 'CREATE TRIGGER %s_au AFTER UPDATE OF %s ON %s BEGIN %s %s END' % (search_table, columns, table, delete, insert),
+    }
+
+def ensure_search_triggers(connection):
+    """
+    补建缺失的同步触发器并重建索引，返回修复的表名
+    SQLite修改字段时会重建表，表上的触发器随之丢失且不报错，迁移后需检查
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    repaired = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        names = {row[0] for row in cursor.fetchall()}
+        for table, (pk, fields) in SEARCH_INDEXES.items():
+            search_table = _search_table(table)
+            triggers = _trigger_sql(table, pk, fields)
+            if search_table not in names or all('%s_%s' % (search_table, suffix) in names for suffix in triggers):
+                continue
+            for suffix, sql in triggers.items():
+                cursor.execute('DROP TRIGGER IF EXISTS %s_%s' % (search_table, suffix))
+                cursor.execute(sql)
+            # 触发器缺失期间的修改未同步到索引，整体重建
+            cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (search_table, search_table))
+            repaired.append(table)
+    return repaired
+
+def sync_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    迁移完成后重新识别索引表并补建触发器，连接 post_migrate 信号
+    """
+    _search_tables.clear()
+    ensure_search_triggers(connections[using])
+
+def _has_search_table(connection, table):
+    key = (connection.alias, connection.settings_dict['NAME'])
+    tables = _search_tables.get(key)
+    if tables is None:
+        tables = _search_tables[key] = set(connection.introspection.table_names())
+    return _search_table(table) in tables
+
+def search_filter(queryset, **values):
+    """
+    子串查询，等同于 filter(字段__contains=值)，忽略空值
+    SQLite下通过FTS5 trigram表查询匹配的主键，PostgreSQL的 LIKE 查询直接使用pg_trgm索引
+    """
+    connection = connections[queryset.db]
+    opts = queryset.model._meta
+    pk, fields = SEARCH_INDEXES.get(opts.db_table, (None, ()))
+    for field, value in values.items():
+        if not value:
+            continue
+        if (connection.vendor == 'sqlite' and field in fields and len(value) >= MIN_SEARCH_LENGTH
+                and _has_search_table(connection, opts.db_table)):
+            # 整体作为短语匹配，双引号转义
+            phrase = '"%s"' % value.replace('"', '""')
+            sql = 'SELECT rowid FROM %s WHERE %s MATCH %%s' % (_search_table(opts.db_table), field)
+            queryset = queryset.filter(pk__in=RawSQL(sql, [phrase]))
+        else:
+            queryset = queryset.filter(**{'%s__contains' % field: value})
+    return queryset
@@ -0,0 +1,40 @@
+import datetime
+
+from core.models import SysOperationLog, SysLoginLog, SysUser, SysDictData, SysDictType, SysConfig, SysDept, SysRole, \
+    SysPost, SysUserRole, SysUserPost
+
+SEED_BATCH_SIZE = 500
+
+
+def seed_data(rows):
+    """
+    生成用于性能测试的数据，每张表rows条，调用方负责在事务中执行并回滚
+    """
+    now = datetime.datetime.now()
+    depts = [SysDept.objects.create(dept_name='seed_%d' % i, leader='seed', phone='', email='') for i in range(10)]
+    role = SysRole.objects.create(role_name='seed', role_key='seed')
+    role.depts.add(*depts)
+    post = SysPost.objects.create(post_code='seed', post_name='seed')
+    dict_types = [SysDictType.objects.create(dict_name='seed', dict_type='seed_%d' % i) for i in range(10)]
+
+    SysOperationLog.objects.bulk_create([SysOperationLog(
+        title='seed', method='GET', business_type=str(i % 10), request_method='GET', request_url='/seed/',
+        request_param='{}', json_result='{}', ip='127.0.0.1', location='内网IP', operator='seed_%d' % (i % 100),
+        status=str(i % 2)
+    ) for i in range(rows)], batch_size=SEED_BATCH_SIZE)
+    SysLoginLog.objects.bulk_create([SysLoginLog(
+        username='seed_%d' % (i % 100), ip_addr='127.0.0.1', login_location='内网IP', browser='Chrome',
+        os='Windows 10', status=str(i % 2), msg='登录成功', login_time=now
+    ) for i in range(rows)], batch_size=SEED_BATCH_SIZE)
+    SysUser.objects.bulk_create([SysUser(
+        username='seed_%d' % i, nickname='seed', password='', dept=depts[i % len(depts)], status=str(i % 2)
+    ) for i in range(rows)], batch_size=SEED_BATCH_SIZE)
+    users = SysUser.objects.filter(username__startswith='seed_')
+    SysUserRole.objects.bulk_create([SysUserRole(user=user, role=role) for user in users], batch_size=SEED_BATCH_SIZE)
+    SysUserPost.objects.bulk_create([SysUserPost(user=user, post=post) for user in users], batch_size=SEED_BATCH_SIZE)
+    SysDictData.objects.bulk_create([SysDictData(
+        dict_label='seed', dict_value=str(i), dict_type=dict_types[i % len(dict_types)], list_class='default'
+    ) for i in range(rows)], batch_size=SEED_BATCH_SIZE)
+    SysConfig.objects.bulk_create([SysConfig(
+        config_name='seed', config_key='seed.%d' % i, config_value='seed'
+    ) for i in range(rows)], batch_size=SEED_BATCH_SIZE)
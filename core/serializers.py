@@ -1,20 +1,20 @@
 from django.contrib.auth import authenticate
-from django.core.cache import cache
 from rest_framework import serializers
 from rest_framework_jwt.serializers import JSONWebTokenSerializer, jwt_payload_handler, jwt_encode_handler
 from user_agents import parse
 
+from core.captcha import check_captcha
+from core.fastserializer import FastSerializer
 from core.models import SysUser, SysRole, SysDept, SysMenu, SysDictData, SysPost, SysDictType, SysConfig, SysNotice, \
-    SysOperationLog, SysLoginLog
+    SysOperationLog, SysLoginLog, SysExportJob, SysUserOnline
 
 
 class LoginSerializer(JSONWebTokenSerializer):
     code = serializers.CharField()
+    uuid = serializers.CharField(required=False, allow_blank=True)
 
     def validate_code(self, val):
-        if val in cache:
-           cache.delete(val)
-        else:
+        if not check_captcha(self.initial_data.get('uuid'), val):
             request = self.context['request']
             user_agent = parse(request.headers['User-Agent'])
             log = {
@@ -80,6 +80,22 @@ class LoginSerializer(JSONWebTokenSerializer):
             SysLoginLog.objects.create(**log)
             raise serializers.ValidationError(msg)
 
+class EagerLoadingMixin:
+    """
+    序列化器声明关联数据的预加载方式，详情和选项查询一次性加载关联对象，避免N+1查询
+    列表接口使用快速序列化，不经过此处
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
 class SysPostSerializer(serializers.ModelSerializer):
     create_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
 
@@ -94,7 +110,9 @@ class SysDeptSerializer(serializers.ModelSerializer):
         model = SysDept
         fields = '__all__'
 
-class SysRoleSerializer(serializers.ModelSerializer):
+class SysRoleSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    prefetch_related_fields = ('depts',)
+
     depts = SysDeptSerializer(read_only=True, many=True)
     create_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
 
@@ -102,7 +120,10 @@ class SysRoleSerializer(serializers.ModelSerializer):
         model = SysRole
         fields = '__all__'
 
-class SysUserSerializer(serializers.Serializer):
+class SysUserSerializer(EagerLoadingMixin, serializers.Serializer):
+    select_related_fields = ('dept',)
+    prefetch_related_fields = ('roles__depts', 'posts')
+
     user_id = serializers.IntegerField(read_only=True, label='用户ID')
     dept = SysDeptSerializer(read_only=True, label='部门')
     username = serializers.CharField(required=True, allow_blank=False, allow_null=False, trim_whitespace=True, max_length=256, label='用户名称')
@@ -231,4 +252,29 @@ class SysLoginLogSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SysLoginLog
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SysUserOnlineSerializer(serializers.ModelSerializer):
+    login_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
+    last_access_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
+
+    class Meta:
+        model = SysUserOnline
+        exclude = ['user_id', 'expire_time']
+
+class SysExportJobSerializer(serializers.ModelSerializer):
+    create_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
+    finish_time = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M:%S')
+
+    class Meta:
+        model = SysExportJob
+        exclude = ('file_path',)
+
+
+# 列表接口的只读快速序列化，输出与对应的序列化器一致
+fast_user_serializer = FastSerializer(SysUserSerializer, SysUser)
+fast_user_profile_serializer = FastSerializer(SysUserProfileSerializer)
+fast_dict_data_serializer = FastSerializer(SysDictDataSerializer)
+fast_config_serializer = FastSerializer(SysConfigSerializer)
+fast_operation_log_serializer = FastSerializer(SysOperationLogSerializer)
+fast_login_log_serializer = FastSerializer(SysLoginLogSerializer)
@@ -1,3 +1,1120 @@
-from django.test import TestCase
+import datetime
+import decimal
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from openpyxl import Workbook, load_workbook
+from rest_framework.test import APIClient
+from rest_framework_jwt.settings import api_settings
+
+from core.cache import bump_version, get_version, get_shared_cache, LocalCache
+from core.captcha import CaptchaPool, save_captcha, check_captcha
+from core.configs import get_bool, get_config, preload_configs
+from core.export import iter_xlsx
+from core.jobs import ExportJobError, ExportJobRunner
+from core.management.commands.explain_queries import get_list_queries, is_full_scan, is_sorted
+from core.logwriter import OperationLogWriter
+from core.models import SysConfig, SysDept, SysDictData, SysDictType, SysExportJob, SysMenu, SysPost, SysRole, SysRoleMenu, SysUser, SysUserRole, SysUserPost, SysUserOnline, SysOperationLog, SysLoginLog, SysRevokedToken
+from core.online import online_registry
+from core.pagination import clamp_page_size, count_queryset, cursor_paginate, MAX_PAGE_SIZE
+from core.permission import filter_data_scope, get_data_scope, invalidate_data_scope, invalidate_perms
+from core.retention import LogRetention
+from core.revocation import is_revoked, purge_revoked_tokens, revoke_token
+from core.routers import get_routers, invalidate_routers
+from core.search import ensure_search_triggers, search_filter, sync_search_indexes
+from core.seed import seed_data
+from core import serializers
+from core.tree import TreeIndex
+
+
+# 测试使用进程内缓存，不读写运行中服务的共享缓存目录；操作日志同步写入，不启动后台线程也不写溢出文件
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-%s' % alias}
+    for alias in settings.CACHES
+}
+test_settings = override_settings(CACHES=TEST_CACHES, OPERATION_LOG={'ASYNC': False})
+
+
+def setUpModule():
+    test_settings.enable()
+
+def tearDownModule():
+    test_settings.disable()
+
+def clear_caches():
+    for alias in TEST_CACHES:
+        caches[alias].clear()
+
+def client_for(user):
+    token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(user))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='JWT ' + token)
+    return client
+
+def create_admin():
+    dept = SysDept.objects.create(dept_id=1, dept_name='总公司', leader='admin', phone='', email='')
+    admin_role = SysRole.objects.create(role_id=1, role_name='超级管理员', role_key='admin', data_scope='1')
+    admin = SysUser.objects.create(username='admin', nickname='admin', dept=dept)
+    SysUserRole.objects.create(user=admin, role=admin_role)
+    return admin
+
+
+class UserListQueryTest(TestCase):
+    """
+    用户列表的查询次数固定，不随每页数量增长
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        dept = SysDept.objects.create(dept_id=1, dept_name='总公司', leader='admin', phone='', email='')
+        admin_role = SysRole.objects.create(role_id=1, role_name='超级管理员', role_key='admin', data_scope='1')
+        cls.role = SysRole.objects.create(role_name='普通角色', role_key='common', data_scope='2')
+        cls.role.depts.add(dept)
+        post = SysPost.objects.create(post_code='user', post_name='普通员工')
+
+        cls.admin = SysUser.objects.create(username='admin', nickname='admin', dept=dept)
+        SysUserRole.objects.create(user=cls.admin, role=admin_role)
+        for i in range(30):
+            user = SysUser.objects.create(username='user%d' % i, nickname='user%d' % i, dept=dept)
+            SysUserRole.objects.create(user=user, role=cls.role)
+            SysUserPost.objects.create(user=user, post=post)
+
+    def setUp(self):
+        clear_caches()
+        self.client = client_for(self.admin)
+
+    def assertPageQueries(self, url, budget, page_sizes=(1, 10, 30)):
+        # 首次请求加载权限缓存，不计入
+        self.client.get(url % 1)
+        for page_size in page_sizes:
+            with self.assertNumQueries(budget):
+                response = self.client.get(url % page_size)
+            data = response.json()
+            self.assertEqual(data['code'], 200)
+            self.assertEqual(len(data['rows']), page_size)
+
+    def test_user_list(self):
+        # 总数、当前页、角色、角色部门、岗位，认证用户读取缓存快照
+        self.assertPageQueries('/api/system/user/?page_num=1&page_size=%d', 5)
+
+    def test_user_list_cursor(self):
+        self.assertPageQueries('/api/system/user/?cursor=&page_size=%d', 4)
+
+    def test_role_allocated_list(self):
+        url = '/api/system/role/auth_user/allocated_list/?role_id=%d&page_num=1&page_size=%%d' % self.role.role_id
+        # 角色、总数、当前页、角色、角色部门、岗位
+        self.assertPageQueries(url, 6)
+
+    def test_role_unallocated_list(self):
+        url = '/api/system/role/auth_user/unallocated_list/?role_id=1&page_num=1&page_size=%d'
+        self.assertPageQueries(url, 5)
+
+    def test_user_retrieve(self):
+        user = SysUser.objects.get(username='user0')
+        url = '/api/system/user/%d/' % user.pk
+        self.client.get(url)
+        # 用户、角色、角色部门、岗位，岗位和角色选项读取缓存
+        with self.assertNumQueries(4):
+            data = self.client.get(url).json()
+        self.assertEqual(data['role_ids'], [self.role.role_id])
+        self.assertEqual(data['post_ids'], list(SysUserPost.objects.filter(user=user).values_list('post_id', flat=True)))
+        self.assertEqual(len(data['roles']), 2)
+
+    def test_cached_authentication(self):
+        self.client.get('/api/system/user/option/')
+        # 认证用户读取缓存快照，选项读取缓存
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/system/user/option/')
+        self.assertEqual(response.json()['code'], 200)
+
+        # 停用用户：版本号保存在共享缓存中，其他进程缓存的快照同样失效
+        user = SysUser.objects.get(username='user0')
+        client = client_for(user)
+        url = '/api/system/user/?page_num=1&page_size=10'
+        self.assertEqual(client.get('/api/system/user/option/').json()['code'], 200)
+        version = get_version('users:%s' % user.pk)
+        data = {'user_id': user.pk, 'status': '1'}
+        self.assertEqual(self.client.put('/api/system/user/change_status/', data, format='json').json()['code'], 200)
+        self.assertEqual(get_shared_cache().get('version:users:%s' % user.pk), version + 1)
+        self.assertEqual(client.get(url).json()['msg'], '账户已停用')
+        data = {'user_id': user.pk, 'status': '0'}
+        self.client.put('/api/system/user/change_status/', data, format='json')
+        self.assertEqual(client.get(url).json()['msg'], '没有操作权限')
+
+        # 重置密码
+        data = {'user_id': user.pk, 'password': 'new_password'}
+        self.assertEqual(self.client.put('/api/system/user/reset_pwd/', data, format='json').json()['code'], 200)
+        self.assertEqual(get_shared_cache().get('version:users:%s' % user.pk), version + 3)
+
+        # 删除用户后令牌失效
+        self.assertEqual(self.client.delete('/api/system/user/%s/' % user.pk).json()['code'], 200)
+        self.assertEqual(client.get('/api/system/user/option/').json()['code'], 401)
+
+    def test_snapshot_roles(self):
+        menu = SysMenu.objects.create(menu_name='系统管理', menu_type='M', path='system', component_name='System', order_num=1)
+        SysRoleMenu.objects.create(role=self.role, menu=menu)
+        client = client_for(SysUser.objects.get(username='user0'))
+
+        def titles():
+            return [router['meta']['title'] for router in client.get('/api/get_routers/').json()['data']]
+
+        self.assertEqual(titles(), ['系统管理'])
+        # 停用角色后快照中的角色随权限版本号更新
+        data = {'role_id': self.role.role_id, 'status': '1'}
+        self.assertEqual(self.client.put('/api/system/role/change_status/', data, format='json').json()['code'], 200)
+        self.assertEqual(titles(), [])
+
+
+class SearchFilterTest(TestCase):
+    """
+    子串查询结果与 __contains 一致，批量写入后索引同步
+    """
+
+    def assertSameResult(self, queryset, **values):
+        expected = queryset
+        for field, value in values.items():
+            expected = expected.filter(**{'%s__contains' % field: value})
+        self.assertEqual(
+            sorted(search_filter(queryset, **values).values_list('pk', flat=True)),
+            sorted(expected.values_list('pk', flat=True))
+        )
+
+    def test_search_filter(self):
+        dept = SysDept.objects.create(dept_name='总公司', leader='admin', phone='', email='')
+        SysUser.objects.bulk_create([
+            SysUser(username='user%03d' % i, nickname='user', dept=dept, phone_number='1380000%04d' % i) for i in range(100)
+        ])
+        users = SysUser.objects.all()
+        self.assertSameResult(users, username='r01')
+        self.assertSameResult(users, username='USER05', phone_number='0005')
+        self.assertSameResult(users, username='r0')
+        self.assertSameResult(users, username='"a"b')
+
+        SysUser.objects.filter(username__in=['user001', 'user002']).update(phone_number='renamed')
+        SysUser.objects.filter(username='user003').delete()
+        self.assertSameResult(users, username='user00')
+        self.assertSameResult(users, phone_number='renamed')
+
+    def test_operation_log(self):
+        # 操作日志表的索引触发器不受后续迁移影响
+        SysOperationLog.objects.bulk_create([
+            SysOperationLog(title=title, operator=operator, business_type='1', request_method='POST', request_param='{}',
+                            ip='127.0.0.1', location='未知', status='0')
+            for title, operator in [('用户管理', 'admin'), ('角色管理', 'ry'), ('用户管理', 'ry')]
+        ])
+        logs = SysOperationLog.objects.all()
+        self.assertSameResult(logs, title='用户管理')
+        self.assertSameResult(logs, operator='admin')
+
+    def test_missing_triggers(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('同步触发器仅用于SQLite')
+        dept = SysDept.objects.create(dept_name='总公司', leader='admin', phone='', email='')
+        SysUser.objects.create(username='before', nickname='user', dept=dept)
+        self.assertEqual(ensure_search_triggers(connection), [])
+
+        # 模拟修改字段时重建表：触发器丢失后新数据不再同步到索引
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER sys_user_search_ai')
+        SysUser.objects.create(username='missing', nickname='user', dept=dept)
+        self.assertFalse(search_filter(SysUser.objects.all(), username='missing').exists())
+
+        # 迁移完成后补建触发器并重建索引
+        sync_search_indexes(using=connection.alias)
+        SysUser.objects.create(username='after', nickname='user', dept=dept)
+        users = SysUser.objects.all()
+        for username in ('before', 'missing', 'after'):
+            self.assertSameResult(users, username=username)
+        self.assertEqual(ensure_search_triggers(connection), [])
+
+
+class CaptchaStoreTest(TestCase):
+    """
+    验证码按标识保存，只能校验一次
+    """
+
+    def test_check_captcha(self):
+        key = save_captcha('1234')
+        other = save_captcha('1234')
+        self.assertNotEqual(key, other)
+        self.assertFalse(check_captcha(key, '4321'))
+        # 校验失败后验证码同样失效
+        self.assertFalse(check_captcha(key, '1234'))
+        self.assertTrue(check_captcha(other, '1234'))
+        self.assertFalse(check_captcha(other, '1234'))
+
+
+@mock.patch('core.captcha.render_captcha', lambda length: ('1' * length, 'image'))
+class CaptchaPoolTest(SimpleTestCase):
+    """
+    验证码池低于水位线时由后台线程补充到容量上限
+    """
+
+    def wait_for_size(self, pool, size, timeout=5):
+        deadline = time.monotonic() + timeout
+        while pool.stats()['size'] != size:
+            if time.monotonic() > deadline:
+                self.fail('验证码池未补充到%d个' % size)
+            time.sleep(0.01)
+
+    def test_refill(self):
+        pool = CaptchaPool({'SIZE': 5, 'LOW_WATERMARK': 2})
+        self.assertEqual(pool.get(), ('1111', 'image'))
+        self.wait_for_size(pool, 5)
+        stats = pool.stats()
+        self.assertEqual(stats['hit'] + stats['miss'], 1)
+        rendered = stats['rendered']
+
+        # 未低于水位线时不补充
+        for _ in range(3):
+            pool.get()
+        self.assertEqual(pool.stats()['size'], 2)
+        self.assertEqual(pool.stats()['rendered'], rendered)
+
+        pool.get()
+        self.wait_for_size(pool, 5)
+        stats = pool.stats()
+        self.assertEqual(stats['rendered'], rendered + 4)
+        self.assertEqual(stats['hit'] + stats['miss'], 5)
+        self.assertEqual(stats['capacity'], 5)
+
+    def test_disabled(self):
+        pool = CaptchaPool({'ENABLED': False})
+        self.assertEqual(pool.get(), ('1111', 'image'))
+        # 不启用时同步生成，不预生成
+        self.assertEqual(pool.stats()['rendered'], 0)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertFalse(check_captcha(None, '1234'))
+
+
+class OnlineSessionTest(TestCase):
+    """
+    在线会话登记、访问时间批量写入和强退
+    """
+
+    def test_force_exit(self):
+        dept = SysDept.objects.create(dept_id=1, dept_name='总公司', leader='admin', phone='', email='')
+        admin_role = SysRole.objects.create(role_id=1, role_name='超级管理员', role_key='admin', data_scope='1')
+        admin = SysUser.objects.create(username='admin', nickname='admin', dept=dept)
+        SysUserRole.objects.create(user=admin, role=admin_role)
+        clear_caches()
+
+        token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(admin))
+        payload = api_settings.JWT_DECODE_HANDLER(token)
+        request = RequestFactory().post('/api/login/', HTTP_USER_AGENT='Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0')
+        # 写出其他用例记录的访问
+        online_registry.flush()
+        online_registry.login(payload, admin, request)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='JWT ' + token)
+
+        login_time = datetime.datetime.now() - datetime.timedelta(minutes=5)
+        SysUserOnline.objects.update(login_time=login_time, last_access_time=login_time)
+
+        data = client.get('/api/monitor/online/list/?page_num=1&page_size=10').json()
+        self.assertEqual([row['token_id'] for row in data['rows']], [payload['jti']])
+        self.assertEqual(data['rows'][0]['dept_name'], '总公司')
+        self.assertEqual(data['total'], 1)
+
+        # 访问时间批量写入，间隔内的多次访问只记录一次
+        client.get('/api/monitor/online/list/')
+        with self.assertNumQueries(3):
+            online_registry.flush()
+        self.assertGreater(SysUserOnline.objects.get().last_access_time, login_time)
+        client.get('/api/monitor/online/list/')
+        with self.assertNumQueries(2):
+            online_registry.flush()
+        self.assertTrue(get_shared_cache().has_key('online_touch:%s' % payload['jti']))
+
+        # 分页返回
+        session = SysUserOnline.objects.get()
+        session.token_id = 'other'
+        session.login_time = login_time - datetime.timedelta(minutes=1)
+        session.save()
+        data = client.get('/api/monitor/online/list/?page_num=2&page_size=1').json()
+        self.assertEqual([row['token_id'] for row in data['rows']], ['other'])
+        self.assertEqual(data['total'], 2)
+        SysUserOnline.objects.filter(token_id='other').delete()
+
+        self.assertEqual(client.delete('/api/monitor/online/%s/' % payload['jti']).json()['code'], 200)
+        self.assertEqual(client.get('/api/monitor/online/list/').json()['code'], 401)
+        self.assertFalse(SysUserOnline.objects.exists())
+
+
+class TokenRevocationTest(TestCase):
+    """
+    注销后令牌失效，其他进程吊销的令牌按共享序号同步到过滤器
+    """
+
+    def setUp(self):
+        self.admin = create_admin()
+        clear_caches()
+
+    def test_logout(self):
+        client = client_for(self.admin)
+        other = client_for(self.admin)
+        self.assertEqual(client.get('/api/system/user/option/').json()['code'], 200)
+        self.assertEqual(client.post('/api/logout/').json()['code'], 200)
+        self.assertEqual(client.get('/api/system/user/option/').json()['msg'], '令牌已失效')
+        # 同一用户的其他令牌不受影响
+        self.assertEqual(other.get('/api/system/user/option/').json()['code'], 200)
+
+    def make_payload(self):
+        token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(self.admin))
+        return token, api_settings.JWT_DECODE_HANDLER(token)
+
+    def test_sync_filter(self):
+        token, payload = self.make_payload()
+        self.assertFalse(is_revoked(payload))
+
+        # 其他进程吊销令牌后按序号增量加入过滤器，不重建，只查询确认一次
+        revoke_token(payload)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_revoked(payload))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='JWT ' + token)
+        self.assertEqual(client.get('/api/system/user/option/').json()['msg'], '令牌已失效')
+
+    def test_rebuild_filter(self):
+        _, payload = self.make_payload()
+        self.assertFalse(is_revoked(payload))
+
+        # 模拟序号已被缓存淘汰：只有数据库记录和版本号，从数据库重建过滤器
+        SysRevokedToken.objects.create(
+            jti=payload['jti'], user_id=self.admin.pk, expire_time=datetime.datetime.fromtimestamp(payload['exp'])
+        )
+        bump_version('revoked_tokens')
+        with self.assertNumQueries(2):
+            self.assertTrue(is_revoked(payload))
+
+    def test_purge(self):
+        _, payload = self.make_payload()
+        revoke_token(payload)
+        SysRevokedToken.objects.create(jti='expired', user_id=self.admin.pk, expire_time=datetime.datetime.now())
+        purge_revoked_tokens()
+        self.assertEqual(list(SysRevokedToken.objects.values_list('jti', flat=True)), [payload['jti']])
+
+
+class PermissionCacheTest(TestCase):
+    """
+    角色菜单变动后权限缓存失效，版本号保存在共享缓存中
+    """
+
+    def test_grant_and_revoke(self):
+        admin = create_admin()
+        menu = SysMenu.objects.create(menu_name='岗位管理', menu_type='C', perms='system:post:list')
+        role = SysRole.objects.create(role_name='普通角色', role_key='common', data_scope='5')
+        user = SysUser.objects.create(username='user', nickname='user', dept=admin.dept)
+        SysUserRole.objects.create(user=user, role=role)
+        clear_caches()
+        admin_client = client_for(admin)
+        user_client = client_for(user)
+        url = '/api/system/post/?page_num=1&page_size=10'
+
+        def update_role(menu_ids):
+            data = {'role_id': role.role_id, 'role_name': role.role_name, 'role_key': role.role_key, 'menu_ids': menu_ids}
+            self.assertEqual(admin_client.put('/api/system/role/', data, format='json').json()['code'], 200)
+
+        self.assertEqual(user_client.get(url).json()['msg'], '没有操作权限')
+        version = get_version('perms')
+        update_role([menu.menu_id])
+        # 版本号写入共享缓存，其他进程读取到新版本后重新编译
+        self.assertEqual(get_shared_cache().get('version:perms'), version + 1)
+        self.assertEqual(user_client.get(url).json()['code'], 200)
+        update_role([])
+        self.assertEqual(user_client.get(url).json()['msg'], '没有操作权限')
+
+    def test_local_cache_size(self):
+        local = LocalCache(2)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual(len(local), 2)
+        self.assertIsNone(local.get('b'))
+        self.assertEqual(local.get('a'), 1)
+
+
+class OperationLogWriterTest(TestCase):
+    """
+    创建时间取写入时间，写库失败后退避，退避结束后重放溢出文件
+    """
+
+    def make_record(self, **kwargs):
+        return dict({
+            'title': '用户管理 / 新增用户',
+            'business_type': '1',
+            'request_method': 'POST',
+            'request_param': {'params': {}, 'data': {}},
+            'ip': '127.0.0.1',
+            'location': '未知',
+            'operator': 'admin',
+            'status': '0',
+        }, **kwargs)
+
+    def test_create_time(self):
+        create_time = datetime.datetime(2026, 1, 1, 8, 0)
+        OperationLogWriter({'ASYNC': False}).write(self.make_record(create_time=create_time))
+        self.assertEqual(SysOperationLog.objects.get().create_time, create_time)
+
+    def test_backoff(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'operation_log.spill')
+            writer = OperationLogWriter({'ASYNC': False, 'SPILL_PATH': path})
+            # 没有溢出文件时直接返回
+            writer.flush()
+
+            with mock.patch.object(SysOperationLog.objects, 'bulk_create', side_effect=DatabaseError), \
+                    mock.patch('core.logwriter.close_old_connections'):
+                writer.write(self.make_record())
+                writer.write(self.make_record())
+                # 退避期间不重放
+                writer.flush()
+            self.assertEqual(writer.stats(), {'written': 0, 'dropped': 0, 'spilled': 2, 'failed': 1, 'depth': 0})
+
+            writer._retry_at = 0
+            writer.flush()
+            self.assertEqual(SysOperationLog.objects.count(), 2)
+            self.assertEqual(writer.stats()['written'], 2)
+            self.assertFalse(os.path.exists(path))
+
+
+class RoutersCacheTest(TestCase):
+    """
+    路由按角色集合缓存，角色集合相同的用户共用编译结果
+    """
+
+    def titles(self, content):
+        return [router['meta']['title'] for router in json.loads(content)['data']]
+
+    def test_routers_cache_key(self):
+        dept = create_admin().dept
+        system = SysMenu.objects.create(menu_name='系统管理', menu_type='M', path='system', component_name='System', order_num=1)
+        monitor = SysMenu.objects.create(menu_name='系统监控', menu_type='M', path='monitor', component_name='Monitor', order_num=2)
+        role = SysRole.objects.create(role_name='普通角色', role_key='common')
+        other_role = SysRole.objects.create(role_name='监控角色', role_key='monitor')
+        SysRoleMenu.objects.create(role=role, menu=system)
+        SysRoleMenu.objects.create(role=other_role, menu=monitor)
+        users = [SysUser.objects.create(username='user%d' % i, nickname='user', dept=dept) for i in range(3)]
+        SysUserRole.objects.create(user=users[0], role=role)
+        SysUserRole.objects.create(user=users[1], role=role)
+        SysUserRole.objects.create(user=users[2], role=other_role)
+        clear_caches()
+
+        content = get_routers(users[0])
+        self.assertEqual(self.titles(content), ['系统管理'])
+        self.assertEqual(cache.get('routers:%s:%s' % (get_version('menus'), role.role_id)), content)
+        with mock.patch('core.routers.compile_routers') as compile_routers:
+            self.assertEqual(get_routers(users[1]), content)
+        compile_routers.assert_not_called()
+        self.assertEqual(self.titles(get_routers(users[2])), ['系统监控'])
+
+        # 菜单变动后重新编译
+        SysRoleMenu.objects.create(role=role, menu=monitor)
+        invalidate_routers()
+        self.assertEqual(self.titles(get_routers(users[1])), ['系统管理', '系统监控'])
+
+
+class TreeIndexTest(SimpleTestCase):
+    """
+    树形索引的子树、祖先和标签树
+    """
+
+    def setUp(self):
+        items = [
+            {'id': 1, 'parent_id': 0, 'name': '总公司', 'order': 1},
+            {'id': 3, 'parent_id': 1, 'name': '技术部', 'order': 2},
+            {'id': 2, 'parent_id': 1, 'name': '市场部', 'order': 1},
+            {'id': 4, 'parent_id': 3, 'name': '研发组', 'order': 1},
+            {'id': 5, 'parent_id': 0, 'name': '分公司', 'order': 2},
+            # 父结点不存在的结点不出现在树中
+            {'id': 6, 'parent_id': 99, 'name': '孤立结点', 'order': 1},
+        ]
+        self.index = TreeIndex(items, order_key='order')
+
+    def test_subtree(self):
+        self.assertEqual(self.index.roots(), [1, 5])
+        self.assertEqual(self.index.subtree(1), [1, 2, 3, 4])
+        self.assertEqual(self.index.subtree(1, include_self=False), [2, 3, 4])
+        self.assertEqual(self.index.subtree(4), [4])
+        self.assertEqual(self.index.ancestors(4), [1, 3])
+        self.assertEqual(self.index.depth(4), 2)
+        self.assertEqual(self.index.depth(1), 0)
+
+    def test_label_tree(self):
+        self.assertEqual(self.index.label_tree('name'), [
+            {'id': 1, 'label': '总公司', 'children': [
+                {'id': 2, 'label': '市场部'},
+                {'id': 3, 'label': '技术部', 'children': [{'id': 4, 'label': '研发组'}]},
+            ]},
+            {'id': 5, 'label': '分公司'},
+        ])
+
+    def test_deep_tree(self):
+        # 迭代实现，层级很深时不会超出递归深度
+        index = TreeIndex([{'id': i, 'parent_id': i - 1} for i in range(1, 5001)])
+        self.assertEqual(len(index.subtree(1)), 5000)
+        self.assertEqual(index.depth(5000), 4999)
+
+    def test_cycle(self):
+        # 上级数据损坏形成环时不会死循环
+        index = TreeIndex([{'id': 1, 'parent_id': 2}, {'id': 2, 'parent_id': 1}, {'id': 3, 'parent_id': 2}])
+        self.assertEqual(index.subtree(1), [1, 2, 3])
+        self.assertEqual(index.subtree(2, include_self=False), [1, 3])
+        self.assertEqual(index.ancestors(3), [1, 2])
+        self.assertEqual(index.roots(), [])
+
+
+class DataScopeTest(TestCase):
+    """
+    按角色数据范围过滤用户
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        root = cls.admin.dept
+        cls.tech = SysDept.objects.create(parent_id=root.dept_id, ancestors='0,%s' % root.dept_id, dept_name='技术部', leader='', phone='', email='')
+        cls.dev = SysDept.objects.create(parent_id=cls.tech.dept_id, ancestors=cls.tech.path, dept_name='研发组', leader='', phone='', email='')
+        cls.sales = SysDept.objects.create(parent_id=root.dept_id, ancestors='0,%s' % root.dept_id, dept_name='市场部', leader='', phone='', email='')
+        cls.users = {
+            name: SysUser.objects.create(username=name, nickname=name, dept=dept)
+            for name, dept in [('tech', cls.tech), ('dev', cls.dev), ('sales', cls.sales)]
+        }
+
+    def setUp(self):
+        clear_caches()
+
+    def assertVisible(self, data_scope, expected, user='tech', custom_depts=()):
+        role = SysRole.objects.create(role_name='角色%s' % data_scope, role_key='scope%s' % data_scope, data_scope=data_scope)
+        role.depts.set(custom_depts)
+        SysUserRole.objects.filter(user=self.users[user]).delete()
+        SysUserRole.objects.create(user=self.users[user], role=role)
+        invalidate_perms([self.users[user].pk])
+        visible = filter_data_scope(SysUser.objects.all(), self.users[user]).values_list('username', flat=True)
+        self.assertEqual(sorted(visible), sorted(expected))
+
+    def test_data_scope(self):
+        self.assertVisible('1', ['admin', 'tech', 'dev', 'sales'])
+        self.assertVisible('2', ['sales'], custom_depts=[self.sales])
+        self.assertVisible('3', ['tech'])
+        self.assertVisible('4', ['tech', 'dev'])
+        self.assertVisible('5', ['dev'], user='dev')
+
+    def test_disabled_role(self):
+        self.assertVisible('1', ['admin', 'tech', 'dev', 'sales'])
+        SysRole.objects.filter(role_key='scope1').update(status='1')
+        # 角色停用后使权限缓存失效
+        invalidate_perms()
+        self.assertFalse(filter_data_scope(SysUser.objects.all(), self.users['tech']).exists())
+
+    def test_moved_dept(self):
+        self.assertVisible('4', ['tech', 'dev'])
+        self.dev.parent_id = self.sales.dept_id
+        self.dev.ancestors = self.sales.path
+        self.dev.save()
+        invalidate_data_scope()
+        self.assertEqual(list(filter_data_scope(SysUser.objects.all(), self.users['tech']).values_list('username', flat=True)), ['tech'])
+
+    def test_user_list(self):
+        role = SysRole.objects.create(role_name='普通角色', role_key='common', data_scope='4')
+        menu = SysMenu.objects.create(menu_name='用户管理', menu_type='C', perms='system:user:list')
+        SysRoleMenu.objects.create(role=role, menu=menu)
+        SysUserRole.objects.create(user=self.users['tech'], role=role)
+        rows = client_for(self.users['tech']).get('/api/system/user/?page_num=1&page_size=10').json()['rows']
+        self.assertEqual(sorted(row['username'] for row in rows), ['dev', 'tech'])
+
+
+class CursorPaginationTest(TestCase):
+    """
+    游标分页按字段类型还原游标值，每页数量有上限
+    """
+
+    def test_page_size(self):
+        self.assertEqual(clamp_page_size('20'), 20)
+        self.assertEqual(clamp_page_size(None), 10)
+        self.assertEqual(clamp_page_size('abc'), 10)
+        self.assertEqual(clamp_page_size('0'), 1)
+        self.assertEqual(clamp_page_size(10 ** 6), MAX_PAGE_SIZE)
+
+    def test_datetime_cursor(self):
+        dept = SysDept.objects.create(dept_name='总公司', leader='admin', phone='', email='')
+        start = datetime.datetime(2026, 1, 1)
+        SysUser.objects.bulk_create([
+            SysUser(username='user%02d' % i, nickname='user', dept=dept, date_joined=start + datetime.timedelta(hours=i % 7))
+            for i in range(25)
+        ])
+        # date_joined 不以 _time 结尾，同样按日期时间还原
+        queryset = SysUser.objects.order_by('-date_joined')
+        expected = list(queryset.order_by('-date_joined', '-user_id').values_list('username', flat=True))
+
+        usernames, cursor = [], ''
+        while cursor is not None:
+            rows, page_info = cursor_paginate(queryset.values('username'), cursor, 10)
+            usernames.extend(row['username'] for row in rows)
+            cursor = page_info['next']
+        self.assertEqual(usernames, expected)
+
+        # 向前翻页回到上一页
+        rows, page_info = cursor_paginate(queryset.values('username'), '', 10)
+        rows, page_info = cursor_paginate(queryset.values('username'), page_info['next'], 10)
+        rows, page_info = cursor_paginate(queryset.values('username'), page_info['prev'], 10)
+        self.assertEqual([row['username'] for row in rows], expected[:10])
+
+
+@mock.patch('core.pagination.EXACT_COUNT_LIMIT', 5)
+class CountQuerysetTest(TestCase):
+    """
+    小结果集精确计数，大结果集使用估算值或缓存的计数
+    """
+
+    def setUp(self):
+        clear_caches()
+        SysPost.objects.bulk_create([SysPost(post_code='post%d' % i, post_name='岗位%d' % i, post_sort=i % 2) for i in range(10)])
+
+    def test_exact_count(self):
+        # 恰好等于阈值时仍精确计数
+        self.assertEqual(count_queryset(SysPost.objects.filter(post_sort=0)), (5, True))
+
+    def test_cached_count(self):
+        posts = SysPost.objects.filter(post_code__startswith='post')
+        self.assertEqual(count_queryset(posts), (10, True))
+        # 缓存命中时只执行有上限的计数
+        with self.assertNumQueries(1):
+            self.assertEqual(count_queryset(posts), (10, False))
+
+    def test_estimated_count(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('仅测试SQLite的统计信息')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        with self.assertNumQueries(3):
+            self.assertEqual(count_queryset(SysPost.objects.all()), (10, False))
+
+
+class StreamExportTest(TestCase):
+    """
+    导出文件的行数和内容，xlsx首块不等待数据查询
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        SysPost.objects.bulk_create([SysPost(post_code='post%03d' % i, post_name='岗位<%d>' % i, post_sort=i) for i in range(120)])
+
+    def setUp(self):
+        clear_caches()
+        self.client = client_for(self.admin)
+
+    def export(self, file_type):
+        response = self.client.post('/api/system/post/export/', {'file_type': file_type})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_export_xlsx(self):
+        rows = list(load_workbook(io.BytesIO(self.export('xlsx'))).active.values)
+        self.assertEqual(len(rows), 121)
+        self.assertEqual(rows[0], ('岗位编号', '岗位编码', '岗位名称', '岗位排序', '状态', '创建时间'))
+        post = SysPost.objects.get(post_code='post007')
+        self.assertEqual(rows[8][:5], (post.post_id, 'post007', '岗位<7>', 7, '0'))
+        self.assertEqual(rows[8][5].replace(microsecond=0), post.create_time.replace(microsecond=0))
+
+    def test_export_csv(self):
+        lines = self.export('csv').decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 121)
+        self.assertTrue(lines[8].startswith('%s,post007,岗位<7>,7,0,' % SysPost.objects.get(post_code='post007').post_id))
+
+    def test_first_block(self):
+        consumed = []
+
+        def rows():
+            for i in range(10):
+                consumed.append(i)
+                yield (i, 'row%d' % i)
+
+        content = iter_xlsx(['id', 'name'], rows())
+        first = next(content)
+        self.assertTrue(first.startswith(b'PK'))
+        self.assertEqual(consumed, [])
+        workbook = load_workbook(io.BytesIO(first + b''.join(content)))
+        self.assertEqual(list(workbook.active.values)[1:], [(i, 'row%d' % i) for i in range(10)])
+
+    def test_non_finite(self):
+        rows = [(1.5, float('inf'), float('nan'), decimal.Decimal('-Infinity'), decimal.Decimal('2.50'))]
+        workbook = load_workbook(io.BytesIO(b''.join(iter_xlsx(None, rows))))
+        self.assertEqual(list(workbook.active.values), [(1.5, 'inf', 'nan', '-Infinity', 2.5)])
+
+
+class ExportJobRunnerTest(TestCase):
+    """
+    执行中任务数按数据库统计，心跳超时的任务标记为失败
+    """
+
+    def setUp(self):
+        self.admin = create_admin()
+        self.root = tempfile.TemporaryDirectory()
+        self.runner = ExportJobRunner({'ROOT': self.root.name, 'MAX_WORKERS': 1, 'PER_USER_LIMIT': 1})
+        # 测试中同步执行任务
+        patchers = [
+            mock.patch.object(self.runner, 'executor', **{'submit.side_effect': lambda fn, *args: fn(*args)}),
+            mock.patch.object(self.runner, 'start'),
+            mock.patch('core.jobs.close_old_connections'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.root.cleanup)
+
+    def create_job(self, status='0', **kwargs):
+        return SysExportJob.objects.create(job_id=os.urandom(16).hex(), user_id=self.admin.pk, export_type='user', status=status, **kwargs)
+
+    def test_run_job(self):
+        job = self.runner.submit('user', {}, self.admin)
+        self.runner.dispatch()
+        job.refresh_from_db()
+        self.assertEqual(job.status, '2')
+        self.assertEqual(job.file_name, '用户表.xlsx')
+        rows = list(load_workbook(job.file_path).active.values)
+        self.assertEqual([row[1] for row in rows], ['用户名称', 'admin'])
+        self.assertEqual(self.runner._running, set())
+
+    def test_global_limit(self):
+        # 其他进程执行中的任务同样占用名额
+        self.create_job(status='1', update_time=datetime.datetime.now())
+        job = self.create_job()
+        self.runner.dispatch()
+        job.refresh_from_db()
+        self.assertEqual(job.status, '0')
+
+    def test_missing_job(self):
+        self.runner._running.add('missing')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.runner.run_job('missing')
+        self.assertEqual(self.runner._running, set())
+
+    def test_reset_stale(self):
+        job = self.create_job(status='1')
+        SysExportJob.objects.filter(pk=job.pk).update(update_time=datetime.datetime.now() - datetime.timedelta(minutes=5))
+        with self.assertRaises(ExportJobError):
+            self.runner.submit('user', {}, self.admin)
+        self.assertEqual(self.runner.reset_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, '3')
+        self.runner.submit('user', {}, self.admin)
+
+
+class UserImportTest(TestCase):
+    """
+    用户导入的新增、按用户名更新和逐行错误报告
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        cls.tech = SysDept.objects.create(dept_name='技术部', leader='', phone='', email='')
+        cls.sales = SysDept.objects.create(dept_name='市场部', leader='', phone='', email='')
+        cls.user = SysUser.objects.create(username='tech', nickname='tech', dept=cls.tech)
+        role = SysRole.objects.create(role_name='本部门', role_key='dept', data_scope='3')
+        menu = SysMenu.objects.create(menu_name='岗位管理', menu_type='C', perms='system:post:list')
+        SysRoleMenu.objects.create(role=role, menu=menu)
+        SysUserRole.objects.create(user=cls.user, role=role)
+
+    def setUp(self):
+        clear_caches()
+        self.client = client_for(self.admin)
+
+    def import_users(self, lines, update_support):
+        content = '\n'.join(['用户ID,用户名称,用户昵称,手机号,用户邮箱,状态,部门名称'] + lines).encode('utf-8-sig')
+        url = '/api/system/user/import/' + ('?update_support=true' if update_support else '')
+        return self.client.post(url, {'file': SimpleUploadedFile('users.csv', content)}).json()
+
+    def test_import_xlsx(self):
+        workbook = Workbook()
+        workbook.active.append(['用户ID', '用户名称', '用户昵称', '手机号', '用户邮箱', '状态', '部门名称'])
+        workbook.active.append([None, 'excel', 'Excel用户', 13800000000, None, '正常', '技术部'])
+        content = io.BytesIO()
+        workbook.save(content)
+        file = SimpleUploadedFile('users.xlsx', content.getvalue())
+        # 只读工作簿读取结束后关闭，不泄漏文件句柄
+        with mock.patch('openpyxl.workbook.workbook.Workbook.close', autospec=True) as close:
+            data = self.client.post('/api/system/user/import/', {'file': file}).json()['data']
+        close.assert_called_once()
+        self.assertEqual((data['success'], data['failed']), (1, 0))
+        self.assertEqual(SysUser.objects.get(username='excel').phone_number, '13800000000')
+
+    def test_import(self):
+        data = self.import_users([
+            ',new,新用户,13800000000,,正常,技术部',
+            ',tech,技术,,,,市场部',
+            ',,缺少用户名,,,,',
+            ',bad,部门不存在,,,,研发部',
+            ',new,重复,,,,',
+        ], update_support=False)['data']
+        self.assertEqual((data['success'], data['failed']), (1, 4))
+        self.assertEqual([(error['row'], error['msg']) for error in data['errors']], [
+            (4, '用户名称不能为空'), (5, '部门研发部不存在'), (6, '用户名称new重复'), (3, '用户名称tech已存在')
+        ])
+        user = SysUser.objects.get(username='new')
+        self.assertEqual((user.nickname, user.dept_id, user.status), ('新用户', self.tech.dept_id, '0'))
+        self.assertTrue(user.check_password('123456'))
+
+    def test_update(self):
+        user_client = client_for(self.user)
+        self.assertEqual(user_client.get('/api/system/post/?page_num=1&page_size=10').json()['code'], 200)
+        self.assertEqual(get_data_scope(self.user).dept_ids, {self.tech.dept_id})
+
+        data = self.import_users([',tech,技术,,,停用,市场部', ',new,新用户,,,,'], update_support=True)['data']
+        self.assertEqual((data['success'], data['failed']), (2, 0))
+        user = SysUser.objects.get(username='tech')
+        self.assertEqual((user.nickname, user.dept_id, user.status), ('技术', self.sales.dept_id, '1'))
+        self.assertTrue(SysUser.objects.filter(username='new').exists())
+
+        # 调整部门和状态后缓存失效
+        self.assertEqual(get_data_scope(user).dept_ids, {self.sales.dept_id})
+        self.assertEqual(user_client.get('/api/system/post/?page_num=1&page_size=10').json()['msg'], '账户已停用')
+
+        # 状态和部门留空时保留原值，新增用户使用默认状态
+        data = self.import_users([',tech,技术2,,,,', ',new2,新用户,,,,'], update_support=True)['data']
+        self.assertEqual((data['success'], data['failed']), (2, 0))
+        user = SysUser.objects.get(username='tech')
+        self.assertEqual((user.nickname, user.dept_id, user.status), ('技术2', self.sales.dept_id, '1'))
+        self.assertEqual(SysUser.objects.get(username='new2').status, '0')
+
+
+class FastSerializerTest(TestCase):
+    """
+    快速序列化的输出与DRF序列化器一致，包括键的顺序
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_data(30)
+        SysUser.objects.filter(username='seed_0').update(email='seed@example.com', remark=None)
+        # 没有角色和岗位的用户
+        SysUser.objects.create(username='alone', nickname='alone', dept=SysDept.objects.first())
+
+    def assertSameOutput(self, serializer_class, fast_serializer, queryset):
+        expected = json.loads(json.dumps(serializer_class(queryset, many=True).data, cls=DjangoJSONEncoder))
+        actual = json.loads(json.dumps(fast_serializer.serialize(fast_serializer.values(queryset)), cls=DjangoJSONEncoder))
+        self.assertEqual([list(row) for row in actual], [list(row) for row in expected])
+        self.assertEqual(actual, expected)
+
+    def test_same_output(self):
+        cases = [
+            (serializers.SysUserSerializer, serializers.fast_user_serializer, SysUser),
+            (serializers.SysUserProfileSerializer, serializers.fast_user_profile_serializer, SysUser),
+            (serializers.SysDictDataSerializer, serializers.fast_dict_data_serializer, None),
+            (serializers.SysConfigSerializer, serializers.fast_config_serializer, None),
+            (serializers.SysOperationLogSerializer, serializers.fast_operation_log_serializer, None),
+            (serializers.SysLoginLogSerializer, serializers.fast_login_log_serializer, None),
+        ]
+        for serializer_class, fast_serializer, model in cases:
+            with self.subTest(serializer_class.__name__):
+                model = model or serializer_class.Meta.model
+                self.assertSameOutput(serializer_class, fast_serializer, model.objects.order_by('pk'))
+
+
+class DictRefreshTest(TestCase):
+    """
+    字典数据读取缓存，刷新接口重新加载全部字典
+    """
+
+    def test_refresh_cache(self):
+        admin = create_admin()
+        dict_type = SysDictType.objects.create(dict_name='用户性别', dict_type='sys_user_sex')
+        SysDictData.objects.create(dict_label='男', dict_value='0', dict_type=dict_type, dict_sort=1, list_class='default')
+        clear_caches()
+        client = client_for(admin)
+        url = '/api/system/dict/data/type/sys_user_sex/'
+
+        def labels(data):
+            return [row['dict_label'] for row in data]
+
+        self.assertEqual(labels(client.get(url).json()['data']), ['男'])
+        # 直接修改数据库不会使缓存失效
+        SysDictData.objects.create(dict_label='女', dict_value='1', dict_type=dict_type, dict_sort=2, list_class='default')
+        self.assertEqual(labels(client.get(url).json()['data']), ['男'])
+
+        self.assertEqual(client.delete('/api/system/dict/type/refresh_cache/').json()['code'], 200)
+        # 刷新时已预加载，读取不查询数据库
+        with self.assertNumQueries(0):
+            data = client.get(url).json()
+        self.assertEqual(labels(data['data']), ['男', '女'])
+        data = client.get('/api/system/dict/data/types/?dict_types=sys_user_sex,missing').json()['data']
+        self.assertEqual(list(data), ['sys_user_sex'])
+        self.assertEqual(client.get('/api/system/dict/data/type/missing/').json()['msg'], '字典类型不存在')
+
+
+class ConfigCacheTest(TestCase):
+    """
+    参数修改后递增共享版本号，各进程据此重新加载
+    """
+
+    def test_invalidate(self):
+        admin = create_admin()
+        config = SysConfig.objects.create(config_name='账号自助-验证码开关', config_key='sys.account.captchaEnabled', config_value='true')
+        clear_caches()
+        client = client_for(admin)
+        url = '/api/system/config/configKey/sys.account.captchaEnabled/'
+
+        self.assertEqual(client.get(url).json()['msg'], 'true')
+        version = get_version('configs')
+        data = {
+            'config_id': config.config_id,
+            'config_name': config.config_name,
+            'config_key': config.config_key,
+            'config_value': 'false',
+        }
+        self.assertEqual(client.put('/api/system/config/', data, format='json').json()['code'], 200)
+        self.assertEqual(get_shared_cache().get('version:configs'), version + 1)
+        self.assertEqual(client.get(url).json()['msg'], 'false')
+
+        # 模拟其他进程修改参数：只递增共享缓存中的版本号，本进程的缓存随之失效
+        SysConfig.objects.filter(pk=config.pk).update(config_value='true')
+        self.assertEqual(get_config('sys.account.captchaEnabled'), 'false')
+        bump_version('configs')
+        self.assertEqual(get_config('sys.account.captchaEnabled'), 'true')
+
+        SysConfig.objects.filter(pk=config.pk).update(config_value='false')
+        self.assertEqual(client.delete('/api/system/config/refresh_cache/').json()['code'], 200)
+        with self.assertNumQueries(0):
+            self.assertFalse(get_bool('sys.account.captchaEnabled', True))
+
+    @mock.patch('core.configs.close_old_connections')
+    def test_preload(self, close_old_connections):
+        SysConfig.objects.create(config_name='用户管理-账号初始密码', config_key='sys.user.initPassword', config_value='123456')
+        clear_caches()
+        preload_configs()
+        close_old_connections.assert_called_once()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_config('sys.user.initPassword'), '123456')
+
+        # 数据库未迁移时跳过，不影响启动
+        bump_version('configs')
+        with mock.patch('core.configs.load_configs', side_effect=DatabaseError('no such table: sys_config')):
+            preload_configs()
+        self.assertEqual(get_config('sys.user.initPassword'), '123456')
+
+
+class ExplainQueriesTest(TestCase):
+    """
+    列表页查询的执行计划不包含全表扫描
+    """
+
+    def test_plan_patterns(self):
+        self.assertTrue(is_full_scan('SCAN core_sys_user', 'sqlite'))
+        self.assertFalse(is_full_scan('SCAN core_sys_user USING INDEX core_sys_user_create_time', 'sqlite'))
+        self.assertFalse(is_full_scan('SCAN core_sys_user_fts VIRTUAL TABLE INDEX 0:M2', 'sqlite'))
+        self.assertFalse(is_full_scan('SEARCH core_sys_user USING INDEX core_sys_user_status (status=?)', 'sqlite'))
+        self.assertTrue(is_sorted('SEARCH core_sys_user USING INDEX x (status=?)\nUSE TEMP B-TREE FOR ORDER BY', 'sqlite'))
+        self.assertTrue(is_full_scan('Seq Scan on core_sys_user', 'postgresql'))
+        self.assertTrue(is_sorted('Sort Key: create_time', 'postgresql'))
+        self.assertTrue(is_full_scan('id: 1 type: ALL', 'mysql'))
+        self.assertTrue(is_sorted('Extra: Using filesort', 'mysql'))
+        self.assertFalse(is_full_scan('Seq Scan on core_sys_user', 'oracle'))
+
+    def test_list_queries(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('执行计划特征仅针对sqlite校验')
+        seed_data(200)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        full_scans = [name for name, queryset in get_list_queries() if is_full_scan(queryset.explain())]
+        self.assertEqual(full_scans, [])
+
+
+class LogRetentionTest(TestCase):
+    """
+    过期日志按日期归档后分批删除，未过期日志保留
+    """
+
+    def test_archive_and_delete(self):
+        now = datetime.datetime.now()
+        times = [now - datetime.timedelta(days=days, hours=1) for days in (40, 40, 41, 45, 1, 0)]
+        SysOperationLog.objects.bulk_create([
+            SysOperationLog(title='日志%d' % i, operator='admin', business_type='1', request_method='POST',
+                            request_param='{}', ip='127.0.0.1', location='未知', status='0', create_time=create_time)
+            for i, create_time in enumerate(times)
+        ])
+        for i, days in enumerate((40, 1)):
+            log = SysLoginLog.objects.create(username='admin%d' % i, ip_addr='127.0.0.1', login_location='未知',
+                                             browser='Chrome', os='Linux', status='0')
+            SysLoginLog.objects.filter(pk=log.pk).update(login_time=now - datetime.timedelta(days=days))
+
+        with tempfile.TemporaryDirectory() as root:
+            retention = LogRetention({
+                'ROOT': root,
+                'POLICIES': {
+                    'operlog': {'DAYS': 30, 'ARCHIVE': True},
+                    'logininfor': {'DAYS': 30},
+                },
+            })
+            self.assertEqual(retention.run_once(batch_size=2), {'operlog': 4, 'logininfor': 1})
+            self.assertEqual(sorted(SysOperationLog.objects.values_list('title', flat=True)), ['日志4', '日志5'])
+            self.assertEqual(list(SysLoginLog.objects.values_list('username', flat=True)), ['admin1'])
+
+            # 每个日期一个归档文件
+            for create_time in times[:4]:
+                self.assertTrue(os.path.exists(retention.get_archive_path('operlog', create_time.date())))
+            self.assertFalse(os.path.exists(os.path.join(root, 'logininfor')))
+            rows = list(retention.query_archive('operlog', times[3].date(), times[0].date()))
+            self.assertEqual(sorted(row['title'] for row in rows), ['日志0', '日志1', '日志2', '日志3'])
+            rows = list(retention.query_archive('operlog', times[1].date(), times[1].date(), title='日志1'))
+            self.assertEqual([row['title'] for row in rows], ['日志1'])
+            self.assertEqual(rows[0]['create_time'], times[1].isoformat(timespec='milliseconds'))
+            # 再次执行没有可清理的日志
+            self.assertEqual(retention.run_once(), {'operlog': 0, 'logininfor': 0})
+
+    def create_logs(self, count, days=40):
+        create_time = datetime.datetime.now() - datetime.timedelta(days=days)
+        SysOperationLog.objects.bulk_create([
+            SysOperationLog(title='日志%d' % i, operator='admin', business_type='1', request_method='POST',
+                            request_param='{}', ip='127.0.0.1', location='未知', status='0', create_time=create_time)
+            for i in range(count)
+        ])
+        return create_time.date()
+
+    def archived_titles(self, retention, date):
+        return sorted(row['title'] for row in retention.query_archive('operlog', date, date))
+
+    def test_delete_failed(self):
+        date = self.create_logs(3)
+        with tempfile.TemporaryDirectory() as root:
+            retention = LogRetention({'ROOT': root})
+            # 删除失败时不写入归档，重试后不重复
+            with mock.patch.object(LogRetention, '_delete', side_effect=DatabaseError('database is locked')):
+                with self.assertRaises(DatabaseError):
+                    retention.purge('operlog', 30, archive=True)
+            self.assertEqual(self.archived_titles(retention, date), [])
+            self.assertFalse(os.path.exists(retention.get_pending_path('operlog')))
+            self.assertEqual(retention.purge('operlog', 30, archive=True), 3)
+            self.assertEqual(self.archived_titles(retention, date), ['日志0', '日志1', '日志2'])
+
+    def test_recover_pending(self):
+        date = self.create_logs(2)
+        with tempfile.TemporaryDirectory() as root:
+            retention = LogRetention({'ROOT': root})
+            rows = SysOperationLog.objects.order_by('id').values()
+            # 删除未提交：丢弃待提交文件，本次重新归档
+            retention._write_pending('operlog', rows)
+            self.assertEqual(retention.purge('operlog', 30, archive=True), 2)
+            self.assertEqual(self.archived_titles(retention, date), ['日志0', '日志1'])
+
+            # 删除已提交但未追加到归档：下次执行时追加
+            self.create_logs(1, days=50)
+            rows = list(SysOperationLog.objects.values())
+            SysOperationLog.objects.all().delete()
+            retention._write_pending('operlog', rows)
+            self.assertEqual(retention.purge('operlog', 30, archive=True), 0)
+            self.assertEqual(self.archived_titles(retention, rows[0]['create_time'].date()), ['日志0'])
+            self.assertFalse(os.path.exists(retention.get_pending_path('operlog')))
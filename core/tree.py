@@ -0,0 +1,80 @@
+class TreeIndex:
+    """
+    树形结构索引
+    一次遍历建立父结点到子结点的映射，支持子树、祖先路径和深度查询，全部为迭代实现
+    """
+
+    def __init__(self, items, id_key='id', parent_key='parent_id', order_key=None, root_id=0):
+        self.id_key = id_key
+        self.parent_key = parent_key
+        self.root_id = root_id
+        self.nodes = {}
+        self.children = {}
+        for item in items:
+            node_id = item[id_key]
+            self.nodes[node_id] = item
+            self.children.setdefault(item[parent_key], []).append(node_id)
+
+        if order_key:
+            for child_ids in self.children.values():
+                child_ids.sort(key=lambda node_id: self.nodes[node_id][order_key])
+
+    def roots(self):
+        """
+        顶级结点ID
+        """
+        return self.children.get(self.root_id, [])
+
+    def parent(self, node_id):
+        return self.nodes[node_id][self.parent_key]
+
+    def subtree(self, node_id, include_self=True):
+        """
+        子树中全部结点ID（先序）
+        """
+        result = []
+        visited = set()
+        stack = [node_id]
+        while stack:
+            current = stack.pop()
+            # 数据中存在环时跳过已访问的结点
+            if current in visited:
+                continue
+            visited.add(current)
+            if current != node_id or include_self:
+                result.append(current)
+            stack.extend(reversed(self.children.get(current, [])))
+        return result
+
+    def ancestors(self, node_id):
+        """
+        祖先结点ID，从顶级结点到父结点
+        """
+        result = []
+        visited = {node_id}
+        current = self.nodes[node_id][self.parent_key]
+        while current in self.nodes and current not in visited:
+            result.append(current)
+            visited.add(current)
+            current = self.nodes[current][self.parent_key]
+        result.reverse()
+        return result
+
+    def depth(self, node_id):
+        """
+        结点深度，顶级结点为0
+        """
+        return len(self.ancestors(node_id))
+
+    def label_tree(self, label_key='label'):
+        """
+        生成前端树形选择组件使用的 {id, label, children} 结构
+        """
+        labels = {
+            node_id: {"id": node_id, "label": item[label_key]}
+            for node_id, item in self.nodes.items()
+        }
+        for parent_id, child_ids in self.children.items():
+            if parent_id in labels:
+                labels[parent_id]["children"] = [labels[child_id] for child_id in child_ids]
+        return [labels[node_id] for node_id in self.roots()]
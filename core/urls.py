@@ -3,10 +3,12 @@ from django.urls import path, re_path
 from core.views.config import ConfigView
 from core.views.dict_data import DictTypeView, DictDataView
 from core.views.dept import DeptView
+from core.views.export_job import ExportJobView
 from core.views.login import CaptchaView, LoginView, UserInfoView, RoutersView, LogoutView
 from core.views.logininfor import LoginLogView
 from core.views.menu import MenuView
 from core.views.notice import NoticeView
+from core.views.online import OnlineView
 from core.views.operlog import OperationLogView
 from core.views.post import PostView
 from core.views.profile import UserProfileView, UserProfilePasswordView
@@ -70,10 +72,13 @@ urlpatterns = [
     path('system/dict/type/', DictTypeView.as_view({'get': 'list', 'post': 'create', 'put': 'update'})), # 字典类型列表 新增字典类型 修改字典类型
     re_path('system/dict/type/(?P<pk>\d[,\d]*)/', DictTypeView.as_view({'get': 'retrieve', 'delete': 'destroy'})),  # 字典类型详情 删除字典类型
     path('system/dict/type/export/', DictTypeView.as_view({'post': 'export_xlsx'})),  # 导出字典类型数据
+    path('system/dict/type/refresh_cache/', DictTypeView.as_view({'delete': 'refresh_cache'})),  # 刷新字典缓存
+    path('system/dict/type/option_select/', DictTypeView.as_view({'get': 'option_select'})),  # 字典类型选项
     path('system/dict/data/', DictDataView.as_view({'get': 'list', 'post': 'create', 'put': 'update'})), # 字典数据列表 新增字典数据 修改字典数据
     re_path('system/dict/data/(?P<pk>\d[,\d]*)/', DictDataView.as_view({'get': 'retrieve', 'delete': 'destroy'})), # 字典数据详情 删除字典数据
     path('system/dict/data/export/', DictDataView.as_view({'post': 'export_xlsx'})),  # 导出字典类型数据
     re_path('system/dict/data/type/(?P<value>\w+)/', DictDataView.as_view({'get':'dict_data'})), # 字典数据
+    path('system/dict/data/types/', DictDataView.as_view({'get': 'dict_data_batch'})),  # 批量获取字典数据
 
     # 参数设置
     path('system/config/', ConfigView.as_view({'get': 'list', 'post': 'create', 'put': 'update'})), # 参数设置列表 新增参数设置 修改参数设置
@@ -96,7 +101,15 @@ urlpatterns = [
     re_path('monitor/logininfor/(?P<pk>\d[,\d]*)/', LoginLogView.as_view({'delete': 'destroy'})),  # 删除登录日志
     path('monitor/logininfor/export/', LoginLogView.as_view({'post': 'export_xlsx'})),  # 导出登录日志数据
 
+    # 导出任务
+    re_path('common/export_job/(?P<pk>\w+)/download/', ExportJobView.as_view({'get': 'download'})),  # 下载导出文件
+    re_path('common/export_job/(?P<pk>\w+)/', ExportJobView.as_view({'get': 'retrieve'})),  # 导出任务状态
+
     # 服务监控
     path('monitor/server/', ServerView.as_view({'get': 'list'})),
+
+    # 在线用户
+    path('monitor/online/list/', OnlineView.as_view({'get': 'list'})),  # 在线用户列表
+    re_path('monitor/online/(?P<pk>\w+)/', OnlineView.as_view({'delete': 'force_exit'})),  # 强退用户
 ]
 
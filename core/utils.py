@@ -1,23 +1,18 @@
 import json
 from functools import wraps
 
-from django.http import HttpResponse, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, HttpResponse
 from rest_framework.views import exception_handler
 
-from core.models import SysUserRole, SysRoleMenu
-from openpyxl import Workbook
-from urllib.parse import quote
+from core.permission import get_user_perms
+from core.tree import TreeIndex
 
 def is_admin(user):
-    return SysUserRole.objects.filter(user_id=user.user_id, role_id=1).exists()
+    return '*:*:*' in get_user_perms(user)
 
 def get_perms(user):
-    if is_admin(user):
-        permissions = ['*:*:*']
-    else:
-        role_menus = SysRoleMenu.objects.filter(role_id__in=[obj.role_id for obj in user.roles.all()])
-        permissions = [role_menu.menu.perms for role_menu in role_menus]
-    return permissions
+    return sorted(get_user_perms(user))
 
 def has_permi(perms):
     def decorator(f):
@@ -56,15 +51,13 @@ def gen_routers(menu_list_top, menu_list):
     def is_hidden(menu):
         return True if (menu.get("visible") == "1") else False
 
+    # 父菜单ID -> 子菜单列表
+    children = {}
+    for item in menu_list:
+        children.setdefault(item.get("parent_id"), []).append(item)
+
     def get_children(menu):
-        current_menu_id = menu.get("menu_id")
-        c_menu = []
-        for item in menu_list:
-            if item.get("parent_id") == current_menu_id:
-                c_menu.append(item)
-            else:
-                pass
-        return c_menu
+        return children.get(menu.get("menu_id"), [])
 
     def build_menus_func(menu_li):
         routers = []
@@ -174,45 +167,7 @@ def get_label_tree(menu_list):
     """
     获取到菜单的树形结构
     """
-
-    def get_children(menu):
-        current_id = menu.get("id")
-        c_menu = [item for item in menu_list if item.get("parent_id") == current_id]
-        if c_menu:
-            return c_menu
-        else:
-            pass
-
-    def build_menu_func(menu_li):
-        routers = []
-        for menu in menu_li:
-            router = {
-                "id": menu.get("id"),
-                "label": menu.get("label")
-            }
-            c_menus = get_children(menu)
-
-            if c_menus:
-                router["children"] = build_menu_func(c_menus)
-            else:
-                pass
-            routers.append(router)
-        return routers
-
-    menu_list_top = [item for item in menu_list if item.get("parent_id") == 0]
-    return build_menu_func(menu_list_top)
-
-def export_table(filename,rows):
-    response = HttpResponse(content_type='application/msexcel')
-    response['Access-Control-Expose-Headers'] = f'Content-Disposition'
-    response['Content-Disposition'] = f'attachment;filename={quote(filename)}'
-    wb = Workbook()
-    ws = wb.active
-    for row in rows:
-        ws.append(row)
-    wb.save(response)
-
-    return response
+    return TreeIndex(menu_list).label_tree()
 
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
@@ -237,4 +192,13 @@ def is_json(s):
         json.loads(s)
         return True
     except:
-        return False
\ No newline at end of file
+        return False
+
+def json_response(res, **encoded):
+    """
+    生成JSON响应，encoded中为已编码的JSON，直接拼接到响应体中
+    """
+    content = json.dumps(res, cls=DjangoJSONEncoder)
+    if encoded:
+        content = content[:-1] + ''.join(', %s: %s' % (json.dumps(key), value) for key, value in encoded.items()) + '}'
+    return HttpResponse(content, content_type='application/json')
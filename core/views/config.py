@@ -1,18 +1,20 @@
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
+from core.configs import get_config, invalidate_configs, refresh_configs
 from core.decorator import monitor, has_permi
+from core.export import stream_export
 from core.models import SysConfig
-from core.serializers import SysConfigSerializer
-from core.utils import export_table
+from core.pagination import paginate
+from core.search import search_filter
+from core.serializers import SysConfigSerializer, fast_config_serializer
 
 @monitor
 class ConfigView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     @has_permi('system:config:list')
@@ -27,12 +29,6 @@ class ConfigView(GenericViewSet):
         end_time = request.query_params.get('params[endTime]')
 
         query_condition = {}
-        if config_name:
-            query_condition['config_name__contains'] = config_name
-
-        if config_key:
-            query_condition['config_key__contains'] = config_key
-
         if config_type:
             query_condition['config_type'] = config_type
 
@@ -40,15 +36,14 @@ class ConfigView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         configs = SysConfig.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(configs, page_size)
-        configs = paginator.get_page(page_num)
-        serializer = SysConfigSerializer(configs, many=True)
+        configs = search_filter(configs, config_name=config_name, config_key=config_key)
+        configs, page_info = paginate(fast_config_serializer.values(configs), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'total': paginator.count,
-            'rows': serializer.data
+            'rows': fast_config_serializer.serialize(configs)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:config:add')
@@ -58,6 +53,7 @@ class ConfigView(GenericViewSet):
         serializer = SysConfigSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_configs()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -74,6 +70,7 @@ class ConfigView(GenericViewSet):
             serializer = SysConfigSerializer(config, request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_configs()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -111,6 +108,7 @@ class ConfigView(GenericViewSet):
         configs = SysConfig.objects.filter(config_id__in=pks)
         if configs:
             configs.delete()
+            invalidate_configs()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -124,11 +122,11 @@ class ConfigView(GenericViewSet):
 
     def get_value(self, request, key):
         """获取参数设置键值"""
-        config = SysConfig.objects.filter(config_key=key).first()
-        if config:
+        value = get_config(key)
+        if value is not None:
             res = {
                 'code': 200,
-                'msg': config.config_value
+                'msg': value
             }
         else:
             res = {
@@ -137,15 +135,19 @@ class ConfigView(GenericViewSet):
             }
         return JsonResponse(res)
 
+    @has_permi('system:config:remove')
     def refresh_cache(self, request):
         """刷新缓存"""
-        return JsonResponse({})
+        refresh_configs()
+        res = {
+            'code': 200,
+            'msg': 'ok'
+        }
+        return JsonResponse(res)
 
     @has_permi('system:config:export')
     def export_xlsx(self, request):
         """导出参数设置数据"""
-        page_num = request.data.get('page_num', 1)
-        page_size = request.data.get('page_size', 10)
         config_name = request.data.get('config_name')
         config_key = request.data.get('config_key')
         config_type = request.data.get('config_type')
@@ -153,12 +155,6 @@ class ConfigView(GenericViewSet):
         end_time = request.data.get('params[endTime]')
 
         query_condition = {}
-        if config_name:
-            query_condition['config_name__contains'] = config_name
-
-        if config_key:
-            query_condition['config_key__contains'] = config_key
-
         if config_type:
             query_condition['config_type'] = config_type
 
@@ -166,11 +162,7 @@ class ConfigView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         configs = SysConfig.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(configs, page_size)
-        configs = paginator.get_page(page_num)
+        configs = search_filter(configs, config_name=config_name, config_key=config_key)
         header = ['参数主键', '参数名称', '参数键名', '参数键值', '系统内置', '备注', '创建时间']
-        rows = [header]
-        for config in configs:
-            rows.append([config.config_id, config.config_name, config.config_key, config.config_value, config.config_type, config.remark, config.create_time])
-
-        return export_table('参数设置表.xlsx', rows)
+        rows = configs.values_list('config_id', 'config_name', 'config_key', 'config_value', 'config_type', 'remark', 'create_time')
+        return stream_export('参数设置表.xlsx', header, rows, request.data.get('file_type'))
@@ -1,29 +1,25 @@
-from django.db.models import Q
+from django.db import transaction
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
+from core.hierarchy import get_ancestors, get_descendants, move_dept
+from core.permission import invalidate_data_scope
 from core.models import SysDept, SysRole
 from core.serializers import SysDeptSerializer
-from core.utils import get_label_tree
+from core.tree import TreeIndex
 
 @monitor
 class DeptView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
-    def get_ancestors(self, depts, dept_id):
-        ancestors = [str(dept_id)]
-        for d in depts:
-            if d.dept_id == dept_id:
-                dept_id = d.parent_id
-                if dept_id == 0:
-                    break
-                ancestors.append(str(dept_id))
-        return ','.join(reversed(ancestors))
+    def get_label_tree(self):
+        depts = SysDept.objects.values('dept_id', 'dept_name', 'parent_id', 'order_num')
+        return TreeIndex(depts, id_key='dept_id', order_key='order_num').label_tree('dept_name')
 
     @has_permi('system:dept:list')
     def list(self, request):
@@ -71,11 +67,19 @@ class DeptView(GenericViewSet):
     def create(self, request):
         """新增部门"""
         request.data['create_by'] = request.user.username
-        depts = SysDept.objects.all()
-        request.data['ancestors'] = self.get_ancestors(depts, request.data.get('parent_id'))
+        ancestors = get_ancestors(request.data.get('parent_id'))
+        if ancestors is None:
+            res = {
+                'code': 500,
+                'msg': '上级部门不存在'
+            }
+            return JsonResponse(res)
+
+        request.data['ancestors'] = ancestors
         serializer = SysDeptSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_data_scope()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -89,9 +93,22 @@ class DeptView(GenericViewSet):
         dept_id = request.data.get('dept_id')
         dept = SysDept.objects.filter(dept_id=dept_id).first()
         if dept:
-            serializer = SysDeptSerializer(dept, request.data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                try:
+                    move_dept(dept, request.data.get('parent_id', dept.parent_id))
+                except ValueError as e:
+                    res = {
+                        'code': 500,
+                        'msg': str(e)
+                    }
+                    return JsonResponse(res)
+
+                request.data['parent_id'] = dept.parent_id
+                request.data['ancestors'] = dept.ancestors
+                serializer = SysDeptSerializer(dept, request.data)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+            invalidate_data_scope()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -109,6 +126,7 @@ class DeptView(GenericViewSet):
         dept = SysDept.objects.filter(dept_id=pk).first()
         if dept:
             dept.delete()
+            invalidate_data_scope()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -124,7 +142,7 @@ class DeptView(GenericViewSet):
         """排除结点的部门树"""
         dept = SysDept.objects.filter(dept_id=pk).first()
         if dept:
-            depts = SysDept.objects.filter(~Q(dept_id=dept.dept_id))
+            depts = SysDept.objects.exclude(dept_id__in=get_descendants(dept, include_self=True).values('dept_id'))
             serializer = SysDeptSerializer(depts, many=True)
             res = {
                 'code': 200,
@@ -140,9 +158,7 @@ class DeptView(GenericViewSet):
 
     def tree_select(self, request):
         """部门树"""
-        objects = SysDept.objects.all()
-        res_objects_list = [{"id": item.dept_id, "label": item.dept_name, "parent_id": item.parent_id} for item in objects]
-        tree = get_label_tree(res_objects_list)
+        tree = self.get_label_tree()
         res = {
             'code': 200,
             'msg': 'ok',
@@ -154,11 +170,8 @@ class DeptView(GenericViewSet):
         """角色部门树"""
         role = SysRole.objects.filter(role_id=pk).first()
         if role:
-            checked_keys = [dept.dept_id for dept in role.depts.all()]
-            objects = SysDept.objects.all()
-            res_objects_list = [{"id": item.dept_id, "label": item.dept_name, "parent_id": item.parent_id} for item in
-                                objects]
-            tree = get_label_tree(res_objects_list)
+            checked_keys = list(role.depts.values_list('dept_id', flat=True))
+            tree = self.get_label_tree()
             res = {
                 'code': 200,
                 'msg': 'ok',
@@ -1,18 +1,22 @@
-from django.core.paginator import Paginator
+import json
+
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
+from core.dicts import get_dict, get_dicts, invalidate_dicts, refresh_dicts
+from core.export import stream_export
 from core.models import SysDictData, SysDictType
-from core.serializers import SysDictDataSerializer, SysDictTypeSerializer
-from core.utils import export_table
+from core.pagination import paginate
+from core.serializers import SysDictDataSerializer, SysDictTypeSerializer, fast_dict_data_serializer
+from core.utils import json_response
 
 @monitor
 class DictDataView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:dict:list')
@@ -36,15 +40,13 @@ class DictDataView(GenericViewSet):
 
         dict_type = SysDictType.objects.filter(dict_type=dict_type).first()
         dict_data = dict_type.sysdictdata_set.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(dict_data, page_size)
-        dict_data = paginator.get_page(page_num)
-        serializer = SysDictDataSerializer(dict_data, many=True)
+        dict_data, page_info = paginate(fast_dict_data_serializer.values(dict_data), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'rows': serializer.data,
-            'total': paginator.count
+            'rows': fast_dict_data_serializer.serialize(dict_data)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:dict:add')
@@ -57,6 +59,7 @@ class DictDataView(GenericViewSet):
             serializer = SysDictDataSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_dicts()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -78,6 +81,7 @@ class DictDataView(GenericViewSet):
             serializer = SysDictDataSerializer(dict_data, request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_dicts()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -115,6 +119,7 @@ class DictDataView(GenericViewSet):
         dict_data = SysDictData.objects.filter(dict_code__in=pks)
         if dict_data:
             dict_data.delete()
+            invalidate_dicts()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -128,27 +133,34 @@ class DictDataView(GenericViewSet):
 
     def dict_data(self, request, value):
         """正常/停用"""
-        dict_type = SysDictType.objects.filter(dict_type=value).first()
-        if dict_type:
-            dict_data = dict_type.sysdictdata_set.all()
-            serializer = SysDictDataSerializer(dict_data, many=True)
-            res = {
-                'code': 200,
-                'msg': 'ok',
-                'data': serializer.data
-            }
-        else:
+        content = get_dict(value)
+        if content is None:
             res = {
                 'code': 500,
                 'msg': '字典类型不存在'
             }
-        return JsonResponse(res)
+            return JsonResponse(res)
+
+        res = {
+            'code': 200,
+            'msg': 'ok'
+        }
+        return json_response(res, data=content)
+
+    def dict_data_batch(self, request):
+        """批量获取字典数据"""
+        dict_types = [value for value in request.query_params.get('dict_types', '').split(',') if value]
+        dicts = get_dicts(dict_types)
+        res = {
+            'code': 200,
+            'msg': 'ok'
+        }
+        content = '{%s}' % ', '.join('%s: %s' % (json.dumps(dict_type), dicts[dict_type]) for dict_type in dict_types if dict_type in dicts)
+        return json_response(res, data=content)
 
     @has_permi('system:dict:export')
     def export_xlsx(self, request):
         """导出字典数据数据"""
-        page_num = request.data.get('page_num', 1)
-        page_size = request.data.get('page_size', 10)
         dict_type = request.data.get('dict_type')
         dict_label = request.data.get('dict_label')
         status = request.data.get('status')
@@ -165,19 +177,14 @@ class DictDataView(GenericViewSet):
 
         dict_type = SysDictType.objects.filter(dict_type=dict_type).first()
         dict_data = dict_type.sysdictdata_set.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(dict_data, page_size)
-        dict_data = paginator.get_page(page_num)
         header = ['字典编码', '字典标签', '字典键值', '字典排序', '状态', '备注', '创建时间']
-        rows = [header]
-        for obj in dict_data:
-            rows.append([obj.dict_code, obj.dict_label, obj.dict_value, obj.dict_sort, obj.status, obj.remark, obj.create_time])
-
-        return export_table('字典数据表.xlsx', rows)
+        rows = dict_data.values_list('dict_code', 'dict_label', 'dict_value', 'dict_sort', 'status', 'remark', 'create_time')
+        return stream_export('字典数据表.xlsx', header, rows, request.data.get('file_type'))
 
 @monitor
 class DictTypeView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:dict:list')
@@ -205,15 +212,14 @@ class DictTypeView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         dict_types = SysDictType.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(dict_types, page_size)
-        dict_types = paginator.get_page(page_num)
+        dict_types, page_info = paginate(dict_types, page_num, page_size, request.query_params.get('cursor'))
         serializer = SysDictTypeSerializer(dict_types, many=True)
         res = {
             'code': 200,
             'msg': 'ok',
-            'rows': serializer.data,
-            'total': paginator.count
+            'rows': serializer.data
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:dict:add')
@@ -223,6 +229,7 @@ class DictTypeView(GenericViewSet):
         serializer = SysDictTypeSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_dicts()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -238,6 +245,7 @@ class DictTypeView(GenericViewSet):
         serializer = SysDictTypeSerializer(dict_type, request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_dicts()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -268,6 +276,7 @@ class DictTypeView(GenericViewSet):
         dict_type = SysDictType.objects.filter(dict_id=pk).first()
         if dict_type:
             dict_type.delete()
+            invalidate_dicts()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -279,19 +288,30 @@ class DictTypeView(GenericViewSet):
             }
         return JsonResponse(res)
 
+    @has_permi('system:dict:remove')
     def refresh_cache(self, request):
         """刷新缓存"""
-        return JsonResponse({})
+        refresh_dicts()
+        res = {
+            'code': 200,
+            'msg': 'ok'
+        }
+        return JsonResponse(res)
 
     def option_select(self, request):
         """选项"""
-        return JsonResponse({})
+        dict_types = SysDictType.objects.order_by('dict_id')
+        serializer = SysDictTypeSerializer(dict_types, many=True)
+        res = {
+            'code': 200,
+            'msg': 'ok',
+            'data': serializer.data
+        }
+        return JsonResponse(res)
 
     @has_permi('system:dict:export')
     def export_xlsx(self, request):
         """字典类型数据导出"""
-        page_num = request.data.get('page_num', 1)
-        page_size = request.data.get('page_size', 10)
         dict_name = request.data.get('dict_name')
         dict_type = request.data.get('dict_type')
         status = request.data.get('status')
@@ -312,11 +332,6 @@ class DictTypeView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         dict_types = SysDictType.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(dict_types, page_size)
-        dict_types = paginator.get_page(page_num)
         header = ['字典编号', '字典名称', '字典类型', '状态', '备注', '创建时间']
-        rows = [header]
-        for dict_type in dict_types:
-            rows.append([dict_type.dict_id, dict_type.dict_name, dict_type.dict_type, dict_type.status, dict_type.remark, dict_type.create_time])
-
-        return export_table('字典类型表.xlsx', rows)
+        rows = dict_types.values_list('dict_id', 'dict_name', 'dict_type', 'status', 'remark', 'create_time')
+        return stream_export('字典类型表.xlsx', header, rows, request.data.get('file_type'))
@@ -0,0 +1,62 @@
+import os
+from urllib.parse import quote
+
+from django.http import JsonResponse, FileResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.viewsets import GenericViewSet
+
+from core.authentication import CachedJSONWebTokenAuthentication
+from core.jobs import export_job_runner, ExportJobError
+from core.export import CONTENT_TYPES
+from core.models import SysExportJob
+from core.serializers import SysExportJobSerializer
+
+
+def submit_export_job(export_type, request):
+    """
+    提交后台导出任务，返回任务ID供前端轮询
+    """
+    params = {key: value for key, value in request.data.items() if key not in ('async', 'file_type')}
+    try:
+        job = export_job_runner.submit(export_type, params, request.user, request.data.get('file_type'))
+    except ExportJobError as e:
+        return JsonResponse({'code': 500, 'msg': str(e)})
+
+    res = {
+        'code': 200,
+        'msg': 'ok',
+        'job_id': job.job_id
+    }
+    return JsonResponse(res)
+
+
+class ExportJobView(GenericViewSet):
+
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def retrieve(self, request, pk):
+        """导出任务状态"""
+        job = SysExportJob.objects.filter(job_id=pk, user_id=request.user.pk).first()
+        if job is None:
+            return JsonResponse({'code': 500, 'msg': '导出任务不存在'})
+
+        # 确保当前进程的调度线程在运行
+        export_job_runner.start()
+        res = {
+            'code': 200,
+            'msg': 'ok',
+            'data': SysExportJobSerializer(job).data
+        }
+        return JsonResponse(res)
+
+    def download(self, request, pk):
+        """下载导出文件"""
+        job = SysExportJob.objects.filter(job_id=pk, user_id=request.user.pk).first()
+        if job is None or job.status != '2' or not job.file_path or not os.path.exists(job.file_path):
+            return JsonResponse({'code': 500, 'msg': '导出文件不存在'})
+
+        response = FileResponse(open(job.file_path, 'rb'), content_type=CONTENT_TYPES[job.file_type])
+        response['Access-Control-Expose-Headers'] = 'Content-Disposition'
+        response['Content-Disposition'] = f'attachment;filename={quote(job.file_name)}'
+        return response
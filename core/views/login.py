@@ -1,34 +1,33 @@
 from datetime import datetime
 
-from django.core.cache import cache
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_jwt.settings import api_settings
 from rest_framework_jwt.utils import jwt_response_payload_handler
 from rest_framework_jwt.views import JSONWebTokenAPIView
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
-from gvcode import VFCode
 
-from core.models import SysMenu, SysRoleMenu, SysUserRole
-from core.serializers import LoginSerializer, SysMenuSerializer, SysUserProfileSerializer
-from core.utils import is_admin, gen_routers, get_perms
+from core.authentication import CachedJSONWebTokenAuthentication
+from core.captcha import captcha_pool, save_captcha
+from core.online import online_registry
+from core.revocation import revoke_token
+from core.routers import get_routers
+from core.serializers import LoginSerializer, SysUserProfileSerializer
+from core.utils import get_perms
 
 
 class CaptchaView(APIView):
 
     def get(self, request):
         """获取验证码"""
-        vf = VFCode()
-        vf.generate_digit(4)
-        cache.set(vf.code, vf.code, 3 * 60)
+        code, image = captcha_pool.get()
         data = {
             'code': 200,
             'msg': 'ok',
+            'uuid': save_captcha(code),
             'data': {
-                'captcha': vf.get_img_base64()[1],
-                'code': vf.code
+                'captcha': image
             }
         }
         return JsonResponse(data)
@@ -42,6 +41,7 @@ class LoginView(JSONWebTokenAPIView):
         if serializer.is_valid():
             user = serializer.object.get('user') or request.user
             token = serializer.object.get('token')
+            online_registry.login(api_settings.JWT_DECODE_HANDLER(token), user, request)
             response_data = jwt_response_payload_handler(token, user, request)
             response = Response(response_data)
             if api_settings.JWT_AUTH_COOKIE:
@@ -87,7 +87,7 @@ class LoginView(JSONWebTokenAPIView):
 
 class UserInfoView(APIView):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -107,47 +107,23 @@ class UserInfoView(APIView):
 
 class RoutersView(APIView):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """路由信息"""
-        sys_user = request.user
-        if is_admin(sys_user):
-            menus = SysMenu.objects.all().order_by('order_num')
-            sys_menu_list = [SysMenuSerializer(obj).data for obj in menus]
-        else:
-            roles = SysUserRole.objects.filter(user=sys_user, role__status='0')
-            role_menu = SysRoleMenu.objects.filter(role_id__in=[obj.role_id for obj in roles])
-
-            menus = SysMenu.objects.filter(
-                menu_type__in=['M', 'C'],
-                menu_id__in=[obj.menu_id for obj in role_menu],
-                is_delete=False,
-                visible='0'
-            ).order_by('order_num')
-            sys_menu_list = [SysMenuSerializer(obj).data for obj in menus]
-
-        sys_menu_list_top = []
-        for item in sys_menu_list:
-            if item.get("parent_id") == 0:
-                sys_menu_list_top.append(item)
-        data = gen_routers(sys_menu_list_top, sys_menu_list)
-
-        res = {
-            "code": 200,
-            "msg": "ok",
-            "data": data or []
-        }
-        return JsonResponse(data=res)
+        return HttpResponse(get_routers(request.user), content_type='application/json')
 
 class LogoutView(APIView):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         """注销"""
+        payload = api_settings.JWT_DECODE_HANDLER(request.auth)
+        revoke_token(payload)
+        online_registry.logout(payload)
         res = {
             'code': 200,
             'msg': 'ok'
@@ -1,18 +1,19 @@
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
+from core.export import stream_export
 from core.models import SysLoginLog
-from core.serializers import SysLoginLogSerializer
-from core.utils import export_table
+from core.pagination import paginate
+from core.retention import truncate
+from core.serializers import fast_login_log_serializer
 
 @monitor
 class LoginLogView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('monitor:logininfor:list')
@@ -40,15 +41,13 @@ class LoginLogView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         login_logs = SysLoginLog.objects.filter(**query_condition).order_by('-create_time')
-        paginator = Paginator(login_logs, page_size)
-        login_logs = paginator.get_page(page_num)
-        serializer = SysLoginLogSerializer(login_logs, many=True)
+        login_logs, page_info = paginate(fast_login_log_serializer.values(login_logs), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'total': paginator.count,
-            'rows': serializer.data
+            'rows': fast_login_log_serializer.serialize(login_logs)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('monitor:logininfor:remove')
@@ -73,7 +72,7 @@ class LoginLogView(GenericViewSet):
     @has_permi('monitor:logininfor:remove')
     def clean_all(self, request):
         """清空登录日志"""
-        SysLoginLog.objects.all().delete()
+        truncate(SysLoginLog)
         res = {
             'code': 200,
             'msg': 'ok'
@@ -83,8 +82,6 @@ class LoginLogView(GenericViewSet):
     @has_permi('monitor:logininfor:export')
     def export_xlsx(self, request):
         """导出登录日志数据"""
-        page_num = request.data.get('page_num')
-        page_size = request.data.get('page_size')
         ip_addr = request.data.get('ip_addr')
         username = request.data.get('username')
         status = request.data.get('status')
@@ -105,11 +102,6 @@ class LoginLogView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         login_logs = SysLoginLog.objects.filter(**query_condition).order_by('-create_time')
-        paginator = Paginator(login_logs, page_size)
-        login_logs = paginator.get_page(page_num)
         header = ['访问编号', '用户名称', '登录地址', '登录地点', '浏览器', '操作系统', '登录状态', '操作信息', '登录日期']
-        rows = [header]
-        for login_log in login_logs:
-            rows.append([login_log.info_id, login_log.username, login_log.ip_addr, login_log.login_location, login_log.browser, login_log.os, login_log.status, login_log.msg, login_log.login_time])
-
-        return export_table('登录日志表.xslx', rows)
+        rows = login_logs.values_list('info_id', 'username', 'ip_addr', 'login_location', 'browser', 'os', 'status', 'msg', 'login_time')
+        return stream_export('登录日志表.xlsx', header, rows, request.data.get('file_type'))
@@ -1,19 +1,25 @@
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
+from core.permission import invalidate_perms
+from core.routers import invalidate_routers
 from core.models import SysMenu, SysRole
 from core.serializers import SysMenuSerializer
-from core.utils import get_label_tree
+from core.tree import TreeIndex
 
 @monitor
 class MenuView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_label_tree(self):
+        menus = SysMenu.objects.values('menu_id', 'menu_name', 'parent_id', 'order_num')
+        return TreeIndex(menus, id_key='menu_id', order_key='order_num').label_tree('menu_name')
+
     @has_permi('system:menu:list')
     def list(self, request):
         """菜单列表"""
@@ -45,6 +51,7 @@ class MenuView(GenericViewSet):
         serializer = SysMenuSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_routers()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -60,6 +67,8 @@ class MenuView(GenericViewSet):
             serializer = SysMenuSerializer(menu, request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_perms()
+            invalidate_routers()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -104,6 +113,8 @@ class MenuView(GenericViewSet):
             return JsonResponse(res)
 
         menu.delete()
+        invalidate_perms()
+        invalidate_routers()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -112,9 +123,7 @@ class MenuView(GenericViewSet):
 
     def tree_select(self, request):
         """菜单树"""
-        menus = SysMenu.objects.all()
-        res_objects_list = [{"id": menu.menu_id, "label": menu.menu_name, "parent_id": menu.parent_id} for menu in menus]
-        tree = get_label_tree(res_objects_list)
+        tree = self.get_label_tree()
         res = {
             'code': 200,
             'msg': 'ok',
@@ -132,10 +141,8 @@ class MenuView(GenericViewSet):
             }
             return JsonResponse(res)
 
-        menus = SysMenu.objects.all()
-        res_objects_list = [{"id": menu.menu_id, "label": menu.menu_name, "parent_id": menu.parent_id} for menu in menus]
-        tree = get_label_tree(res_objects_list)
-        checked_keys = [menu.menu_id for menu in role.sysmenu_set.all()]
+        tree = self.get_label_tree()
+        checked_keys = list(role.sysmenu_set.values_list('menu_id', flat=True))
         res = {
             'code': 200,
             'msg': 'ok',
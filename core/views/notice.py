@@ -1,17 +1,17 @@
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
 from core.models import SysNotice
+from core.pagination import paginate
 from core.serializers import SysNoticeSerializer
 
 @monitor
 class NoticeView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:notice:list')
@@ -34,15 +34,14 @@ class NoticeView(GenericViewSet):
             query_condition['create_by__contains'] = create_by
 
         notices = SysNotice.objects.filter(**query_condition).order_by('-create_time')
-        paginator = Paginator(notices, page_size)
-        notices = paginator.get_page(page_num)
+        notices, page_info = paginate(notices, page_num, page_size, request.query_params.get('cursor'))
         serializer = SysNoticeSerializer(notices, many=True)
         res = {
             'code': 200,
             'msg': 'ok',
-            'total': paginator.count,
             'rows': serializer.data
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:notice:add')
@@ -0,0 +1,61 @@
+import datetime
+
+from django.http import JsonResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.viewsets import GenericViewSet
+
+from core.authentication import CachedJSONWebTokenAuthentication
+from core.decorator import monitor, has_permi
+from core.models import SysUserOnline
+from core.online import online_registry
+from core.pagination import paginate
+from core.serializers import SysUserOnlineSerializer
+
+@monitor
+class OnlineView(GenericViewSet):
+
+    authentication_classes = [CachedJSONWebTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @has_permi('monitor:online:list')
+    def list(self, request):
+        """在线用户列表"""
+        page_num = request.query_params.get('page_num', 1)
+        page_size = request.query_params.get('page_size', 10)
+        ip_addr = request.query_params.get('ip_addr')
+        username = request.query_params.get('username')
+
+        query_condition = {}
+        if ip_addr:
+            query_condition['ip_addr__contains'] = ip_addr
+
+        if username:
+            query_condition['username__contains'] = username
+
+        sessions = SysUserOnline.objects.filter(
+            expire_time__gt=datetime.datetime.now(), **query_condition
+        ).order_by('-login_time')
+        sessions, page_info = paginate(sessions, page_num, page_size, request.query_params.get('cursor'))
+        serializer = SysUserOnlineSerializer(sessions, many=True)
+        res = {
+            'code': 200,
+            'msg': 'ok',
+            'rows': serializer.data
+        }
+        res.update(page_info)
+        return JsonResponse(res)
+
+    @has_permi('monitor:online:forceLogout')
+    def force_exit(self, request, pk):
+        """强退用户"""
+        if online_registry.force_exit(pk):
+            res = {
+                'code': 200,
+                'msg': 'ok'
+            }
+        else:
+            res = {
+                'code': 500,
+                'msg': '会话不存在'
+            }
+        return JsonResponse(res)
@@ -1,19 +1,49 @@
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import has_permi
+from core.export import stream_export
 from core.models import SysOperationLog
-from core.serializers import SysOperationLogSerializer
-from core.utils import export_table
+from core.pagination import paginate
+from core.retention import truncate
+from core.search import search_filter
+from core.serializers import fast_operation_log_serializer
+from core.views.export_job import submit_export_job
 
 
+def export_operation_logs(params, user):
+    """
+    操作日志导出数据
+    """
+    title = params.get('title')
+    operator = params.get('operator')
+    business_type = params.get('business_type')
+    status = params.get('status')
+    begin_time = params.get('params[beginTime]')
+    end_time = params.get('params[endTime]')
+
+    query_condition = {}
+    if business_type:
+        query_condition['business_type'] = business_type
+
+    if status:
+        query_condition['status'] = status
+
+    if begin_time and end_time:
+        query_condition['create_time__range'] = [begin_time, end_time]
+
+    operation_logs = SysOperationLog.objects.filter(**query_condition).order_by('-create_time')
+    operation_logs = search_filter(operation_logs, title=title, operator=operator)
+    header = ['日志编号', '系统模块', '操作类型', '请求方式', '操作人员', '操作地址', '操作地点', '操作日期']
+    rows = operation_logs.values_list('id', 'title', 'business_type', 'request_method', 'operator', 'ip', 'location', 'create_time')
+    return '操作日志.xlsx', header, rows
+
 
 class OperationLogView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('monitor:operlog:list')
@@ -29,12 +59,6 @@ class OperationLogView(GenericViewSet):
         end_time = request.query_params.get('params[endTime]')
 
         query_condition = {}
-        if title:
-            query_condition['title__contains'] = title
-
-        if operator:
-            query_condition['operator__contains'] = operator
-
         if business_type:
             query_condition['business_type'] = business_type
 
@@ -45,15 +69,14 @@ class OperationLogView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         operation_logs = SysOperationLog.objects.filter(**query_condition).order_by('-create_time')
-        paginator = Paginator(operation_logs, page_size)
-        operation_logs = paginator.get_page(page_num)
-        serializer = SysOperationLogSerializer(operation_logs, many=True)
+        operation_logs = search_filter(operation_logs, title=title, operator=operator)
+        operation_logs, page_info = paginate(fast_operation_log_serializer.values(operation_logs), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'total': paginator.count,
-            'rows': serializer.data
+            'rows': fast_operation_log_serializer.serialize(operation_logs)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('monitor:operlog:remove')
@@ -78,7 +101,7 @@ class OperationLogView(GenericViewSet):
     @has_permi('monitor:operlog:remove')
     def clean_all(self, request):
         """清空操作日志"""
-        SysOperationLog.objects.all().delete()
+        truncate(SysOperationLog)
         res = {
             'code': 200,
             'msg': 'ok'
@@ -88,37 +111,8 @@ class OperationLogView(GenericViewSet):
     @has_permi('monitor:operlog:export')
     def export_xlsx(self, request):
         """导出操作日志数据"""
-        page_num = request.data.get('page_num')
-        page_size = request.data.get('page_size')
-        title = request.data.get('title')
-        operator = request.data.get('operator')
-        business_type = request.data.get('business_type')
-        status = request.data.get('status')
-        begin_time = request.data.get('params[beginTime]')
-        end_time = request.data.get('params[endTime]')
-
-        query_condition = {}
-        if title:
-            query_condition['title__contains'] = title
-
-        if operator:
-            query_condition['operator__contains'] = operator
+        if request.data.get('async') in (True, 'true'):
+            return submit_export_job('operlog', request)
 
-        if business_type:
-            query_condition['business_type'] = business_type
-
-        if status:
-            query_condition['status'] = status
-
-        if begin_time and end_time:
-            query_condition['create_time__range'] = [begin_time, end_time]
-
-        operation_logs = SysOperationLog.objects.filter(**query_condition).order_by('-create_time')
-        paginator = Paginator(operation_logs, page_size)
-        operation_logs = paginator.get_page(page_num)
-        header = ['日志编号', '系统模块', '操作类型', '请求方式', '操作人员', '操作地址', '操作地点', '操作日期']
-        rows = [header]
-        for operation_log in operation_logs:
-            rows.append([operation_log.id, operation_log.title, operation_log.business_type, operation_log.request_method, operation_log.operator, operation_log.ip, operation_log.location, operation_log.create_time])
-
-        return export_table('操作日志.xlsx', rows)
+        filename, header, rows = export_operation_logs(request.data, request.user)
+        return stream_export(filename, header, rows, request.data.get('file_type'))
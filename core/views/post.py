@@ -1,18 +1,19 @@
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
 from core.decorator import monitor, has_permi
+from core.export import stream_export
 from core.models import SysPost
+from core.options import invalidate_post_options
+from core.pagination import paginate
 from core.serializers import SysPostSerializer
-from core.utils import export_table
 
 @monitor
 class PostView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:post:list')
@@ -33,15 +34,14 @@ class PostView(GenericViewSet):
             query_condition['status'] = status
 
         posts = SysPost.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(posts, page_size)
-        posts = paginator.get_page(page_num)
+        posts, page_info = paginate(posts, page_num, page_size, request.query_params.get('cursor'))
         serializer = SysPostSerializer(posts, many=True)
         res = {
             'code': 200,
             'msg': 'ok',
-            'rows': serializer.data,
-            'total': paginator.count
+            'rows': serializer.data
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:post:add')
@@ -51,6 +51,7 @@ class PostView(GenericViewSet):
         serializer = SysPostSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_post_options()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -67,6 +68,7 @@ class PostView(GenericViewSet):
             serializer = SysPostSerializer(post, request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_post_options()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -104,6 +106,7 @@ class PostView(GenericViewSet):
         posts = SysPost.objects.filter(post_id__in=pks)
         if posts:
             posts.delete()
+            invalidate_post_options()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -118,8 +121,6 @@ class PostView(GenericViewSet):
     @has_permi('system:post:export')
     def export_xlsx(self, request):
         """导出岗位数据"""
-        page_num = request.data.get('page_num', 1)
-        page_size = request.data.get('page_size', 10)
         post_code = request.data.get('post_code')
         post_name = request.data.get('post_name')
         status = request.data.get('status')
@@ -135,11 +136,6 @@ class PostView(GenericViewSet):
             query_condition['status'] = status
 
         posts = SysPost.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(posts, page_size)
-        posts = paginator.get_page(page_num)
         header = ['岗位编号', '岗位编码', '岗位名称', '岗位排序', '状态', '创建时间']
-        rows = [header]
-        for post in posts:
-            rows.append([post.post_id, post.post_code, post.post_name, post.post_sort, post.status, post.create_time])
-
-        return export_table('岗位表.xlsx', rows)
+        rows = posts.values_list('post_id', 'post_code', 'post_name', 'post_sort', 'status', 'create_time')
+        return stream_export('岗位表.xlsx', header, rows, request.data.get('file_type'))
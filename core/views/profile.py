@@ -1,15 +1,15 @@
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication, invalidate_user_snapshot
 from core.serializers import SysUserProfileSerializer, SysUserPasswordSerializer
 from core.utils import get_perms
 
 
 class UserProfileView(APIView):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -37,6 +37,7 @@ class UserProfileView(APIView):
         serializer = SysUserProfileSerializer(request.user, request.data)
         if serializer.is_valid(raise_exception=True):
             user = serializer.save()
+            invalidate_user_snapshot([user.pk])
             serializer = SysUserProfileSerializer(user)
             res = {
                 'code': 200,
@@ -48,7 +49,7 @@ class UserProfileView(APIView):
 
 class UserProfilePasswordView(APIView):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def put(self, request):
@@ -1,19 +1,23 @@
-from django.core.paginator import Paginator
 from django.db.models import Q
 from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication, invalidate_user_snapshot
 from core.models import SysRole, SysMenu, SysUser, SysUserRole, SysDept
-from core.serializers import SysRoleSerializer, SysUserSerializer
-from core.utils import export_table
+from core.pagination import paginate
+from core.serializers import SysRoleSerializer, fast_user_serializer
 from core.decorator import monitor, has_permi
+from core.export import stream_export
+from core.permission import invalidate_perms, filter_data_scope
+from core.options import invalidate_role_options
+from core.routers import invalidate_routers
+from core.search import search_filter
 
 @monitor
 class RoleView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:role:list')
@@ -41,15 +45,15 @@ class RoleView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         roles = SysRole.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(roles, page_size)
-        roles = paginator.get_page(page_num)
+        roles = SysRoleSerializer.setup_eager_loading(roles)
+        roles, page_info = paginate(roles, page_num, page_size, request.query_params.get('cursor'))
         serializer = SysRoleSerializer(roles, many=True)
         res = {
             'code': 200,
             'msg': 'ok',
-            'total': paginator.count,
             'rows': serializer.data
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:role:query')
@@ -79,6 +83,7 @@ class RoleView(GenericViewSet):
         serializer = SysRoleSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_role_options()
         res = {
             'code': 200,
             'msg': 'ok'
@@ -97,6 +102,9 @@ class RoleView(GenericViewSet):
             serializer = SysRoleSerializer(role, request.data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            invalidate_perms()
+            invalidate_routers()
+            invalidate_role_options()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -116,6 +124,8 @@ class RoleView(GenericViewSet):
         roles = SysRole.objects.filter(role_id__in=pks)
         if roles:
             roles.delete()
+            invalidate_perms()
+            invalidate_role_options()
             res = {
                 'code': 200,
                 'msg': '角色删除成功'
@@ -136,6 +146,8 @@ class RoleView(GenericViewSet):
         if role:
             role.status = status
             role.save()
+            invalidate_perms()
+            invalidate_role_options()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -155,25 +167,17 @@ class RoleView(GenericViewSet):
         username = request.query_params.get('username')
         phone_number = request.query_params.get('phone_number')
 
-        query_condition = {}
-        if username:
-            query_condition['username__contains'] = username
-
-        if phone_number:
-            query_condition['phone_number__contains'] = phone_number
-
         role = SysRole.objects.filter(role_id=role_id).first()
         if role:
-            users = role.sysuser_set.filter(**query_condition).order_by('create_time')
-            paginator = Paginator(users, page_size)
-            users = paginator.get_page(page_num)
-            serializer = SysUserSerializer(users, many=True)
+            users = search_filter(role.sysuser_set.order_by('create_time'), username=username, phone_number=phone_number)
+            users = filter_data_scope(users, request.user)
+            users, page_info = paginate(fast_user_serializer.values(users), page_num, page_size, request.query_params.get('cursor'))
             res = {
                 'code': 200,
                 'msg': 'ok',
-                'rows': serializer.data,
-                'total': paginator.count
+                'rows': fast_user_serializer.serialize(users)
             }
+            res.update(page_info)
         else:
             res = {
                 'code': 200,
@@ -189,24 +193,16 @@ class RoleView(GenericViewSet):
         username = request.query_params.get('username')
         phone_number = request.query_params.get('phone_number')
 
-        query_condition = {}
-        if username:
-            query_condition['username__contains'] = username
-
-        if phone_number:
-            query_condition['phone_number__contains'] = phone_number
-
-        users = SysUser.objects.filter(Q(**query_condition) & ~Q(sysuserrole__role_id=role_id))
-
-        paginator = Paginator(users, page_size)
-        users = paginator.get_page(page_num)
-        serializer = SysUserSerializer(users, many=True)
+        users = SysUser.objects.filter(~Q(sysuserrole__role_id=role_id)).order_by('create_time')
+        users = search_filter(users, username=username, phone_number=phone_number)
+        users = filter_data_scope(users, request.user)
+        users, page_info = paginate(fast_user_serializer.values(users), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'rows': serializer.data,
-            'total': paginator.count
+            'rows': fast_user_serializer.serialize(users)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     def cancel(self, request):
@@ -235,6 +231,8 @@ class RoleView(GenericViewSet):
 
         user_role = SysUserRole.objects.filter(user=user,role=role).first()
         user_role.delete()
+        invalidate_perms([user.user_id])
+        invalidate_user_snapshot([user.user_id])
 
         return JsonResponse(res)
 
@@ -261,6 +259,8 @@ class RoleView(GenericViewSet):
 
         user_role = SysUserRole.objects.filter(role=role, user__in=users)
         user_role.delete()
+        invalidate_perms([user.user_id for user in users])
+        invalidate_user_snapshot([user.user_id for user in users])
         res = {
             'code': 200,
             'msg': 'ok'
@@ -290,6 +290,8 @@ class RoleView(GenericViewSet):
             return JsonResponse(res)
 
         role.sysuser_set.add(*users)
+        invalidate_perms([user.user_id for user in users])
+        invalidate_user_snapshot([user.user_id for user in users])
         res = {
             'code': 200,
             'msg': 'ok'
@@ -309,6 +311,8 @@ class RoleView(GenericViewSet):
             if role:
                 role.save()
                 role.depts.set(depts)
+                invalidate_perms()
+                invalidate_role_options()
                 res = {
                     'code': 200,
                     'msg': 'ok'
@@ -322,6 +326,8 @@ class RoleView(GenericViewSet):
         else:
             role.data_scope = data_scope
             role.save()
+            invalidate_perms()
+            invalidate_role_options()
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -331,8 +337,6 @@ class RoleView(GenericViewSet):
     @has_permi('system:role:export')
     def export_xlsx(self, request):
         """导出角色数据"""
-        page_num = request.data.get('page_num', 1)
-        page_size = request.data.get('page_size', 10)
         role_name = request.data.get('role_name')
         role_key = request.data.get('role_key')
         status = request.data.get('status')
@@ -353,12 +357,7 @@ class RoleView(GenericViewSet):
             query_condition['create_time__range'] = [begin_time, end_time]
 
         roles = SysRole.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(roles, page_size)
-        roles = paginator.get_page(page_num)
 
         header = ['角色ID', '角色名称', '角色权限字符', '状态', '创建时间']
-        rows = [header]
-        for role in roles:
-            rows.append([role.role_id, role.role_name, role.role_key, role.status, role.create_time])
-
-        return export_table('角色表.xlsx', rows)
+        rows = roles.values_list('role_id', 'role_name', 'role_key', 'status', 'create_time')
+        return stream_export('角色表.xlsx', header, rows, request.data.get('file_type'))
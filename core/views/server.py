@@ -6,14 +6,16 @@ from django.http import JsonResponse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
 import psutil
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
+from core.authentication import CachedJSONWebTokenAuthentication
+from core.captcha import captcha_pool
 from core.decorator import has_permi
+from core.logwriter import log_writer
 
 
 class ServerView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('monitor:server:list')
@@ -67,7 +69,9 @@ class ServerView(GenericViewSet):
                     'boot_time': boot_time.strftime('%Y-%m-%d %H:%M:%S'),
                     'run_time': f'{day} 天 {hour} 时 {minute} 分 {second} 秒'
                 },
-                'disk': disks
+                'disk': disks,
+                'operation_log': log_writer.stats(),
+                'captcha_pool': captcha_pool.stats()
             }
         }
         return JsonResponse(res)
@@ -1,22 +1,190 @@
+import datetime
 import re
 
-from django.core.paginator import Paginator
+from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from django.http import JsonResponse
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
-from openpyxl import load_workbook
 
-from core.serializers import SysUserSerializer, SysUserProfileSerializer, SysRoleSerializer, SysPostSerializer
+from core.authentication import CachedJSONWebTokenAuthentication, invalidate_user_snapshot
+from core.serializers import SysUserSerializer, SysRoleSerializer, fast_user_profile_serializer
 from core.models import SysUser, SysPost, SysDept, SysRole
-from core.utils import export_table
+from core.pagination import paginate
 from core.decorator import monitor, has_permi
+from core.bulk import bulk_upsert
+from core.configs import get_config
+from core.export import stream_export
+from core.importer import ImportReport, ImportFileError, iter_import_rows, iter_chunks
+from core.options import get_post_options, get_role_options
+from core.permission import invalidate_perms, filter_data_scope
+from core.search import search_filter
+from core.utils import json_response
+from core.views.export_job import submit_export_job
+
+
+def export_users(params, user):
+    """
+    用户导出数据
+    """
+    deptId = params.get('dept')
+    userName = params.get('username')
+    phone_number = params.get('phone_number')
+    status = params.get('status')
+    begin_time = params.get('params[beginTime]')
+    end_time = params.get('params[endTime]')
+
+    query_condition = {}
+    if deptId:
+        query_condition['dept__dept_id'] = deptId
+
+    if status:
+        query_condition['status'] = status
+
+    if begin_time and end_time:
+        query_condition['create_time__range'] = [begin_time, end_time]
+
+    users = SysUser.objects.filter(**query_condition).order_by('create_time')
+    users = search_filter(users, username=userName, phone_number=phone_number)
+    users = filter_data_scope(users, user)
+
+    header = ['用户ID', '用户名称', '用户昵称', '手机号', '用户邮箱', '状态', '部门名称', '部门负责人', '上次登录时间', '账号创建时间']
+    rows = users.values_list('user_id', 'username', 'nickname', 'phone_number', 'email', 'status',
+                             'dept__dept_name', 'dept__leader', 'login_date', 'create_time')
+    return '用户表.xlsx', header, rows
+
+
+# 导入文件列与导出表头一致
+USER_IMPORT_COLUMNS = 10
+USER_STATUS = {'0': '0', '1': '1', '正常': '0', '停用': '1'}
+USER_UPDATE_FIELDS = ['nickname', 'phone_number', 'email', 'status', 'dept_id', 'update_by', 'update_time']
+# 导入文件中留空时保留原值的字段
+OPTIONAL_UPDATE_FIELDS = ('status', 'dept_id')
+# 更新的用户超过该数量时使全部用户的缓存失效
+IMPORT_INVALIDATE_LIMIT = 200
+
+
+def parse_user_row(row, dept_ids):
+    """
+    校验并转换一行导入数据，数据有误时抛出ValueError
+    """
+    user_id, username, nickname, phone_number, email, status, dept_name = row[:7]
+    if not username:
+        raise ValueError('用户名称不能为空')
+
+    if not nickname:
+        raise ValueError('用户昵称不能为空')
+
+    if status and status not in USER_STATUS:
+        raise ValueError('状态错误')
+
+    data = {
+        'username': username,
+        'nickname': nickname,
+        'phone_number': phone_number,
+        'email': email
+    }
+    # 未填写状态时新增用户使用默认状态，更新用户保留原状态
+    if status:
+        data['status'] = USER_STATUS[status]
+    if dept_name:
+        if dept_name not in dept_ids:
+            raise ValueError('部门%s不存在' % dept_name)
+        data['dept_id'] = dept_ids[dept_name]
+
+    if user_id:
+        if not user_id.isdigit():
+            raise ValueError('用户ID错误')
+        data['user_id'] = int(user_id)
+    return data
+
+def import_users(file, operator, update_support=False):
+    """
+    用户导入：流式读取文件，预先建立部门名称索引，按块在事务中批量写入
+    返回逐行错误报告，单行或单块失败不影响其他数据
+    """
+    report = ImportReport()
+    dept_ids = {}
+    for dept_id, dept_name in SysDept.objects.order_by('dept_id').values_list('dept_id', 'dept_name'):
+        dept_ids.setdefault(dept_name, dept_id)
+    # 新用户均使用初始密码，只计算一次哈希
+    password = make_password(get_config('sys.user.initPassword') or '123456')
+    usernames = set()
+    # 更新的用户，导入完成后使其权限、数据权限和快照缓存失效
+    updated_ids = []
+
+    for chunk in iter_chunks(iter_import_rows(file, USER_IMPORT_COLUMNS)):
+        rows = []
+        for row_num, row in chunk:
+            try:
+                data = parse_user_row(row, dept_ids)
+            except ValueError as e:
+                report.add_error(row_num, str(e))
+                continue
+
+            if data['username'] in usernames:
+                report.add_error(row_num, '用户名称%s重复' % data['username'])
+                continue
+            usernames.add(data['username'])
+            rows.append((row_num, data))
+
+        users = []
+        if update_support:
+            # 以用户名称为键插入或更新，文件中的用户ID不再使用
+            now = datetime.datetime.now()
+            for row_num, data in rows:
+                data.pop('user_id', None)
+                # 未填写的部门和状态不更新
+                fields = tuple(name for name in USER_UPDATE_FIELDS if name not in OPTIONAL_UPDATE_FIELDS or name in data)
+                users.append((row_num, fields, SysUser(password=password, create_by=operator, update_by=operator, update_time=now, **data)))
+        else:
+            existing = set(SysUser.objects.filter(
+                username__in=[data['username'] for row_num, data in rows]
+            ).values_list('username', flat=True))
+            for row_num, data in rows:
+                if data['username'] in existing:
+                    report.add_error(row_num, '用户名称%s已存在' % data['username'])
+                    continue
+                data.pop('user_id', None)
+                users.append((row_num, None, SysUser(password=password, create_by=operator, **data)))
+
+        if not users:
+            continue
+
+        try:
+            with transaction.atomic():
+                if update_support:
+                    # 按更新字段分组写入
+                    groups = {}
+                    for row_num, fields, user in users:
+                        groups.setdefault(fields, []).append(user)
+                    for fields, group in groups.items():
+                        bulk_upsert(SysUser, group, 'username', list(fields))
+                else:
+                    SysUser.objects.bulk_create([user for row_num, fields, user in users])
+        except Exception as e:
+            for row_num, fields, user in users:
+                report.add_error(row_num, '写入失败：%s' % e)
+        else:
+            report.add_success(len(users))
+            if update_support:
+                updated_ids.extend(SysUser.objects.filter(
+                    username__in=[user.username for row_num, fields, user in users]
+                ).values_list('user_id', flat=True))
+
+    if updated_ids:
+        # 更新的用户较多时整体失效
+        if len(updated_ids) > IMPORT_INVALIDATE_LIMIT:
+            updated_ids = None
+        invalidate_perms(updated_ids)
+        invalidate_user_snapshot(updated_ids)
+    return report
+
 
 @monitor
 class UserView(GenericViewSet):
 
-    authentication_classes = [JSONWebTokenAuthentication]
+    authentication_classes = [CachedJSONWebTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @has_permi('system:user:list')
@@ -35,12 +203,6 @@ class UserView(GenericViewSet):
         if dept_id:
             query_condition['dept__dept_id'] = dept_id
 
-        if userName:
-            query_condition['username__contains'] = userName
-
-        if phone_number:
-            query_condition['phone_number__contains'] = phone_number
-
         if status:
             query_condition['status'] = status
 
@@ -48,22 +210,22 @@ class UserView(GenericViewSet):
             query_condition['create_time__range'] = [beginTime, endTime]
 
         users = SysUser.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(users, page_size)
-        users = paginator.get_page(page_num)
-        serializer = SysUserProfileSerializer(users, many=True)
+        users = search_filter(users, username=userName, phone_number=phone_number)
+        users = filter_data_scope(users, request.user)
+        users, page_info = paginate(fast_user_profile_serializer.values(users), page_num, page_size, request.query_params.get('cursor'))
         res = {
             'code': 200,
             'msg': 'ok',
-            'rows': serializer.data,
-            'total': paginator.count
+            'rows': fast_user_profile_serializer.serialize(users)
         }
+        res.update(page_info)
         return JsonResponse(res)
 
     @has_permi('system:user:query')
     def retrieve(self, request, pk):
         """用户详情"""
         try:
-            user = SysUser.objects.get(pk=pk)
+            user = SysUserSerializer.setup_eager_loading(SysUser.objects).get(pk=pk)
         except SysUser.DoesNotExist:
             res = {
                 'code': 500,
@@ -72,18 +234,15 @@ class UserView(GenericViewSet):
             return JsonResponse(res)
 
         serializer = SysUserSerializer(user)
-        posts = SysPostSerializer(SysPost.objects.all(), many=True).data
-        roles = SysRoleSerializer(SysRole.objects.all(), many=True).data
         res = {
             'code': 200,
             'msg': 'ok',
             'data': serializer.data,
-            'posts': posts,
-            'roles': roles,
+            # 使用已预加载的角色和岗位
             'post_ids': [post.post_id for post in user.posts.all()],
             'role_ids': [role.role_id for role in user.roles.all()],
         }
-        return JsonResponse(res)
+        return json_response(res, posts=get_post_options(), roles=get_role_options())
 
     @has_permi('system:user:add')
     def create(self, request):
@@ -130,6 +289,7 @@ class UserView(GenericViewSet):
             user = SysUser(**condition)
             user.set_password(password)
             user.save()
+            invalidate_user_snapshot([user.user_id])
             user.roles.set([SysRole.objects.get(role_id=role_id) for role_id in roles])
             user.posts.set([SysPost.objects.get(post_id=post_id) for post_id in posts])
 
@@ -160,6 +320,8 @@ class UserView(GenericViewSet):
             user.save()
             user.roles.set([SysRole.objects.get(role_id=role_id) for role_id in role_ids])
             user.posts.set([SysPost.objects.get(post_id=post_id) for post_id in post_ids])
+            invalidate_perms([user.user_id])
+            invalidate_user_snapshot([user.user_id])
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -174,6 +336,8 @@ class UserView(GenericViewSet):
         users = SysUser.objects.filter(user_id__in=pks)
         if users:
             users.delete()
+            invalidate_perms(pks)
+            invalidate_user_snapshot(pks)
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -187,17 +351,11 @@ class UserView(GenericViewSet):
 
     def option(self, request):
         """岗位和角色选项"""
-        posts = SysPost.objects.all()
-        roles = SysRole.objects.all()
-        posts = SysPostSerializer(posts, many=True).data
-        roles = SysRoleSerializer(roles, many=True).data
         res = {
             'code': 200,
-            'msg': 'ok',
-            'posts': posts,
-            'roles': roles,
+            'msg': 'ok'
         }
-        return JsonResponse(res)
+        return json_response(res, posts=get_post_options(), roles=get_role_options())
 
     @has_permi('system:user:edit')
     def change_status(self, request):
@@ -209,6 +367,7 @@ class UserView(GenericViewSet):
         if user:
             user.status = status
             user.save()
+            invalidate_user_snapshot([user.user_id])
             res = {
                 'code': 200,
                 'msg': 'ok'
@@ -223,96 +382,32 @@ class UserView(GenericViewSet):
     @has_permi('system:user:export')
     def export_xlsx(self, request):
         """导出用户数据"""
-        pageNum = request.data.get('page_num', 1)
-        pageSize = request.data.get('page_size', 10)
-        deptId = request.data.get('dept')
-        userName = request.data.get('username')
-        phone_number = request.data.get('phone_number')
-        status = request.data.get('status')
-        begin_time = request.data.get('params[beginTime]')
-        end_time = request.data.get('params[endTime]')
-
-        query_condition = {}
-        if deptId:
-            query_condition['dept__dept_id'] = deptId
+        if request.data.get('async') in (True, 'true'):
+            return submit_export_job('user', request)
 
-        if userName:
-            query_condition['username__contains'] = userName
-
-        if phone_number:
-            query_condition['phone_number__contains'] = phone_number
-
-        if status:
-            query_condition['status'] = status
-
-        if begin_time and end_time:
-            query_condition['create_time__range'] = [begin_time, end_time]
-
-        users = SysUser.objects.filter(**query_condition).order_by('create_time')
-        paginator = Paginator(users, pageSize)
-        users = paginator.get_page(pageNum)
-
-        header = ['用户ID', '用户名称', '用户昵称', '手机号', '用户邮箱', '状态', '部门名称', '部门负责人', '上次登录时间', '账号创建时间']
-        rows = [header]
-        for user in users:
-            rows.append([user.user_id, user.username, user.nickname, user.phone_number, user.email, user.status,
-                         user.dept.dept_name, user.dept.leader, user.login_date, user.create_time])
-
-        return export_table('用户表.xlsx', rows)
+        filename, header, rows = export_users(request.data, request.user)
+        return stream_export(filename, header, rows, request.data.get('file_type'))
 
     @has_permi('system:user:import')
     def import_xlsx(self, request):
         """导入用户数据"""
+        update_support = request.query_params.get('update_support') == 'true'
+        try:
+            report = import_users(request.data['file'], request.user.username, update_support)
+        except ImportFileError as e:
+            return JsonResponse({'code': 500, 'msg': str(e)})
+
         res = {
             'code': 200,
-            'msg': 'ok'
+            'msg': report.get_msg(),
+            'data': report.as_dict()
         }
-        update_support = request.query_params.get('update_support') or 'false'
-        file = request.data['file']
-        wb = load_workbook(file)
-        ws = wb.active
-        users = []
-        try:
-            if update_support == 'true':
-                for row in list(ws.values)[1:]:
-                    user_data = {
-                        'user_id': row[0],
-                        'username': row[1],
-                        'nickname': row[2],
-                        'phone_number': row[3],
-                        'email': row[4],
-                        'status': row[5],
-                        'dept': SysDept.objects.filter(dept_name=row[6]).first(),
-                        'login_date': row[8],
-                        'create_time': row[9]
-                    }
-                    users.append(SysUser(**user_data))
-                fields = ['username', 'nickname', 'phone_number', 'email', 'status', 'dept', 'login_date', 'create_time']
-                SysUser.objects.bulk_update(users, fields)
-            else:
-                for row in list(ws.values)[1:]:
-                    user_data = {
-                        'username': row[1],
-                        'nickname': row[2],
-                        'phone_number': row[3],
-                        'email': row[4],
-                        'status': row[5],
-                        'dept': SysDept.objects.filter(dept_name=row[6]).first(),
-                        'login_date': row[8],
-                        'create_time': row[9]
-                    }
-                    users.append(SysUser(**user_data))
-                SysUser.objects.bulk_create(users)
-        except Exception as e:
-            # print(e)
-            res['code'] = 500
-            res['msg'] = '导入失败'
-
         return JsonResponse(res)
 
     def import_template(self, request):
         """导入模板"""
-        return export_table('用户表.xlsx', [])
+        header = ['用户ID', '用户名称', '用户昵称', '手机号', '用户邮箱', '状态', '部门名称', '部门负责人', '上次登录时间', '账号创建时间']
+        return stream_export('用户表.xlsx', header, [])
 
     @has_permi('system:user:resetPwd')
     def reset_pwd(self, request):
@@ -326,6 +421,7 @@ class UserView(GenericViewSet):
             }
             user.set_password(password)
             user.save()
+            invalidate_user_snapshot([user.user_id])
         else:
             res = {
                 'code': 500,
@@ -335,12 +431,12 @@ class UserView(GenericViewSet):
 
     def auth_role(self, request, pk):
         """可分配角色"""
-        user = SysUser.objects.filter(user_id=pk).first()
+        user = SysUserSerializer.setup_eager_loading(SysUser.objects.filter(user_id=pk)).first()
         if user:
             res = {
                 'code': 200,
                 'msg': 'ok',
-                'roles': SysRoleSerializer(SysRole.objects.exclude(sysuserrole__user=user), many=True).data,
+                'roles': SysRoleSerializer(SysRoleSerializer.setup_eager_loading(SysRole.objects.exclude(sysuserrole__user=user)), many=True).data,
                 'user': SysUserSerializer(user).data
             }
         else:
@@ -372,5 +468,7 @@ class UserView(GenericViewSet):
 
         role_ids = role_ids.split(',')
         user.roles.add(*SysRole.objects.filter(role_id__in=role_ids))
+        invalidate_perms([user.user_id])
+        invalidate_user_snapshot([user.user_id])
 
         return JsonResponse(res)
@@ -3,16 +3,16 @@ import request from '@/utils/request'
 // 查询在线用户列表
 export function list(query) {
   return request({
-    url: '/monitor/online/list',
+    url: '/monitor/online/list/',
     method: 'get',
     params: query
   })
 }
 
 // 强退用户
-export function forceLogout(tokenId) {
+export function forceLogout(token_id) {
   return request({
-    url: '/monitor/online/' + tokenId,
+    url: `/monitor/online/${token_id}/`,
     method: 'delete'
   })
 }